@@ -0,0 +1,138 @@
+"""Пропускная способность при медленном вводе-выводе.
+
+Каждый SQL-запрос искусственно задерживается на `delay` секунд, как при
+удалённой или перегруженной базе, и страницы запрашиваются через
+`yatube.asgi` одновременно `concurrency` клиентами. Сравниваются три
+режима:
+
+* `wsgi` — один поток на процесс, как у синхронного воркера;
+* `asgi` — пул потоков `core.asgi`, выборки представления по очереди;
+* `asgi+lookups` — пул потоков и параллельные выборки `core.concurrency`.
+
+Замер работает с настоящей базой: потоки открывают свои соединения, и
+в транзакции теста они бы не увидели данных.
+"""
+import asyncio
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+
+from core.asgi import WsgiToAsgi
+
+from .runner import percentile, scenarios
+
+SCENARIOS = ('profile', 'post_detail')
+MODES = (
+    ('wsgi', 1, False),
+    ('asgi', None, False),
+    ('asgi+lookups', None, True),
+)
+
+
+@contextmanager
+def slow_database(delay):
+    """Задерживает каждый SQL-запрос всех соединений на `delay` секунд."""
+    def slow(execute, sql, params, many, context):
+        time.sleep(delay)
+        return execute(sql, params, many, context)
+
+    patched = []
+
+    def patch(sender, connection, **kwargs):
+        if slow not in connection.execute_wrappers:
+            connection.execute_wrappers.append(slow)
+            patched.append(connection)
+
+    for connection in connections.all():
+        patch(None, connection)
+    connection_created.connect(patch, weak=False)
+    try:
+        yield
+    finally:
+        connection_created.disconnect(patch)
+        for connection in patched:
+            if slow in connection.execute_wrappers:
+                connection.execute_wrappers.remove(slow)
+
+
+async def request(app, url):
+    """GET-запрос к ASGI-приложению; возвращает статус ответа."""
+    parts = urlsplit(url)
+    scope = {
+        'type': 'http', 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': parts.path,
+        'query_string': parts.query.encode(), 'root_path': '',
+        'headers': [(b'host', b'testserver')],
+        'server': ('testserver', 80), 'client': ('127.0.0.1', 0),
+    }
+    messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+    status = {}
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status['code'] = message['status']
+
+    await app(scope, receive, send)
+    return status['code']
+
+
+async def load(app, url, requests, concurrency):
+    limit = asyncio.Semaphore(concurrency)
+    timings = []
+
+    async def one():
+        async with limit:
+            begin = time.perf_counter()
+            code = await request(app, url)
+            timings.append((time.perf_counter() - begin) * 1000)
+            if code != 200:
+                raise RuntimeError(f'{url}: ответ {code}')
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return timings, time.perf_counter() - started
+
+
+def measure(url, threads, lookups, requests, concurrency):
+    app = WsgiToAsgi(WSGIHandler(), threads)
+    try:
+        # Из кеша страниц ответ пришёл бы без единого запроса к базе.
+        with override_settings(CONCURRENT_LOOKUPS=lookups, PAGE_CACHE=False):
+            timings, elapsed = asyncio.run(
+                load(app, url, requests, concurrency)
+            )
+    finally:
+        app.executor.shutdown(wait=True)
+    return {
+        'p50_ms': round(percentile(timings, 0.50), 1),
+        'p95_ms': round(percentile(timings, 0.95), 1),
+        'rps': round(requests / elapsed, 1),
+    }
+
+
+def run(delay=0.01, requests=50, concurrency=16, only=SCENARIOS):
+    """Результаты по сценариям и режимам: {сценарий: {режим: замер}}."""
+    results = {}
+    # Анонимные страницы: вход потребовал бы сессии в каждом потоке.
+    pages = [
+        (name, url) for name, url, user_id in scenarios()
+        if name in only and user_id is None
+    ]
+    with slow_database(delay):
+        for name, url in pages:
+            results[name] = {
+                mode: measure(
+                    url, threads or concurrency, lookups, requests,
+                    concurrency,
+                )
+                for mode, threads, lookups in MODES
+            }
+    return results
@@ -0,0 +1,51 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import Client
+
+from benchmarks import runner
+from core.template_profiler import profile
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Запрашивает страницы posts и показывает, сколько времени уходит '
+        'на теги include, url и thumbnail в их шаблонах.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20)
+        parser.add_argument('--limit', type=int, default=15)
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кеш перед каждым запросом: без кеша фрагментов '
+                 'рендерятся все строки ленты.',
+        )
+        parser.add_argument(
+            '--only', nargs='+', metavar='SCENARIO',
+            help='Профилировать только указанные сценарии.',
+        )
+
+    def handle(self, *args, **options):
+        for name, url, user_id in runner.scenarios():
+            if options['only'] and name not in options['only']:
+                continue
+            client = Client()
+            if user_id is not None:
+                client.force_login(User.objects.get(pk=user_id))
+            client.get(url)
+            with profile() as result:
+                for _ in range(options['requests']):
+                    if options['cold']:
+                        cache.clear()
+                    client.get(url)
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{name}: {url}'))
+            self.stdout.write(
+                f'{"self, мс":>10}{"всего, мс":>11}{"вызовов":>9}  тег'
+            )
+            for row in result.report()[:options['limit']]:
+                self.stdout.write(
+                    f'{row["self_ms"]:>10.1f}{row["total_ms"]:>11.1f}'
+                    f'{row["calls"]:>9}  {row["location"]} '
+                    f'{{% {row["tag"]} %}}'
+                )
@@ -0,0 +1,78 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks import runner
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет время ответа и число запросов страниц posts и '
+        'сравнивает их с сохранённым базовым замером.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=100)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кеш перед каждым запросом.',
+        )
+        parser.add_argument(
+            '--only', nargs='+', metavar='SCENARIO',
+            help='Замерить только указанные сценарии.',
+        )
+        parser.add_argument(
+            '--save', metavar='NAME',
+            help='Сохранить замер как базовый под этим именем.',
+        )
+        parser.add_argument(
+            '--compare', metavar='NAME',
+            help='Сравнить с базовым замером и упасть при регрессии.',
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=0.2,
+            help='Допустимый рост p95 и числа запросов (доля).',
+        )
+        parser.add_argument(
+            '--baseline-dir', default=runner.BASELINE_DIR,
+            help='Каталог базовых замеров.',
+        )
+
+    def handle(self, *args, **options):
+        report = runner.run(
+            requests=options['requests'],
+            warmup=options['warmup'],
+            cold=options['cold'],
+            only=options['only'],
+        )
+        self.stdout.write(
+            f'{"сценарий":<14}{"p50":>9}{"p95":>9}{"p99":>9}'
+            f'{"запросов":>10}{"rps":>9}'
+        )
+        for name, result in report['results'].items():
+            self.stdout.write(
+                f'{name:<14}{result["p50_ms"]:>9}{result["p95_ms"]:>9}'
+                f'{result["p99_ms"]:>9}{result["queries"]:>10}'
+                f'{result["rps"]:>9}'
+            )
+        if options['save']:
+            path = runner.save_baseline(
+                report, options['save'], options['baseline_dir']
+            )
+            self.stdout.write(f'Базовый замер сохранён: {path}')
+        if options['compare']:
+            try:
+                baseline = runner.load_baseline(
+                    options['compare'], options['baseline_dir']
+                )
+            except FileNotFoundError:
+                raise CommandError(
+                    f'Нет базового замера {options["compare"]!r}'
+                )
+            regressions = runner.compare(
+                report, baseline, options['threshold']
+            )
+            for regression in regressions:
+                self.stdout.write(self.style.WARNING(regression))
+            if regressions:
+                raise CommandError(f'Регрессий: {len(regressions)}')
+            self.stdout.write(self.style.SUCCESS('Регрессий нет'))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from benchmarks import concurrency
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность WSGI, ASGI и параллельных '
+        'выборок при медленных ответах базы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--delay', type=float, default=10,
+            help='Задержка каждого SQL-запроса, мс.',
+        )
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument(
+            '--only', nargs='+', metavar='SCENARIO',
+            default=list(concurrency.SCENARIOS),
+        )
+
+    def handle(self, *args, **options):
+        results = concurrency.run(
+            delay=options['delay'] / 1000,
+            requests=options['requests'],
+            concurrency=options['concurrency'],
+            only=options['only'],
+        )
+        self.stdout.write(
+            f'{"сценарий":<14}{"режим":<15}{"p50":>9}{"p95":>9}{"rps":>9}'
+        )
+        for name, modes in results.items():
+            for mode, result in modes.items():
+                self.stdout.write(
+                    f'{name:<14}{mode:<15}{result["p50_ms"]:>9}'
+                    f'{result["p95_ms"]:>9}{result["rps"]:>9}'
+                )
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from benchmarks import micro
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает reverse() и posts.links на адресах строки ленты.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--number', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        result = micro.links(options['number'])
+        self.stdout.write(
+            f'reverse(): {result["reverse_us"]} мкс на строку ленты\n'
+            f'links:     {result["links_us"]} мкс на строку ленты\n'
+            f'ускорение: {result["speedup"]}x'
+        )
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from benchmarks.seeding import Seeder
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, группами, постами, '
+        'подписками и комментариями для нагрузочных замеров.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument(
+            '--follows', type=int, default=20,
+            help='Подписок на одного пользователя.',
+        )
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--seed', type=int,
+            help='Зерно генератора, чтобы повторить тот же набор данных.',
+        )
+
+    def handle(self, *args, **options):
+        seeder = Seeder(
+            batch_size=options['batch_size'],
+            seed=options['seed'],
+            stdout=self.stdout,
+        )
+        seeder.seed(
+            users=options['users'],
+            groups=options['groups'],
+            posts=options['posts'],
+            follows=options['follows'],
+            comments=options['comments'],
+        )
+        self.stdout.write(self.style.SUCCESS('Данные созданы'))
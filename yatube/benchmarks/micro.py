@@ -0,0 +1,39 @@
+"""Микро-замеры отдельных функций без HTTP-запросов."""
+import timeit
+
+from django.urls import reverse
+
+from posts.links import url
+
+# Адреса одной строки ленты: автор, пост и группа.
+ROW_LINKS = (
+    ('posts:profile', ('leo',)),
+    ('posts:post_detail', (12345,)),
+    ('posts:group_list', ('cats',)),
+)
+
+
+def best_of(function, number, repeat=5):
+    """Лучшее время одного вызова в микросекундах."""
+    best = min(timeit.repeat(function, number=number, repeat=repeat))
+    return best / number * 1e6
+
+
+def links(number=10000):
+    """Построение адресов строки ленты через reverse() и posts.links."""
+    def with_reverse():
+        for name, args in ROW_LINKS:
+            reverse(name, args=args)
+
+    def with_links():
+        for name, args in ROW_LINKS:
+            url(name, *args)
+
+    with_links()
+    reverse_us = best_of(with_reverse, number)
+    links_us = best_of(with_links, number)
+    return {
+        'reverse_us': round(reverse_us, 2),
+        'links_us': round(links_us, 2),
+        'speedup': round(reverse_us / links_us, 1),
+    }
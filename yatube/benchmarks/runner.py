@@ -0,0 +1,172 @@
+"""Замеры страниц yatube и сравнение с сохранёнными базовыми значениями.
+
+Страницы запрашиваются через тестовый клиент Django: запрос проходит
+через WSGI-обработчик и все middleware, как в работающем сервере, но
+без сети. Для каждого сценария считаются перцентили времени ответа,
+число SQL-запросов и пропускная способность.
+"""
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import Client
+from django.urls import reverse
+
+from core.concurrency import execute_wrappers
+from posts.models import Comment, Follow, Group, Post, User
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), 'baselines')
+
+# Метрики, рост которых относительно базового замера считается регрессией.
+REGRESSION_METRICS = ('p95_ms', 'queries')
+
+
+def percentile(values, fraction):
+    """Перцентиль по методу ближайшего ранга."""
+    ordered = sorted(values)
+    rank = max(math.ceil(fraction * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+class QueryCounter:
+    """Считает SQL-запросы без включения журнала DEBUG."""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        with self._lock:
+            self.count += 1
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def count_queries():
+    """Счётчик запросов ко всем базам, включая реплики и потоки `gather`."""
+    counter = QueryCounter()
+    with execute_wrappers(counter):
+        yield counter
+
+
+def scenarios():
+    """Сценарии замеров: имя, адрес и пользователь для входа."""
+    post = Post.objects.order_by('-comments_count', '-pk').first()
+    group = Group.objects.order_by('-pk').first()
+    reader = Follow.objects.values_list('user_id', flat=True).first()
+    author = Post.objects.values_list('author__username', flat=True).first()
+    result = [('index', reverse('posts:index'), None)]
+    if group is not None:
+        result.append((
+            'group_posts', reverse('posts:group_list', args=[group.slug]),
+            None,
+        ))
+    if author is not None:
+        result.append((
+            'profile', reverse('posts:profile', args=[author]), None,
+        ))
+    if post is not None:
+        result.append((
+            'post_detail', reverse('posts:post_detail', args=[post.pk]),
+            None,
+        ))
+    if reader is not None:
+        result.append(('follow_index', reverse('posts:follow_index'), reader))
+    return result
+
+
+def measure(url, user_id=None, requests=100, warmup=5, cold=False):
+    """Замеряет одну страницу; `cold` очищает кеш перед каждым запросом."""
+    client = Client()
+    if user_id is not None:
+        client.force_login(User.objects.get(pk=user_id))
+    for _ in range(warmup):
+        client.get(url)
+    timings = []
+    queries = []
+    started = time.perf_counter()
+    with count_queries() as counter:
+        for _ in range(requests):
+            if cold:
+                cache.clear()
+            counter.count = 0
+            begin = time.perf_counter()
+            response = client.get(url)
+            timings.append((time.perf_counter() - begin) * 1000)
+            queries.append(counter.count)
+            if response.status_code != 200:
+                raise RuntimeError(f'{url}: ответ {response.status_code}')
+    elapsed = time.perf_counter() - started
+    return {
+        'url': url,
+        'requests': requests,
+        'p50_ms': round(percentile(timings, 0.50), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'p99_ms': round(percentile(timings, 0.99), 3),
+        'queries': round(sum(queries) / len(queries), 2),
+        'rps': round(requests / elapsed, 1),
+    }
+
+
+def dataset():
+    """Объём данных, на которых сделан замер."""
+    return {
+        'users': User.objects.count(),
+        'posts': Post.objects.count(),
+        'comments': Comment.objects.count(),
+        'follows': Follow.objects.count(),
+    }
+
+
+def run(requests=100, warmup=5, cold=False, only=None):
+    results = {}
+    for name, url, user_id in scenarios():
+        if only and name not in only:
+            continue
+        results[name] = measure(url, user_id, requests, warmup, cold)
+    return {
+        'created': datetime.now(timezone.utc).isoformat(),
+        'debug': settings.DEBUG,
+        'cold': cold,
+        'dataset': dataset(),
+        'results': results,
+    }
+
+
+def baseline_path(name, directory=BASELINE_DIR):
+    return os.path.join(directory, f'{name}.json')
+
+
+def save_baseline(report, name, directory=BASELINE_DIR):
+    os.makedirs(directory, exist_ok=True)
+    path = baseline_path(name, directory)
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(report, file, ensure_ascii=False, indent=2, sort_keys=True)
+    return path
+
+
+def load_baseline(name, directory=BASELINE_DIR):
+    with open(baseline_path(name, directory), encoding='utf-8') as file:
+        return json.load(file)
+
+
+def compare(report, baseline, threshold=0.2):
+    """Регрессии относительно базового замера: список строк."""
+    regressions = []
+    for name, result in report['results'].items():
+        before = baseline['results'].get(name)
+        if before is None:
+            continue
+        for metric in REGRESSION_METRICS:
+            limit = before[metric] * (1 + threshold)
+            if result[metric] > limit:
+                regressions.append(
+                    f'{name}.{metric}: {before[metric]} -> {result[metric]}'
+                )
+    return regressions
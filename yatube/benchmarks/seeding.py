@@ -0,0 +1,171 @@
+"""Синтетические данные для нагрузочных замеров.
+
+Данные похожи на живые: у немногих авторов много постов и читателей,
+у немногих постов много комментариев, даты разбросаны по году. Объекты
+пишутся пакетами через `bulk_create`, после чего производные данные
+(счётчики, поисковый индекс, ленты подписок) пересчитываются командами
+приложения posts.
+"""
+import itertools
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import transaction
+from django.utils import timezone
+from faker import Faker
+
+from posts.models import Comment, Follow, Group, Post, User
+from posts.transfer import keep_pub_date
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def popularity(count):
+    """Накопленные веса по закону Ципфа: первые элементы популярнее."""
+    return list(itertools.accumulate(1 / rank for rank in range(1, count + 1)))
+
+
+class Seeder:
+    def __init__(self, batch_size=1000, seed=None, stdout=None):
+        self.batch_size = batch_size
+        self.random = random.Random(seed)
+        self.fake = Faker('ru_RU')
+        self.fake.seed_instance(seed)
+        self.stdout = stdout
+        self.tag = self.random.randrange(16 ** 6)
+
+    def log(self, message):
+        if self.stdout is not None:
+            self.stdout.write(message)
+
+    def create(self, model, objects, total, **kwargs):
+        done = 0
+        for batch in batched(objects, self.batch_size):
+            with transaction.atomic():
+                model.objects.bulk_create(batch, **kwargs)
+            done += len(batch)
+            self.log(f'{model.__name__}: {done}/{total}')
+
+    def new_ids(self, model, before):
+        return list(model.objects.filter(pk__gt=before).order_by(
+            'pk'
+        ).values_list('pk', flat=True))
+
+    def last_pk(self, model):
+        last = model.objects.order_by('-pk').values_list('pk', flat=True)
+        return last.first() or 0
+
+    def seed_users(self, count):
+        before = self.last_pk(User)
+        # Пароль нельзя использовать для входа и его не нужно хешировать.
+        password = make_password(None)
+        self.create(User, (
+            User(
+                username=f'bench{self.tag:06x}_{number}',
+                first_name=self.fake.first_name(),
+                last_name=self.fake.last_name(),
+                password=password,
+            )
+            for number in range(count)
+        ), count)
+        return self.new_ids(User, before)
+
+    def seed_groups(self, count):
+        before = self.last_pk(Group)
+        self.create(Group, (
+            Group(
+                title=self.fake.sentence(nb_words=3)[:200],
+                slug=f'bench{self.tag:06x}-{number}',
+                description=self.fake.sentence()[:200],
+            )
+            for number in range(count)
+        ), count)
+        return self.new_ids(Group, before)
+
+    def seed_posts(self, count, author_ids, group_ids, days=365):
+        before = self.last_pk(Post)
+        weights = popularity(len(author_ids))
+        now = timezone.now()
+
+        def posts():
+            for _ in range(count):
+                group_id = None
+                if group_ids and self.random.random() < 0.6:
+                    group_id = self.random.choice(group_ids)
+                yield Post(
+                    text=self.fake.paragraph(nb_sentences=4),
+                    author_id=self.random.choices(
+                        author_ids, cum_weights=weights
+                    )[0],
+                    group_id=group_id,
+                    pub_date=now - timedelta(
+                        seconds=self.random.randrange(days * 86400)
+                    ),
+                )
+
+        with keep_pub_date():
+            self.create(Post, posts(), count)
+        return self.new_ids(Post, before)
+
+    def seed_follows(self, per_user, user_ids):
+        weights = popularity(len(user_ids))
+        per_user = min(per_user, len(user_ids) - 1)
+
+        def follows():
+            for user_id in user_ids:
+                authors = set()
+                while len(authors) < per_user:
+                    author_id = self.random.choices(
+                        user_ids, cum_weights=weights
+                    )[0]
+                    if author_id != user_id:
+                        authors.add(author_id)
+                for author_id in authors:
+                    yield Follow(user_id=user_id, author_id=author_id)
+
+        self.create(
+            Follow, follows(), per_user * len(user_ids),
+            ignore_conflicts=True,
+        )
+
+    def seed_comments(self, count, post_ids, user_ids):
+        weights = popularity(len(post_ids))
+        # Самые обсуждаемые посты — не самые старые: порядок перемешан.
+        post_ids = post_ids[:]
+        self.random.shuffle(post_ids)
+        self.create(Comment, (
+            Comment(
+                post_id=self.random.choices(post_ids, cum_weights=weights)[0],
+                author_id=self.random.choice(user_ids),
+                text=self.fake.sentence()[:200],
+            )
+            for _ in range(count)
+        ), count)
+
+    def seed(self, users, groups, posts, follows, comments):
+        user_ids = self.seed_users(users)
+        group_ids = self.seed_groups(groups)
+        post_ids = self.seed_posts(posts, user_ids, group_ids)
+        if follows and len(user_ids) > 1:
+            self.seed_follows(follows, user_ids)
+        if comments and post_ids:
+            self.seed_comments(comments, post_ids, user_ids)
+        self.rebuild()
+
+    def rebuild(self):
+        """Производные данные, которые bulk_create не обновил."""
+        for command in ('reconcile_counters', 'reindex_search',
+                        'rebuild_timelines'):
+            self.log(f'manage.py {command}')
+            call_command(command, stdout=self.stdout)
+        cache.clear()
@@ -0,0 +1,109 @@
+import shutil
+import tempfile
+import threading
+import time
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.test import TestCase, TransactionTestCase
+
+from benchmarks import concurrency, micro, runner
+from core import concurrency as core_concurrency
+from posts.models import Comment, Follow, Group, Post, TimelineEntry, User
+
+
+class PercentileTest(TestCase):
+    def test_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(runner.percentile(values, 0.5), 50)
+        self.assertEqual(runner.percentile(values, 0.99), 99)
+        self.assertEqual(runner.percentile([7], 0.95), 7)
+
+
+class CountQueriesTest(TransactionTestCase):
+    def test_gather_threads_counted(self):
+        barrier = threading.Barrier(2, timeout=5)
+
+        def lookup():
+            barrier.wait()
+            return Post.objects.count()
+
+        with mock.patch.object(
+            core_concurrency, 'is_concurrent', return_value=True
+        ):
+            with runner.count_queries() as counter:
+                User.objects.count()
+                core_concurrency.gather(a=lookup, b=lookup)
+        self.assertEqual(counter.count, 3)
+
+
+class MicroBenchmarkTest(TestCase):
+    def test_links_faster_than_reverse(self):
+        result = micro.links(number=200)
+        self.assertLess(result['links_us'], result['reverse_us'])
+
+
+class SlowDatabaseTest(TestCase):
+    def test_queries_delayed_inside_block_only(self):
+        with concurrency.slow_database(0.05):
+            started = time.perf_counter()
+            Post.objects.count()
+            self.assertGreaterEqual(time.perf_counter() - started, 0.05)
+        started = time.perf_counter()
+        Post.objects.count()
+        self.assertLess(time.perf_counter() - started, 0.05)
+
+
+class BenchmarkTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command(
+            'seed_data', users=6, groups=2, posts=40, follows=2,
+            comments=30, seed=1, stdout=StringIO(),
+        )
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_seed_data(self):
+        self.assertEqual(User.objects.count(), 6)
+        self.assertEqual(Group.objects.count(), 2)
+        self.assertEqual(Post.objects.count(), 40)
+        self.assertEqual(Comment.objects.count(), 30)
+        self.assertEqual(Follow.objects.count(), 12)
+        self.assertTrue(TimelineEntry.objects.exists())
+
+    def benchmark(self, *args):
+        output = StringIO()
+        call_command(
+            'run_benchmark', '--requests', '3', '--warmup', '1',
+            '--baseline-dir', self.directory, *args, stdout=output,
+        )
+        return output.getvalue()
+
+    def test_report_and_baseline(self):
+        output = self.benchmark('--save', 'local')
+        for name in ('index', 'group_posts', 'profile', 'post_detail',
+                     'follow_index'):
+            self.assertIn(name, output)
+        report = runner.load_baseline('local', self.directory)
+        self.assertEqual(report['dataset']['posts'], 40)
+        # Анонимная главная отдаётся из кеша страниц, лента подписок — нет.
+        self.assertEqual(report['results']['index']['queries'], 0)
+        self.assertGreater(report['results']['follow_index']['queries'], 0)
+        self.assertIn('Регрессий нет', self.benchmark(
+            '--compare', 'local', '--threshold', '100'
+        ))
+
+    def test_regression_fails(self):
+        report = runner.run(requests=2, warmup=0, only=['follow_index'])
+        report['results']['follow_index']['queries'] = 0
+        runner.save_baseline(report, 'fast', self.directory)
+        with self.assertRaises(CommandError):
+            self.benchmark('--only', 'follow_index', '--compare', 'fast')
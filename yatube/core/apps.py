@@ -1,5 +1,14 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.backends.signals import connection_created
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from .database import tune_sqlite
+        connection_created.connect(tune_sqlite)
+        if settings.METRICS_ENABLED:
+            from .middleware import install_hooks
+            install_hooks()
@@ -0,0 +1,147 @@
+"""ASGI-обёртка для WSGI-приложения Django 2.2.
+
+В Django 2.2 нет ни ASGI-обработчика, ни асинхронных представлений,
+поэтому `WsgiToAsgi` принимает соединения в цикле событий, а само
+приложение выполняет в пуле из `ASGI_THREADS` потоков. Медленный ответ
+базы или построение миниатюры занимает один поток пула, а не весь
+процесс сервера, и в одном процессе обслуживается столько медленных
+запросов одновременно, сколько в пуле потоков.
+
+Тело запроса копится в `SpooledTemporaryFile`: в памяти держится не
+больше `DATA_UPLOAD_MAX_MEMORY_SIZE` байт, остальное уходит во
+временный файл, а ограничения загрузки картинок проверяет обработчик
+загрузки при чтении `wsgi.input`. Ответ отправляется клиенту по частям,
+по мере того как их отдаёт приложение.
+"""
+import asyncio
+import itertools
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+
+def build_environ(scope, stream):
+    """WSGI-окружение для HTTP-запроса из ASGI scope и потока тела."""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('127.0.0.1', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        # WSGI передаёт байты пути как строку latin-1.
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'REMOTE_ADDR': client[0],
+        'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': stream,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for raw_name, raw_value in scope.get('headers', ()):
+        name = raw_name.decode('latin-1').upper().replace('-', '_')
+        value = raw_value.decode('latin-1')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        if name in environ:
+            value = f'{environ[name]},{value}'
+        environ[name] = value
+    return environ
+
+
+class WsgiToAsgi:
+    def __init__(self, wsgi_application, threads=None):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(
+            threads or settings.ASGI_THREADS, thread_name_prefix='asgi'
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self.http(scope, receive, send)
+        else:
+            raise ValueError(f'Неподдерживаемый тип ASGI: {scope["type"]}')
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def http(self, scope, receive, send):
+        body = tempfile.SpooledTemporaryFile(
+            max_size=(
+                settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+                or settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+            )
+        )
+        try:
+            while True:
+                message = await receive()
+                if message['type'] == 'http.disconnect':
+                    return
+                body.write(message.get('body', b''))
+                if not message.get('more_body', False):
+                    break
+            body.seek(0)
+            loop = asyncio.get_running_loop()
+
+            def send_from_thread(message):
+                asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+            await loop.run_in_executor(
+                self.executor, self.run, build_environ(scope, body),
+                send_from_thread,
+            )
+        finally:
+            body.close()
+
+    def run(self, environ, send):
+        """Выполняет WSGI-приложение в потоке пула и отправляет ответ.
+
+        Части ответа отправляются по одной: поток ждёт, пока клиент
+        примет очередную часть, и большой ответ не копится в памяти.
+        """
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [
+                (name.lower().encode('latin-1'), value.encode('latin-1'))
+                for name, value in headers
+            ]
+
+        result = self.wsgi_application(environ, start_response)
+        try:
+            chunks = iter(result)
+            # Приложение может вызвать start_response при первой части.
+            first = next(chunks, b'')
+            send({
+                'type': 'http.response.start',
+                'status': response['status'],
+                'headers': response['headers'],
+            })
+            for chunk in itertools.chain([first], chunks):
+                if chunk:
+                    send({
+                        'type': 'http.response.body', 'body': chunk,
+                        'more_body': True,
+                    })
+            send({'type': 'http.response.body', 'body': b''})
+        finally:
+            # Django закрывает соединения с базой по сигналу close(),
+            # поэтому он вызывается в том же потоке пула.
+            if hasattr(result, 'close'):
+                result.close()
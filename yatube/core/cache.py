@@ -0,0 +1,93 @@
+"""Доступ к кешу проекта с защитой от одновременного пересчёта.
+
+Когда у популярного ключа истекает срок, все процессы разом начинают
+строить одно и то же значение. `get_or_set()` пересчитывает значение
+заранее с вероятностью, растущей к концу срока жизни (probabilistic
+early expiration), и пускает к пересчёту только один процесс — тот, кто
+взял блокировку через атомарный `add()`; остальные отдают прежнее
+значение или ждут нового.
+
+Блокировка работает между процессами, только если `add()` бэкенда
+атомарен: так у Redis (`SET NX`), у файлового бэкенда проекта
+(`core.cache_backends.FileBasedCache`) и у locmem в пределах процесса.
+С файловым бэкендом Django два процесса могут построить значение
+одновременно.
+
+Если построенное значение сохранять нельзя (например, страница с
+ошибкой), на месте блокировки на `UNCACHEABLE_TIMEOUT` секунд остаётся
+метка: ждущие и следующие запросы строят значение сами и параллельно,
+а не по очереди под блокировкой.
+"""
+import math
+import random
+import time
+
+from django.core.cache import caches
+
+LOCK_KEY = '{}:lock'
+LOCK_TIMEOUT = 30
+WAIT_INTERVAL = 0.05
+UNCACHEABLE = 'uncacheable'
+UNCACHEABLE_TIMEOUT = 10
+
+
+def _store(cache, key, value, started, timeout):
+    delta = time.monotonic() - started
+    expires = time.time() + timeout if timeout is not None else None
+    cache.set(key, (value, delta, expires), timeout)
+    return value
+
+
+def _is_fresh(delta, expires, beta):
+    if expires is None:
+        return True
+    # 1 - random() лежит в (0, 1], логарифм от нуля не берётся.
+    early = -delta * beta * math.log(1.0 - random.random())
+    return time.time() + early < expires
+
+
+def get_or_set(key, producer, timeout, alias='default', beta=1.0,
+               lock_timeout=LOCK_TIMEOUT, cacheable=None):
+    """Возвращает значение из кеша или строит его вызовом `producer()`.
+
+    `beta` > 1 делает досрочный пересчёт агрессивнее, 0 отключает его.
+    Значение, для которого `cacheable(value)` ложно, возвращается, но
+    не сохраняется.
+    """
+    cache = caches[alias]
+    lock_key = LOCK_KEY.format(key)
+    entry = cache.get(key)
+    if entry is not None:
+        value, delta, expires = entry
+        if _is_fresh(delta, expires, beta):
+            return value
+        locked = cache.add(lock_key, True, lock_timeout)
+        if not locked:
+            return value
+    else:
+        deadline = time.monotonic() + lock_timeout
+        locked = cache.add(lock_key, True, lock_timeout)
+        while not locked and time.monotonic() < deadline:
+            # Значение уже строит другой процесс: ждём его результата.
+            time.sleep(WAIT_INTERVAL)
+            found = cache.get_many([key, lock_key])
+            if key in found:
+                return found[key][0]
+            if found.get(lock_key) == UNCACHEABLE:
+                return producer()
+            locked = cache.add(lock_key, True, lock_timeout)
+    try:
+        started = time.monotonic()
+        value = producer()
+        if cacheable is not None and not cacheable(value):
+            cache.set(lock_key, UNCACHEABLE, UNCACHEABLE_TIMEOUT)
+            locked = False
+            return value
+        return _store(cache, key, value, started, timeout)
+    finally:
+        if locked:
+            cache.delete(lock_key)
+
+
+def delete(key, alias='default'):
+    caches[alias].delete(key)
@@ -0,0 +1,159 @@
+"""Бэкенды кеша: Redis и файловый кеш с атомарным `add()`.
+
+Клиент Redis по умолчанию — пакет `redis`, он нужен только при
+использовании этого бэкенда. В `OPTIONS['CLIENT_FACTORY']` можно указать
+путь к своей фабрике клиента, например к заглушке в тестах.
+
+`add()` файлового бэкенда Django сначала проверяет файл, а потом пишет
+его, и два процесса могут добавить ключ одновременно. На `add()`
+держится блокировка `core.cache.get_or_set`, поэтому `FileBasedCache`
+проекта добавляет ключ под файлом-замком, созданным с `O_EXCL`.
+"""
+import os
+import pickle
+import time
+
+from django.core.cache.backends import filebased
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.functional import cached_property
+from django.utils.module_loading import import_string
+
+
+def dumps(value):
+    # Целые числа хранятся как есть, чтобы работал атомарный INCRBY.
+    if type(value) is int:
+        return str(value).encode()
+    return pickle.dumps(value)
+
+
+def loads(raw):
+    try:
+        return int(raw)
+    except ValueError:
+        return pickle.loads(raw)
+
+
+def redis_client(location):
+    try:
+        import redis
+    except ImportError as error:
+        raise ImproperlyConfigured(
+            'Для RedisCache установите пакет redis.'
+        ) from error
+    return redis.Redis.from_url(location)
+
+
+class RedisCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._location = location
+        options = params.get('OPTIONS', {})
+        self._client_factory = options.get(
+            'CLIENT_FACTORY', 'core.cache_backends.redis_client'
+        )
+
+    @cached_property
+    def client(self):
+        return import_string(self._client_factory)(self._location)
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _expiry(self, timeout):
+        """Срок жизни в миллисекундах; None — бессрочно."""
+        if timeout == DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return None
+        return max(int(timeout * 1000), 1)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return bool(self.client.set(
+            self._key(key, version), dumps(value),
+            px=self._expiry(timeout), nx=True,
+        ))
+
+    def get(self, key, default=None, version=None):
+        raw = self.client.get(self._key(key, version))
+        return default if raw is None else loads(raw)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.client.set(
+            self._key(key, version), dumps(value),
+            px=self._expiry(timeout),
+        )
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        expiry = self._expiry(timeout)
+        if expiry is None:
+            return bool(self.client.persist(key))
+        return bool(self.client.pexpire(key, expiry))
+
+    def delete(self, key, version=None):
+        self.client.delete(self._key(key, version))
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        if not keys:
+            return {}
+        raws = self.client.mget([self._key(key, version) for key in keys])
+        return {
+            key: loads(raw)
+            for key, raw in zip(keys, raws) if raw is not None
+        }
+
+    def has_key(self, key, version=None):
+        return bool(self.client.exists(self._key(key, version)))
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        if not self.client.exists(key):
+            raise ValueError(f"Key '{key}' not found")
+        return self.client.incrby(key, delta)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        for key, value in data.items():
+            self.set(key, value, timeout, version=version)
+        return []
+
+    def delete_many(self, keys, version=None):
+        keys = [self._key(key, version) for key in keys]
+        if keys:
+            self.client.delete(*keys)
+
+    def clear(self):
+        self.client.flushdb()
+
+
+class FileBasedCache(filebased.FileBasedCache):
+    lock_suffix = '.lock'
+    # Замок старше этого числа секунд оставлен упавшим процессом.
+    lock_stale = 10
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._createdir()
+        lock = self._key_to_file(key, version) + self.lock_suffix
+        try:
+            os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            # Ключ прямо сейчас добавляет другой процесс.
+            if not self._remove_stale(lock):
+                return False
+            return self.add(key, value, timeout, version)
+        try:
+            return super().add(key, value, timeout, version)
+        finally:
+            os.remove(lock)
+
+    def _remove_stale(self, lock):
+        try:
+            if time.time() - os.path.getmtime(lock) < self.lock_stale:
+                return False
+            os.remove(lock)
+        except FileNotFoundError:
+            pass
+        return True
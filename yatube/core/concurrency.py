@@ -0,0 +1,88 @@
+"""Параллельное выполнение независимых запросов к базе.
+
+Django 2.2 не умеет асинхронных представлений, поэтому независимые
+выборки одного представления выполняются в пуле потоков, каждая со
+своим соединением. Это окупается, когда база отвечает медленно:
+представление ждёт самый долгий запрос, а не сумму всех.
+
+Внутри транзакции выборки выполняются по очереди: другие соединения
+не видят её незафиксированных изменений. Так же и с SQLite в памяти
+(тесты): соединения делят кеш, и блокировка таблицы сразу даёт ошибку
+вместо ожидания `busy_timeout`.
+
+Обёртки SQL запроса (метрики, разбор запросов) ставятся через
+`execute_wrappers()`: они переходят и на соединения потоков пула.
+Соединения потоков живут по тем же правилам `CONN_MAX_AGE`, что и
+соединения запросов.
+"""
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import close_old_connections, connection, connections
+
+_executor = None
+_wrappers = contextvars.ContextVar('execute_wrappers', default=())
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            settings.LOOKUP_THREADS, thread_name_prefix='lookup'
+        )
+    return _executor
+
+
+def _wrap_connections(stack, wrappers):
+    for db in connections.all():
+        for wrapper in wrappers:
+            stack.enter_context(db.execute_wrapper(wrapper))
+
+
+@contextmanager
+def execute_wrappers(*wrappers):
+    """Ставит обёртки SQL на соединения запроса и выборок `gather()`."""
+    token = _wrappers.set(_wrappers.get() + wrappers)
+    try:
+        with ExitStack() as stack:
+            _wrap_connections(stack, wrappers)
+            yield
+    finally:
+        _wrappers.reset(token)
+
+
+def _call(call):
+    with ExitStack() as stack:
+        _wrap_connections(stack, _wrappers.get())
+        return call()
+
+
+def _run(context, call):
+    try:
+        # Контекст запроса (реплика, обёртки SQL) переходит в поток пула.
+        return context.run(_call, call)
+    finally:
+        # Как после запроса: закрываются только устаревшие соединения.
+        close_old_connections()
+
+
+def is_concurrent():
+    """Можно ли разнести выборки по соединениям потоков."""
+    return settings.CONCURRENT_LOOKUPS and not (
+        connection.in_atomic_block
+        or connection.vendor == 'sqlite' and connection.is_in_memory_db()
+    )
+
+
+def gather(**calls):
+    """Выполняет вызовы без аргументов и возвращает их результаты по имени."""
+    if len(calls) < 2 or not is_concurrent():
+        return {name: call() for name, call in calls.items()}
+    executor = get_executor()
+    futures = {
+        name: executor.submit(_run, contextvars.copy_context(), call)
+        for name, call in calls.items()
+    }
+    return {name: future.result() for name, future in futures.items()}
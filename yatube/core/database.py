@@ -0,0 +1,19 @@
+"""Настройка соединений с базой данных.
+
+SQLite по умолчанию рассчитан на одного писателя без конкурентов:
+журнал отката блокирует чтение на время записи, а конкурирующая запись
+сразу падает с «database is locked». Для работы под нагрузкой каждое
+новое соединение переводится в режим WAL (читатели не ждут писателя),
+ждёт освобождения блокировки до `busy_timeout` миллисекунд и читает файл
+через mmap. Значения PRAGMA задаются в `settings.SQLITE_PRAGMAS`.
+"""
+from django.conf import settings
+
+
+def tune_sqlite(sender, connection, **kwargs):
+    """Обработчик `connection_created`: применяет PRAGMA к SQLite."""
+    if connection.vendor != 'sqlite' or connection.is_in_memory_db():
+        return
+    # Напрямую через драйвер: эти запросы не нужны в метриках запроса.
+    for name, value in settings.SQLITE_PRAGMAS.items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
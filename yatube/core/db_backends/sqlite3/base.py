@@ -0,0 +1,94 @@
+"""SQLite с пулом соединений внутри процесса.
+
+Постоянные соединения (`CONN_MAX_AGE`) живут в потоке, который их
+открыл. Когда поток сервера завершается или соединение закрывается по
+возрасту, открытое соединение SQLite не выбрасывается, а возвращается в
+пул и достаётся следующему потоку: не нужно заново открывать файл и
+регистрировать функции. PRAGMA из `core.database` всё же выполняются
+при каждой выдаче из пула: `connect()` каждый раз посылает сигнал
+`connection_created`, а повторная установка PRAGMA дешёвая.
+
+Соединение после ошибки базы или непригодное к работе в пул не
+возвращается, а закрывается.
+
+Размер пула задаётся в `OPTIONS['POOL_SIZE']` (0 — без пула), время
+жизни соединения в пуле — в `OPTIONS['POOL_RECYCLE']` в секундах.
+"""
+import queue
+import threading
+import time
+
+from django.db.backends.sqlite3 import base
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(name, size):
+    with _pools_lock:
+        pool = _pools.get(name)
+        if pool is None:
+            pool = _pools[name] = queue.LifoQueue(size)
+        return pool
+
+
+def clear_pools():
+    """Закрывает все соединения в пулах."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        while True:
+            try:
+                connection, _ = pool.get_nowait()
+            except queue.Empty:
+                break
+            connection.close()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        options = self.settings_dict['OPTIONS']
+        self.pool_size = options.get('POOL_SIZE', 0)
+        self.pool_recycle = options.get('POOL_RECYCLE', 3600)
+        self.connected_at = None
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('POOL_SIZE', None)
+        params.pop('POOL_RECYCLE', None)
+        return params
+
+    @property
+    def pool(self):
+        if not self.pool_size or self.is_in_memory_db():
+            return None
+        return get_pool(self.settings_dict['NAME'], self.pool_size)
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        while pool is not None:
+            try:
+                connection, connected_at = pool.get_nowait()
+            except queue.Empty:
+                break
+            if time.monotonic() - connected_at < self.pool_recycle:
+                self.connected_at = connected_at
+                return connection
+            connection.close()
+        self.connected_at = time.monotonic()
+        return super().get_new_connection(conn_params)
+
+    def _close(self):
+        pool = self.pool
+        if (
+            pool is None or self.connection is None
+            or self.connection.in_transaction
+            or self.errors_occurred or not self.is_usable()
+        ):
+            return super()._close()
+        try:
+            pool.put_nowait((self.connection, self.connected_at))
+        except queue.Full:
+            return super()._close()
@@ -0,0 +1,78 @@
+"""Персональные фрагменты общих страниц.
+
+Страница ленты почти целиком одинакова для всех посетителей; от
+пользователя зависят только меню в шапке, форма комментария с токеном
+CSRF и кнопки автора и подписки. Такие места шаблона отмечаются тегом
+`{% fragment 'имя' аргумент=значение %}`.
+
+Обычно тег просто рендерит шаблон фрагмента на месте. Внутри `shared()`
+вместо фрагмента выводится метка с его именем и аргументами: страница
+с метками одна на всех и её можно кешировать. `stitch()` при каждом
+ответе подставляет вместо меток фрагменты текущего посетителя, как
+`<esi:include>` на стороне CDN.
+
+Метку нельзя подделать текстом поста: автоэкранирование превращает `<`
+в `&lt;`.
+"""
+import base64
+import json
+import re
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.template.loader import render_to_string
+
+PLACEHOLDER = '<!--fragment:{}-->'
+PLACEHOLDER_RE = re.compile(rb'<!--fragment:([A-Za-z0-9_=-]+)-->')
+
+_fragments = {}
+
+
+def register(name, template_name):
+    """Декоратор: функция `(request, **kwargs)` → контекст фрагмента."""
+    def decorator(get_context):
+        _fragments[name] = (template_name, get_context)
+        return get_context
+    return decorator
+
+
+def render(request, name, kwargs):
+    template_name, get_context = _fragments[name]
+    return render_to_string(
+        template_name, get_context(request, **kwargs), request=request
+    )
+
+
+def placeholder(name, kwargs):
+    data = json.dumps([name, kwargs], separators=(',', ':'), sort_keys=True)
+    return PLACEHOLDER.format(
+        base64.urlsafe_b64encode(data.encode()).decode()
+    )
+
+
+def is_shared(request):
+    return getattr(request, '_shared_page', False)
+
+
+@contextmanager
+def shared(request):
+    """Рендеринг общей для всех страницы: фрагменты заменяются метками."""
+    request._shared_page = True
+    try:
+        yield
+    finally:
+        request._shared_page = False
+
+
+def stitch(request, content):
+    """Подставляет в содержимое страницы фрагменты посетителя."""
+    def replace(match):
+        name, kwargs = json.loads(base64.urlsafe_b64decode(match.group(1)))
+        return render(request, name, kwargs).encode(settings.DEFAULT_CHARSET)
+
+    return PLACEHOLDER_RE.sub(replace, content)
+
+
+@register('header', 'includes/header.html')
+def header(request):
+    return {}
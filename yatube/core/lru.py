@@ -0,0 +1,105 @@
+"""Ограниченный кеш в памяти процесса.
+
+Для горячих и почти неизменных значений (группа по slug, автор по
+имени) даже поход в общий кеш лишний. `LRUCache` держит значения в
+памяти процесса: не больше `max_entries` записей и `max_bytes` байт,
+каждая живёт не дольше `ttl` секунд. При переполнении вытесняются
+давно не читавшиеся записи. Другие процессы сервера о сбросе записи
+не узнают, поэтому `ttl` ограничивает, насколько их копии отстают.
+
+Счётчики попаданий, промахов и вытеснений видны в `/metrics/`.
+"""
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+_caches = weakref.WeakSet()
+
+
+class LRUCache:
+    def __init__(self, name, max_entries=1000, max_bytes=1024 * 1024,
+                 ttl=60, sizeof=sys.getsizeof):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        _caches.add(self)
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] < time.monotonic():
+                self._pop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value):
+        size = self.sizeof(key) + self.sizeof(value)
+        with self._lock:
+            if key in self._data:
+                self._pop(key)
+            if size > self.max_bytes:
+                return
+            self._data[key] = (value, time.monotonic() + self.ttl, size)
+            self.bytes += size
+            while (len(self._data) > self.max_entries
+                   or self.bytes > self.max_bytes):
+                self._pop(next(iter(self._data)))
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._data:
+                self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def _pop(self, key):
+        self.bytes -= self._data.pop(key)[2]
+
+    def stats(self):
+        return {
+            'entries': len(self._data), 'bytes': self.bytes,
+            'hits': self.hits, 'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
+def render(prefix='yatube'):
+    """Счётчики и размеры всех кешей в текстовом формате Prometheus."""
+    caches = sorted(_caches, key=lambda cache: cache.name)
+    if not caches:
+        return ''
+    lines = []
+    for metric, kind in (
+        ('hits', 'counter'), ('misses', 'counter'),
+        ('evictions', 'counter'), ('entries', 'gauge'), ('bytes', 'gauge'),
+    ):
+        name = f'{prefix}_lru_{metric}'
+        if kind == 'counter':
+            name += '_total'
+        lines.append(f'# TYPE {name} {kind}')
+        for cache in caches:
+            value = cache.stats()[metric]
+            lines.append(f'{name}{{cache="{cache.name}"}} {value}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from core import queries
+
+SORT_KEYS = {'total': 'total_ms', 'count': 'count', 'max': 'max_ms'}
+
+
+class Command(BaseCommand):
+    help = 'Выводит самые дорогие формы SQL-запросов по данным всех процессов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument(
+            '--sort', choices=SORT_KEYS, default='total',
+            help='Порядок: суммарное время, число выполнений или максимум.',
+        )
+        parser.add_argument('--dir', help='Каталог с файлами процессов.')
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Удалить накопленные файлы после вывода.',
+        )
+
+    def handle(self, *args, **options):
+        merged = queries.load(options['dir'])
+        entries = merged.top(options['limit'], SORT_KEYS[options['sort']])
+        for entry in entries:
+            self.stdout.write(
+                f"{entry['total_ms']:10.1f} мс {entry['count']:8d} раз "
+                f"max {entry['max_ms']:.1f} мс  {', '.join(entry['views'])}"
+            )
+            self.stdout.write(f"    {entry['sql']}")
+        if options['reset']:
+            queries.reset(options['dir'])
+        self.stdout.write(self.style.SUCCESS(f'Форм запросов: {len(entries)}'))
@@ -0,0 +1,109 @@
+"""Метрики запросов внутри процесса.
+
+Гистограммы и счётчики хранятся в памяти рабочего процесса и отдаются
+эндпоинтом `/metrics/` в текстовом формате Prometheus. Каждый процесс
+сервера собирает свои числа; суммирует их сборщик метрик.
+"""
+import math
+import threading
+from bisect import bisect_left
+
+DURATION_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, math.inf)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, math.inf)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield bound, total
+
+
+class Registry:
+    """Гистограммы и счётчики с метками; безопасен для потоков."""
+
+    def __init__(self, prefix='yatube'):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+
+    def observe(self, name, labels, value, buckets=DURATION_BUCKETS):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def increment(self, name, labels, amount=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def get_counter(self, name, **labels):
+        return self._counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def get_histogram(self, name, **labels):
+        return self._histograms.get((name, tuple(sorted(labels.items()))))
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def render(self):
+        """Все метрики в текстовом формате Prometheus."""
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+        lines = []
+        seen = set()
+        for (name, labels), histogram in histograms:
+            metric = f'{self.prefix}_{name}'
+            if metric not in seen:
+                seen.add(metric)
+                lines.append(f'# TYPE {metric} histogram')
+            for bound, total in histogram.cumulative():
+                le = '+Inf' if bound == math.inf else f'{bound:g}'
+                lines.append(
+                    f'{metric}_bucket{_labels(labels, le=le)} {total}'
+                )
+            lines.append(f'{metric}_sum{_labels(labels)} {histogram.sum:g}')
+            lines.append(f'{metric}_count{_labels(labels)} {histogram.count}')
+        for (name, labels), value in counters:
+            metric = f'{self.prefix}_{name}_total'
+            if metric not in seen:
+                seen.add(metric)
+                lines.append(f'# TYPE {metric} counter')
+            lines.append(f'{metric}{_labels(labels)} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ''
+    body = ','.join(
+        '{}="{}"'.format(
+            key,
+            str(value).replace('\\', '\\\\').replace('"', '\\"'),
+        )
+        for key, value in pairs
+    )
+    return '{' + body + '}'
+
+
+registry = Registry()
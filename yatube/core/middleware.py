@@ -0,0 +1,192 @@
+"""Замер стоимости запросов.
+
+`RequestMetricsMiddleware` считает для каждого запроса общее время,
+число и время SQL-запросов, время рендеринга шаблонов и попадания в
+кеш. Числа уходят клиенту в заголовке `Server-Timing` и копятся в
+гистограммах `core.metrics` по имени представления. Рендеринг и кеш
+замеряются обёртками, которые `install_hooks()` ставит один раз при
+запуске; вне запроса они сразу передают вызов дальше.
+
+`QueryInspectorMiddleware` разбирает SQL части запросов (`core.queries`).
+"""
+import random
+import threading
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.template.backends.django import Template
+
+from .concurrency import execute_wrappers
+from .metrics import QUERY_BUCKETS, registry
+from .queries import QueryInspector
+
+_current = ContextVar('request_stats', default=None)
+# get_many() из BaseCache читает ключи через get(): такие чтения уже
+# учтены во внешнем вызове.
+_in_get_many = ContextVar('in_get_many', default=False)
+_MISSING = object()
+
+
+class RequestStats:
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Запросы идут и из потоков core.concurrency.gather.
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.sql_count += 1
+                self.sql_time += elapsed
+
+
+def current_stats():
+    """Счётчики текущего запроса или None вне запроса."""
+    return _current.get()
+
+
+def _timed_render(render):
+    @wraps(render)
+    def wrapper(self, *args, **kwargs):
+        stats = _current.get()
+        if stats is None:
+            return render(self, *args, **kwargs)
+        # Вложенный render_to_string уже учтён во внешнем рендеринге.
+        stats.template_depth += 1
+        start = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            stats.template_depth -= 1
+            if not stats.template_depth:
+                stats.template_time += time.perf_counter() - start
+    wrapper.metrics_hook = True
+    return wrapper
+
+
+def _counted_get(get):
+    @wraps(get)
+    def wrapper(self, key, default=None, version=None):
+        stats = _current.get()
+        if stats is None or _in_get_many.get():
+            return get(self, key, default, version)
+        value = get(self, key, _MISSING, version)
+        if value is _MISSING:
+            stats.cache_misses += 1
+            return default
+        stats.cache_hits += 1
+        return value
+    wrapper.metrics_hook = True
+    return wrapper
+
+
+def _counted_get_many(get_many):
+    @wraps(get_many)
+    def wrapper(self, keys, version=None):
+        stats = _current.get()
+        if stats is None:
+            return get_many(self, keys, version)
+        keys = list(keys)
+        token = _in_get_many.set(True)
+        try:
+            found = get_many(self, keys, version)
+        finally:
+            _in_get_many.reset(token)
+        stats.cache_hits += len(found)
+        stats.cache_misses += len(keys) - len(found)
+        return found
+    wrapper.metrics_hook = True
+    return wrapper
+
+
+def _patch(cls, name, decorator):
+    method = getattr(cls, name)
+    if not getattr(method, 'metrics_hook', False):
+        setattr(cls, name, decorator(method))
+
+
+def install_hooks():
+    """Оборачивает рендеринг шаблонов и чтение из настроенных кешей."""
+    _patch(Template, 'render', _timed_render)
+    for alias in settings.CACHES:
+        backend = type(caches[alias])
+        _patch(backend, 'get', _counted_get)
+        _patch(backend, 'get_many', _counted_get_many)
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            with execute_wrappers(stats):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total = (time.perf_counter() - start) * 1000
+        self.record(request, response, stats, total)
+        response['Server-Timing'] = self.server_timing(stats, total)
+        return response
+
+    def record(self, request, response, stats, total):
+        match = request.resolver_match
+        labels = {'view': match.view_name if match else 'unresolved'}
+        registry.observe('request_duration_ms', labels, total)
+        registry.observe('sql_duration_ms', labels, stats.sql_time * 1000)
+        registry.observe(
+            'sql_queries', labels, stats.sql_count, buckets=QUERY_BUCKETS
+        )
+        registry.observe(
+            'template_duration_ms', labels, stats.template_time * 1000
+        )
+        registry.increment(
+            'requests', {**labels, 'status': response.status_code}
+        )
+        if stats.cache_hits:
+            registry.increment('cache_hits', labels, stats.cache_hits)
+        if stats.cache_misses:
+            registry.increment('cache_misses', labels, stats.cache_misses)
+
+    def server_timing(self, stats, total):
+        return ', '.join((
+            f'app;dur={total:.1f}',
+            f'db;dur={stats.sql_time * 1000:.1f};'
+            f'desc="{stats.sql_count} queries"',
+            f'tpl;dur={stats.template_time * 1000:.1f}',
+            f'cache;desc="hit={stats.cache_hits} miss={stats.cache_misses}"',
+        ))
+
+
+class QueryInspectorMiddleware:
+    def __init__(self, get_response):
+        if not settings.QUERY_INSPECTOR_SAMPLE_RATE:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.QUERY_INSPECTOR_SAMPLE_RATE:
+            return self.get_response(request)
+        inspector = QueryInspector(request)
+        with execute_wrappers(inspector):
+            response = self.get_response(request)
+        inspector.finish()
+        return response
@@ -0,0 +1,216 @@
+"""Выборочный разбор SQL-запросов.
+
+Для части запросов (`QUERY_INSPECTOR_SAMPLE_RATE`) каждый SQL-запрос
+приводится к отпечатку: параметры и списки значений заменяются
+заглушками, так что запросы одной формы совпадают. По отпечаткам
+находятся повторы внутри одного запроса (признак N+1, например
+обращение к `post.author` в цикле шаблона) и медленные запросы; о тех
+и других пишется в журнал `core.queries` с именем представления и
+стеком вызова из кода проекта.
+
+Отпечатки всех процессов копятся в таблице самых дорогих запросов. Каждый
+процесс периодически сохраняет её в свой файл в
+`QUERY_INSPECTOR_STATS_DIR`; `manage.py dump_queries` объединяет файлы.
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+import traceback
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_LIST_RE = re.compile(r'\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)')
+_SPACE_RE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """Форма запроса без конкретных значений."""
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _LIST_RE.sub('(...)', sql)
+    return _SPACE_RE.sub(' ', sql).strip()
+
+
+def project_stack(limit=8):
+    """Кадры стека из кода проекта, без Django и сторонних пакетов."""
+    base = str(settings.BASE_DIR)
+    frames = [
+        frame for frame in traceback.extract_stack()[:-1]
+        if frame.filename.startswith(base)
+        and 'site-packages' not in frame.filename
+        and not frame.filename.endswith(os.path.join('core', 'queries.py'))
+    ]
+    return [
+        f'{os.path.relpath(frame.filename, base)}:{frame.lineno} '
+        f'in {frame.name}'
+        for frame in frames[-limit:]
+    ]
+
+
+class QueryStats:
+    """Накопленная стоимость запросов по отпечаткам.
+
+    Хранит не больше `2 * top_k` отпечатков: лишние, самые дешёвые по
+    суммарному времени, отбрасываются.
+    """
+
+    def __init__(self, top_k=100):
+        self.top_k = top_k
+        self._lock = threading.Lock()
+        self.entries = {}
+
+    def add(self, sql, count, total_ms, max_ms, views):
+        with self._lock:
+            entry = self.entries.get(sql)
+            if entry is None:
+                entry = self.entries[sql] = {
+                    'sql': sql, 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                    'views': [],
+                }
+            entry['count'] += count
+            entry['total_ms'] += total_ms
+            entry['max_ms'] = max(entry['max_ms'], max_ms)
+            for view in views:
+                if view not in entry['views']:
+                    entry['views'].append(view)
+            if len(self.entries) > 2 * self.top_k:
+                self._prune()
+
+    def _prune(self):
+        keep = sorted(
+            self.entries.values(), key=lambda entry: entry['total_ms'],
+            reverse=True,
+        )[:self.top_k]
+        self.entries = {entry['sql']: entry for entry in keep}
+
+    def top(self, limit=None, key='total_ms'):
+        with self._lock:
+            entries = sorted(
+                self.entries.values(), key=lambda entry: entry[key],
+                reverse=True,
+            )
+        return entries[:limit or self.top_k]
+
+    def clear(self):
+        with self._lock:
+            self.entries = {}
+
+
+stats = QueryStats(top_k=settings.QUERY_INSPECTOR_TOP_K)
+_last_flush = time.monotonic()
+
+
+def stats_path(directory=None):
+    directory = directory or settings.QUERY_INSPECTOR_STATS_DIR
+    return os.path.join(directory, f'queries-{os.getpid()}.json')
+
+
+def flush(directory=None):
+    """Сохраняет таблицу процесса в его файл."""
+    global _last_flush
+    _last_flush = time.monotonic()
+    path = stats_path(directory)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w', encoding='utf-8') as file:
+        json.dump(stats.top(), file, ensure_ascii=False)
+    os.replace(temporary, path)
+
+
+def maybe_flush():
+    interval = settings.QUERY_INSPECTOR_FLUSH_INTERVAL
+    if interval is not None and time.monotonic() - _last_flush >= interval:
+        flush()
+
+
+def load(directory=None):
+    """Объединённая таблица из файлов всех процессов."""
+    directory = directory or settings.QUERY_INSPECTOR_STATS_DIR
+    merged = QueryStats(top_k=settings.QUERY_INSPECTOR_TOP_K)
+    if not os.path.isdir(directory):
+        return merged
+    for name in sorted(os.listdir(directory)):
+        if not (name.startswith('queries-') and name.endswith('.json')):
+            continue
+        with open(os.path.join(directory, name), encoding='utf-8') as file:
+            for entry in json.load(file):
+                merged.add(
+                    entry['sql'], entry['count'], entry['total_ms'],
+                    entry['max_ms'], entry['views'],
+                )
+    return merged
+
+
+def reset(directory=None):
+    """Очищает таблицу процесса и удаляет файлы всех процессов."""
+    directory = directory or settings.QUERY_INSPECTOR_STATS_DIR
+    stats.clear()
+    if not os.path.isdir(directory):
+        return
+    for name in os.listdir(directory):
+        if name.startswith('queries-') and name.endswith('.json'):
+            os.remove(os.path.join(directory, name))
+
+
+class QueryInspector:
+    """Обёртка `execute_wrapper` для одного HTTP-запроса."""
+
+    def __init__(self, request):
+        self.request = request
+        self.queries = {}
+        self.stacks = {}
+        self._lock = threading.Lock()
+
+    @property
+    def view_name(self):
+        match = getattr(self.request, 'resolver_match', None)
+        return match.view_name if match else self.request.path
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - start) * 1000
+            self.record(sql, duration)
+
+    def record(self, sql, duration):
+        key = fingerprint(sql)
+        with self._lock:
+            count, total, slowest = self.queries.get(key, (0, 0.0, 0.0))
+            self.queries[key] = (count + 1, total + duration,
+                                 max(slowest, duration))
+        if count == 1:
+            # Стек берётся на первом повторе: он и показывает цикл.
+            self.stacks[key] = project_stack()
+        if duration >= settings.QUERY_INSPECTOR_SLOW_MS:
+            logger.warning(
+                'Медленный запрос %.1f мс в %s: %s\n%s',
+                duration, self.view_name, sql, '\n'.join(project_stack()),
+            )
+
+    def duplicates(self):
+        """Отпечатки, повторённые не меньше порога раз."""
+        threshold = settings.QUERY_INSPECTOR_DUPLICATE_THRESHOLD
+        return {
+            key: count for key, (count, _, _) in self.queries.items()
+            if count >= threshold
+        }
+
+    def finish(self):
+        view = self.view_name
+        for key, count in self.duplicates().items():
+            logger.warning(
+                'Запрос повторён %d раз в %s (N+1?): %s\n%s',
+                count, view, key, '\n'.join(self.stacks.get(key, ())),
+            )
+        for key, (count, total, slowest) in self.queries.items():
+            stats.add(key, count, total, slowest, [view])
+        maybe_flush()
@@ -0,0 +1,123 @@
+"""Чтение из реплик базы данных.
+
+`ReplicaRouter` отправляет чтения внутри HTTP-запроса на реплики из
+`settings.DATABASE_REPLICAS`, запись — всегда на основную базу.
+Реплика выбирается один раз на запрос, в том числе когда чтения идут из
+потоков `core.concurrency.gather`: по кругу (`round_robin`) или с
+наименьшим числом текущих запросов (`least_loaded`), см.
+`DATABASE_REPLICA_BALANCE`.
+
+Реплики отстают от основной базы, поэтому после записи пользователь
+`DATABASE_REPLICA_PIN_SECONDS` секунд читает только основную базу, иначе
+он мог бы не увидеть свой пост или комментарий. Записи замечает сам
+роутер, а `ReplicaMiddleware` ставит cookie закрепления. Служебные
+записи при чтении (например, ленивое создание счётчика) не закрепляют,
+их модели перечислены в `DATABASE_REPLICA_PIN_EXEMPT`. Вне запроса
+(команды, фоновые потоки) и после записи в том же запросе чтение идёт в
+основную базу.
+"""
+import itertools
+import threading
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+PIN_COOKIE = 'pin_primary'
+
+_current = ContextVar('replica_state', default=None)
+
+
+class ReplicaState:
+    def __init__(self, pinned):
+        self.pinned = pinned
+        self.wrote = False
+        self.replica = None
+        # Состояние запроса видят и потоки gather (через copy_context).
+        self._lock = threading.Lock()
+
+    def get_replica(self):
+        """Реплика запроса; выбирается при первом чтении."""
+        with self._lock:
+            if self.replica is None:
+                self.replica = balancer.acquire(
+                    settings.DATABASE_REPLICAS,
+                    settings.DATABASE_REPLICA_BALANCE,
+                )
+            return self.replica
+
+
+class Balancer:
+    """Выбор реплики; безопасен для потоков."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cycle = None
+        self._replicas = ()
+        self.active = {}
+
+    def acquire(self, replicas, strategy):
+        with self._lock:
+            if tuple(replicas) != self._replicas:
+                self._replicas = tuple(replicas)
+                self._cycle = itertools.cycle(self._replicas)
+            if strategy == 'least_loaded':
+                replica = min(
+                    self._replicas, key=lambda alias: self.active.get(alias, 0)
+                )
+            else:
+                replica = next(self._cycle)
+            self.active[replica] = self.active.get(replica, 0) + 1
+            return replica
+
+    def release(self, replica):
+        with self._lock:
+            self.active[replica] -= 1
+
+
+balancer = Balancer()
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _current.get()
+        if (
+            state is None or state.pinned or state.wrote
+            or not settings.DATABASE_REPLICAS
+        ):
+            return DEFAULT_DB_ALIAS
+        return state.get_replica()
+
+    def db_for_write(self, model, **hints):
+        state = _current.get()
+        exempt = settings.DATABASE_REPLICA_PIN_EXEMPT
+        if state is not None and model._meta.label_lower not in exempt:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же строки, что и основная база.
+        return True
+
+
+class ReplicaMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        state = ReplicaState(pinned=PIN_COOKIE in request.COOKIES)
+        token = _current.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+            if state.replica is not None:
+                balancer.release(state.replica)
+        if state.wrote:
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=settings.DATABASE_REPLICA_PIN_SECONDS, httponly=True,
+            )
+        return response
@@ -0,0 +1,47 @@
+"""Прогрев кеша скомпилированных шаблонов.
+
+С кеширующим загрузчиком шаблон разбирается один раз на процесс, но
+первый запрос к каждой странице всё равно платит за разбор. `warm_up()`
+при запуске компилирует все шаблоны проекта и приложений, и первые
+запросы получают готовые шаблоны.
+"""
+import logging
+import os
+
+from django.template import TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+from django.template.utils import get_app_template_dirs
+
+logger = logging.getLogger(__name__)
+
+
+def template_names(engine):
+    directories = list(engine.dirs)
+    if engine.app_dirs or any(
+        'app_directories' in str(loader) for loader in engine.loaders
+    ):
+        directories += get_app_template_dirs('templates')
+    names = set()
+    for directory in directories:
+        for root, _, files in os.walk(directory):
+            for name in files:
+                if name.endswith(('.html', '.txt')):
+                    path = os.path.relpath(os.path.join(root, name), directory)
+                    names.add(path.replace(os.sep, '/'))
+    return sorted(names)
+
+
+def warm_up():
+    """Компилирует шаблоны всех движков Django; возвращает их число."""
+    count = 0
+    for backend in engines.all():
+        if not isinstance(backend, DjangoTemplates):
+            continue
+        for name in template_names(backend.engine):
+            try:
+                backend.engine.get_template(name)
+            except TemplateSyntaxError:
+                logger.exception('Шаблон %s не компилируется', name)
+            else:
+                count += 1
+    return count
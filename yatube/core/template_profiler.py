@@ -0,0 +1,94 @@
+"""Профилировщик рендеринга шаблонов.
+
+Внутри `profile()` замеряется каждый вызов тегов `{% include %}`,
+`{% url %}`, `{% link %}` и `{% thumbnail %}`. Время относится к месту
+тега в шаблоне (`имя шаблона:строка`) и его тексту, так что видно,
+какая строка ленты обходится дороже всего. Для каждого места
+считается полное время и собственное — без вложенных замеряемых тегов:
+`include` карточки поста содержит её `link` и `thumbnail`.
+
+Обёртки ставятся при первом вызове `profile()`; вне профилирования они
+сразу передают вызов дальше.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.template.defaulttags import URLNode
+from django.template.loader_tags import IncludeNode
+from sorl.thumbnail.templatetags.thumbnail import ThumbnailNode
+
+from posts.templatetags.links import LinkNode
+
+PROFILED_NODES = (IncludeNode, URLNode, LinkNode, ThumbnailNode)
+
+_current = ContextVar('template_profile', default=None)
+
+
+class Profile:
+    def __init__(self):
+        self.rows = {}
+        self._children = [0.0]
+
+    def enter(self):
+        self._children.append(0.0)
+
+    def leave(self, node, elapsed):
+        children = self._children.pop()
+        self._children[-1] += elapsed
+        key = (location(node), node.token.contents)
+        calls, total, own = self.rows.get(key, (0, 0.0, 0.0))
+        self.rows[key] = (calls + 1, total + elapsed, own + elapsed - children)
+
+    def report(self):
+        """Строки отчёта по убыванию собственного времени."""
+        rows = [
+            {
+                'location': where, 'tag': tag, 'calls': calls,
+                'total_ms': total * 1000, 'self_ms': own * 1000,
+            }
+            for (where, tag), (calls, total, own) in self.rows.items()
+        ]
+        return sorted(rows, key=lambda row: row['self_ms'], reverse=True)
+
+
+def location(node):
+    origin = getattr(node, 'origin', None)
+    name = origin.template_name if origin else '?'
+    return f'{name}:{node.token.lineno}'
+
+
+def _timed(render):
+    @wraps(render)
+    def wrapper(self, context):
+        profile = _current.get()
+        if profile is None:
+            return render(self, context)
+        profile.enter()
+        start = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            profile.leave(self, time.perf_counter() - start)
+    wrapper.profiler_hook = True
+    return wrapper
+
+
+def install():
+    for node_class in PROFILED_NODES:
+        render = node_class.render
+        if not getattr(render, 'profiler_hook', False):
+            node_class.render = _timed(render)
+
+
+@contextmanager
+def profile():
+    """Собирает замеры тегов в возвращаемый `Profile`."""
+    install()
+    result = Profile()
+    token = _current.set(result)
+    try:
+        yield result
+    finally:
+        _current.reset(token)
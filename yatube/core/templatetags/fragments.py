@@ -0,0 +1,15 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from core import fragments
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def fragment(context, fragment_name, **kwargs):
+    """Персональный фрагмент страницы или его метка в общей странице."""
+    request = context['request']
+    if fragments.is_shared(request):
+        return mark_safe(fragments.placeholder(fragment_name, kwargs))
+    return mark_safe(fragments.render(request, fragment_name, kwargs))
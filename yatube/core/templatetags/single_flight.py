@@ -0,0 +1,47 @@
+from django import template
+from django.core.cache.utils import make_template_fragment_key
+
+from core import cache
+
+register = template.Library()
+
+
+class CacheOnceNode(template.Node):
+    def __init__(self, nodelist, timeout, fragment_name, vary_on):
+        self.nodelist = nodelist
+        self.timeout = timeout
+        self.fragment_name = fragment_name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        timeout = self.timeout.resolve(context)
+        key = make_template_fragment_key(
+            self.fragment_name, [var.resolve(context) for var in self.vary_on]
+        )
+        return cache.get_or_set(
+            key, lambda: self.nodelist.render(context), timeout
+        )
+
+
+@register.tag
+def cache_once(parser, token):
+    """Как `{% cache %}`, но фрагмент строит только один процесс.
+
+    {% cache_once timeout имя ключ... %} ... {% endcache_once %}
+
+    Фрагмент строится через `core.cache.get_or_set`: при промахе
+    остальные запросы ждут готовый фрагмент, а не рендерят его заново.
+    """
+    bits = token.split_contents()
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' принимает время жизни, имя и ключи фрагмента."
+        )
+    nodelist = parser.parse(('endcache_once',))
+    parser.delete_first_token()
+    return CacheOnceNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        bits[2],
+        [parser.compile_filter(bit) for bit in bits[3:]],
+    )
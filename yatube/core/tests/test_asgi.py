@@ -0,0 +1,148 @@
+import asyncio
+import io
+import threading
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.handlers.wsgi import WSGIHandler
+from django.test import (SimpleTestCase, TestCase, TransactionTestCase,
+                         override_settings)
+
+from core import concurrency
+from core.asgi import WsgiToAsgi, build_environ
+from core.concurrency import execute_wrappers, gather
+from core.middleware import RequestStats
+
+
+def call(app, scope, body=b''):
+    """Запрос к ASGI-приложению: (сообщение начала ответа, тело)."""
+    messages = [{'type': 'http.request', 'body': body}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return sent[0], b''.join(message['body'] for message in sent[1:])
+
+
+class WsgiToAsgiTest(SimpleTestCase):
+    def scope(self, path, query=b''):
+        return {
+            'type': 'http', 'method': 'GET', 'path': path,
+            'query_string': query,
+            'headers': [(b'host', b'testserver'), (b'accept', b'text/html')],
+        }
+
+    def test_environ(self):
+        environ = build_environ({
+            **self.scope('/путь/', b'page=2'),
+            'headers': [
+                (b'content-type', b'text/plain'),
+                (b'x-tag', b'a'), (b'x-tag', b'b'),
+            ],
+        }, io.BytesIO())
+        self.assertEqual(
+            environ['PATH_INFO'].encode('latin-1').decode(), '/путь/'
+        )
+        self.assertEqual(environ['QUERY_STRING'], 'page=2')
+        self.assertEqual(environ['CONTENT_TYPE'], 'text/plain')
+        self.assertEqual(environ['HTTP_X_TAG'], 'a,b')
+
+    def test_page_served_from_thread_pool(self):
+        app = WsgiToAsgi(WSGIHandler(), threads=2)
+        start, body = call(app, self.scope('/about/author/'))
+        self.assertEqual(start['status'], 200)
+        self.assertIn((b'content-type', b'text/html; charset=utf-8'),
+                      start['headers'])
+        self.assertIn('</html>', body.decode())
+
+    def test_not_found(self):
+        app = WsgiToAsgi(WSGIHandler(), threads=1)
+        start, _ = call(app, self.scope('/nonexist-page/'))
+        self.assertEqual(start['status'], 404)
+
+    @override_settings(DATA_UPLOAD_MAX_MEMORY_SIZE=10)
+    def test_body_spooled_and_response_streamed(self):
+        """Большое тело уходит на диск, ответ отправляется по частям."""
+        seen = {}
+
+        def echo(environ, start_response):
+            stream = environ['wsgi.input']
+            seen['rolled'] = stream._rolled
+            data = stream.read()
+            start_response('200 OK', [('Content-Type', 'text/plain')])
+            return iter([data[:50], data[50:]])
+
+        messages = [
+            {'type': 'http.request', 'body': b'x' * 50, 'more_body': True},
+            {'type': 'http.request', 'body': b'y' * 50},
+        ]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        app = WsgiToAsgi(echo, threads=1)
+        asyncio.run(app({**self.scope('/'), 'method': 'POST'}, receive, send))
+        self.assertTrue(seen['rolled'])
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertEqual(
+            [message['body'] for message in sent[1:]],
+            [b'x' * 50, b'y' * 50, b''],
+        )
+        self.assertEqual(
+            [message.get('more_body', False) for message in sent[1:]],
+            [True, True, False],
+        )
+
+
+class GatherTest(TestCase):
+    def test_sequential_inside_transaction(self):
+        result = gather(a=threading.current_thread, b=lambda: 2)
+        self.assertEqual(result['a'], threading.current_thread())
+        self.assertEqual(result['b'], 2)
+
+    @override_settings(CONCURRENT_LOOKUPS=False)
+    def test_disabled(self):
+        result = gather(a=threading.current_thread, b=threading.current_thread)
+        self.assertEqual(set(result.values()), {threading.current_thread()})
+
+
+class ConcurrentGatherTest(SimpleTestCase):
+    def test_sequential_with_memory_database(self):
+        result = gather(a=threading.current_thread, b=threading.current_thread)
+        self.assertEqual(set(result.values()), {threading.current_thread()})
+
+    def test_calls_run_in_parallel(self):
+        barrier = threading.Barrier(2, timeout=5)
+        with mock.patch.object(
+            concurrency, 'is_concurrent', return_value=True
+        ):
+            result = gather(a=barrier.wait, b=barrier.wait)
+        self.assertCountEqual(result.values(), [0, 1])
+
+
+class GatherWrappersTest(TransactionTestCase):
+    def test_thread_queries_reach_request_wrappers(self):
+        User = get_user_model()
+        stats = RequestStats()
+        barrier = threading.Barrier(2, timeout=5)
+
+        def lookup():
+            barrier.wait()
+            return User.objects.count()
+
+        with mock.patch.object(
+            concurrency, 'is_concurrent', return_value=True
+        ):
+            with execute_wrappers(stats):
+                gather(a=lookup, b=lookup)
+            gather(a=lookup, b=lookup)
+        self.assertEqual(stats.sql_count, 2)
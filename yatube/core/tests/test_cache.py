@@ -0,0 +1,264 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import caches
+from django.template import Context, Template
+from django.test import SimpleTestCase, override_settings
+
+from core import cache as core_cache
+
+
+class FakeRedis:
+    """Заглушка Redis в памяти с нужным бэкенду подмножеством команд."""
+
+    def __init__(self, location):
+        self.data = {}
+        self.expires = {}
+
+    def _alive(self, key):
+        deadline = self.expires.get(key)
+        if deadline is not None and deadline <= time.monotonic():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.data
+
+    def set(self, key, value, px=None, nx=False, keepttl=False):
+        if nx and self._alive(key):
+            return None
+        self.data[key] = value
+        if px is not None:
+            self.expires[key] = time.monotonic() + px / 1000
+        elif not keepttl:
+            self.expires.pop(key, None)
+        return True
+
+    def get(self, key):
+        return self.data[key] if self._alive(key) else None
+
+    def mget(self, keys):
+        return [self.get(key) for key in keys]
+
+    def exists(self, key):
+        return int(self._alive(key))
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+
+    def incrby(self, key, delta):
+        value = int(self.data[key]) + delta
+        self.data[key] = str(value).encode()
+        return value
+
+    def pexpire(self, key, px):
+        if not self._alive(key):
+            return False
+        self.expires[key] = time.monotonic() + px / 1000
+        return True
+
+    def persist(self, key):
+        return self.expires.pop(key, None) is not None
+
+    def flushdb(self):
+        self.data.clear()
+        self.expires.clear()
+
+
+REDIS_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'redis': {
+        'BACKEND': 'core.cache_backends.RedisCache',
+        'LOCATION': 'redis://stand-in',
+        'OPTIONS': {
+            'CLIENT_FACTORY': 'core.tests.test_cache.FakeRedis',
+        },
+    },
+}
+
+
+@override_settings(CACHES=REDIS_CACHES)
+class RedisCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.cache = caches['redis']
+        self.cache.clear()
+
+    def test_basic_operations(self):
+        self.cache.set('post', {'text': 'Пост'})
+        self.assertEqual(self.cache.get('post'), {'text': 'Пост'})
+        self.assertFalse(self.cache.add('post', 'другое'))
+        self.assertTrue(self.cache.add('group', 'Группа'))
+        self.assertEqual(
+            self.cache.get_many(['post', 'group', 'missing']),
+            {'post': {'text': 'Пост'}, 'group': 'Группа'},
+        )
+        self.cache.delete_many(['post', 'group'])
+        self.assertIsNone(self.cache.get('post'))
+
+    def test_incr_and_timeout(self):
+        self.cache.set('counter', 1)
+        self.assertEqual(self.cache.incr('counter', 5), 6)
+        self.assertEqual(self.cache.get('counter'), 6)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+        self.cache.set('short', 'value', 0.01)
+        time.sleep(0.02)
+        self.assertIsNone(self.cache.get('short'))
+
+
+class FileBasedCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        settings = override_settings(CACHES={'default': {
+            'BACKEND': 'core.cache_backends.FileBasedCache',
+            'LOCATION': self.dir,
+        }})
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.cache = caches['default']
+
+    def test_concurrent_add_single_winner(self):
+        results = []
+        barrier = threading.Barrier(8)
+
+        def worker(number):
+            barrier.wait()
+            results.append(self.cache.add('lock', number))
+
+        threads = [
+            threading.Thread(target=worker, args=[number])
+            for number in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results.count(True), 1)
+        self.assertFalse(self.cache.add('lock', 'другое'))
+
+    def test_stale_lock_removed(self):
+        lock = self.cache._key_to_file('key') + self.cache.lock_suffix
+        open(lock, 'w').close()
+        self.assertFalse(self.cache.add('key', 'значение'))
+        stale = time.time() - self.cache.lock_stale - 1
+        os.utime(lock, (stale, stale))
+        self.assertTrue(self.cache.add('key', 'значение'))
+        self.assertEqual(self.cache.get('key'), 'значение')
+        self.assertFalse(os.path.exists(lock))
+
+
+class GetOrSetTest(SimpleTestCase):
+    def setUp(self):
+        caches['default'].clear()
+
+    def test_value_cached(self):
+        calls = []
+
+        def producer():
+            calls.append(1)
+            return 'лента'
+
+        for _ in range(3):
+            self.assertEqual(
+                core_cache.get_or_set('feed', producer, 60, beta=0), 'лента'
+            )
+        self.assertEqual(len(calls), 1)
+
+    def test_concurrent_misses_compute_once(self):
+        """Одновременные промахи строят значение один раз."""
+        calls = []
+        results = []
+
+        def producer():
+            calls.append(1)
+            time.sleep(0.1)
+            return 'лента'
+
+        def worker():
+            results.append(core_cache.get_or_set('hot', producer, 60))
+
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['лента'] * 5)
+
+    def test_early_recompute_before_expiry(self):
+        """При большом beta значение пересчитывается досрочно."""
+        def slow_producer():
+            time.sleep(0.01)
+            return 'старое'
+
+        core_cache.get_or_set('early', slow_producer, 60)
+        with mock.patch('core.cache.random.random', return_value=0.5):
+            self.assertEqual(
+                core_cache.get_or_set('early', lambda: 'новое', 60), 'старое'
+            )
+            value = core_cache.get_or_set(
+                'early', lambda: 'новое', 60, beta=10 ** 6
+            )
+        self.assertEqual(value, 'новое')
+
+    def test_uncacheable_value_not_stored(self):
+        value = core_cache.get_or_set(
+            'page', lambda: None, 60, cacheable=lambda page: page is not None
+        )
+        self.assertIsNone(value)
+        self.assertIsNone(caches['default'].get('page'))
+        self.assertEqual(
+            caches['default'].get('page:lock'), core_cache.UNCACHEABLE
+        )
+
+    def test_uncacheable_waiters_compute_in_parallel(self):
+        """Ждущие не строят несохраняемое значение по очереди."""
+        lock = threading.Lock()
+        state = {'active': 0, 'peak': 0, 'calls': 0}
+
+        def producer():
+            with lock:
+                state['calls'] += 1
+                state['active'] += 1
+                state['peak'] = max(state['peak'], state['active'])
+            time.sleep(0.2)
+            with lock:
+                state['active'] -= 1
+
+        def worker():
+            core_cache.get_or_set(
+                'error-page', producer, 60,
+                cacheable=lambda page: page is not None,
+            )
+
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(state['calls'], 5)
+        self.assertGreater(state['peak'], 1)
+
+    def test_cache_once_tag_renders_once(self):
+        template = Template(
+            '{% load single_flight %}'
+            '{% cache_once 60 feed key %}{{ render }}{% endcache_once %}'
+        )
+        calls = []
+
+        def render():
+            calls.append(1)
+            return len(calls)
+
+        for _ in range(2):
+            self.assertEqual(
+                template.render(Context({'render': render, 'key': 'a'})), '1'
+            )
+        self.assertEqual(len(calls), 1)
@@ -0,0 +1,119 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+
+from django.db import DatabaseError
+from django.db.utils import ConnectionHandler
+from django.test import SimpleTestCase
+
+from core.db_backends.sqlite3.base import clear_pools
+
+WRITERS = 8
+ROWS = 50
+
+
+class SqliteTuningTest(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.connections = ConnectionHandler({'default': {
+            'ENGINE': 'core.db_backends.sqlite3',
+            'NAME': os.path.join(self.directory, 'test.sqlite3'),
+            'OPTIONS': {'POOL_SIZE': WRITERS},
+        }})
+
+    def tearDown(self):
+        self.connections['default'].close()
+        clear_pools()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def in_thread(self, function):
+        """Выполняет function в отдельном потоке со своим соединением."""
+        def target():
+            try:
+                function(self.connections['default'])
+            except Exception as error:
+                errors.append(error)
+            finally:
+                self.connections['default'].close()
+
+        errors = []
+        thread = threading.Thread(target=target)
+        thread.start()
+        return thread, errors
+
+    def test_pragmas_applied(self):
+        with self.connections['default'].cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+
+    def test_concurrent_writers_and_readers(self):
+        with self.connections['default'].cursor() as cursor:
+            cursor.execute('CREATE TABLE item (id INTEGER PRIMARY KEY, n INT)')
+
+        def write(connection):
+            for number in range(ROWS):
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        'INSERT INTO item (n) VALUES (%s)', [number]
+                    )
+
+        def read(connection):
+            for _ in range(ROWS):
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT COUNT(*) FROM item')
+
+        started = [
+            self.in_thread(function)
+            for function in [write] * WRITERS + [read] * WRITERS
+        ]
+        errors = []
+        for thread, thread_errors in started:
+            thread.join()
+            errors.extend(thread_errors)
+        self.assertEqual(errors, [])
+        with self.connections['default'].cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM item')
+            self.assertEqual(cursor.fetchone()[0], WRITERS * ROWS)
+
+    def test_closed_connection_is_reused_by_other_thread(self):
+        opened = []
+
+        def remember(connection):
+            connection.ensure_connection()
+            opened.append(connection.connection)
+
+        for _ in range(2):
+            thread, errors = self.in_thread(remember)
+            thread.join()
+            self.assertEqual(errors, [])
+        self.assertIs(opened[0], opened[1])
+
+    def test_connection_after_error_not_pooled(self):
+        opened = []
+
+        def fail(connection):
+            connection.ensure_connection()
+            opened.append(connection.connection)
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT * FROM missing')
+            except DatabaseError:
+                pass
+
+        def remember(connection):
+            connection.ensure_connection()
+            opened.append(connection.connection)
+
+        for function in (fail, remember):
+            thread, errors = self.in_thread(function)
+            thread.join()
+            self.assertEqual(errors, [])
+        self.assertIsNot(opened[0], opened[1])
+        with self.assertRaises(sqlite3.ProgrammingError):
+            opened[0].execute('SELECT 1')
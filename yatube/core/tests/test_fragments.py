@@ -0,0 +1,46 @@
+from django.contrib.auth.models import AnonymousUser
+from django.template import engines
+from django.test import RequestFactory, TestCase
+
+from core import fragments
+
+PAGE = engines['django'].from_string(
+    "{% load fragments %}<main>{% fragment 'missing' path=path %}</main>"
+)
+
+
+@fragments.register('missing', 'core/404.html')
+def missing_page(request, path):
+    return {'path': f'/{path}/'}
+
+
+class FragmentTest(TestCase):
+    def setUp(self):
+        self.request = RequestFactory().get('/')
+        self.request.user = AnonymousUser()
+
+    def test_placeholder_round_trip(self):
+        mark = fragments.placeholder('missing', {'path': '<-->'})
+        self.assertNotIn('<-->', mark)
+        self.assertIn(
+            b'/&lt;--&gt;/',
+            fragments.stitch(self.request, mark.encode()),
+        )
+
+    def test_shared_page_stitched_as_inline(self):
+        context = {'path': 'page'}
+        inline = PAGE.render(context, self.request)
+        with fragments.shared(self.request):
+            shared = PAGE.render(context, self.request)
+        self.assertNotIn('/page/', shared)
+        self.assertFalse(fragments.is_shared(self.request))
+        self.assertEqual(
+            fragments.stitch(self.request, shared.encode()).decode(), inline
+        )
+
+    def test_escaped_text_is_not_a_placeholder(self):
+        mark = fragments.placeholder('missing', {'path': 'page'})
+        page = engines['django'].from_string('{{ text }}').render(
+            {'text': mark}, self.request
+        ).encode()
+        self.assertEqual(fragments.stitch(self.request, page), page)
@@ -0,0 +1,68 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from core import lru
+from core.lru import LRUCache
+
+
+class LRUCacheTest(SimpleTestCase):
+    def test_hits_and_misses(self):
+        cache = LRUCache('test')
+        self.assertIsNone(cache.get('a'))
+        cache.set('a', 1)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('b', 2), 2)
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 2)
+
+    def test_least_recently_used_evicted(self):
+        cache = LRUCache('test', max_entries=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_memory_cap(self):
+        cache = LRUCache('test', max_bytes=100, sizeof=len)
+        cache.set('a', 'x' * 49)
+        cache.set('b', 'x' * 49)
+        self.assertEqual(cache.bytes, 100)
+        cache.set('c', 'x' * 10)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('a'))
+        cache.set('d', 'x' * 200)
+        self.assertIsNone(cache.get('d'))
+        self.assertLessEqual(cache.bytes, 100)
+
+    def test_ttl(self):
+        cache = LRUCache('test', ttl=10)
+        with mock.patch('time.monotonic', return_value=100):
+            cache.set('a', 1)
+        with mock.patch('time.monotonic', return_value=109):
+            self.assertEqual(cache.get('a'), 1)
+        with mock.patch('time.monotonic', return_value=111):
+            self.assertIsNone(cache.get('a'))
+        self.assertEqual((len(cache), cache.bytes), (0, 0))
+
+    def test_delete_and_clear(self):
+        cache = LRUCache('test')
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.delete('a')
+        cache.delete('missing')
+        self.assertIsNone(cache.get('a'))
+        cache.clear()
+        self.assertEqual((len(cache), cache.bytes), (0, 0))
+
+    def test_render(self):
+        cache = LRUCache('rendered')
+        cache.set('a', 1)
+        cache.get('a')
+        text = lru.render('test')
+        self.assertIn('test_lru_hits_total{cache="rendered"} 1', text)
+        self.assertIn('test_lru_entries{cache="rendered"} 1', text)
@@ -0,0 +1,118 @@
+import math
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import middleware
+from core.metrics import Registry, registry
+from posts.models import Post
+
+User = get_user_model()
+
+
+class RegistryTest(TestCase):
+    def test_histogram_buckets(self):
+        metrics = Registry(prefix='test')
+        for value in (3, 7, 7, 10000):
+            metrics.observe('latency', {'view': 'a'}, value, (5, 10, math.inf))
+        metrics.increment('hits', {'view': 'a'}, 2)
+        text = metrics.render()
+        self.assertIn('test_latency_bucket{view="a",le="5"} 1', text)
+        self.assertIn('test_latency_bucket{view="a",le="10"} 3', text)
+        self.assertIn('test_latency_bucket{view="a",le="+Inf"} 4', text)
+        self.assertIn('test_latency_count{view="a"} 4', text)
+        self.assertIn('test_hits_total{view="a"} 2', text)
+
+
+class CacheHooksTest(TestCase):
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }})
+    def test_get_many_counted_once(self):
+        """Чтения get() внутри get_many() не учитываются повторно."""
+        middleware.install_hooks()
+        locmem = caches['default']
+        locmem.set('found', 1)
+        stats = middleware.RequestStats()
+        token = middleware._current.set(stats)
+        try:
+            locmem.get_many(['found', 'missing'])
+            self.assertEqual((stats.cache_hits, stats.cache_misses), (1, 1))
+            locmem.get('found')
+            locmem.get('missing')
+        finally:
+            middleware._current.reset(token)
+        self.assertEqual((stats.cache_hits, stats.cache_misses), (2, 2))
+
+
+class RequestMetricsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        author = User.objects.create_user(username='measured')
+        Post.objects.create(author=author, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        registry.clear()
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('posts:index'))
+        timing = response['Server-Timing']
+        for name in ('app;dur=', 'db;dur=', 'tpl;dur=', 'cache;desc='):
+            self.assertIn(name, timing)
+        self.assertNotIn('db;dur=0.0;desc="0 queries"', timing)
+
+    def test_metrics_are_recorded_per_view(self):
+        url = reverse('posts:index')
+        self.client.get(url)
+        self.client.get(url)
+        histogram = registry.get_histogram(
+            'request_duration_ms', view='posts:index'
+        )
+        self.assertEqual(histogram.count, 2)
+        queries = registry.get_histogram('sql_queries', view='posts:index')
+        self.assertGreater(queries.sum, 0)
+        # Во втором запросе фрагмент ленты берётся из кеша.
+        self.assertGreater(
+            registry.get_counter('cache_hits', view='posts:index'), 0
+        )
+        self.assertGreater(
+            registry.get_counter('cache_misses', view='posts:index'), 0
+        )
+        self.assertEqual(registry.get_counter(
+            'requests', view='posts:index', status=200
+        ), 2)
+
+    def test_metrics_endpoint(self):
+        self.client.get(reverse('posts:index'))
+        self.client.force_login(
+            User.objects.create_user(username='staff', is_staff=True)
+        )
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(
+            response, 'yatube_request_duration_ms_bucket{view="posts:index"'
+        )
+        self.assertContains(response, 'yatube_lru_hits_total{cache="users"}')
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_endpoint_token(self):
+        url = reverse('metrics')
+        response = Client().get(url, HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        response = Client().get(url, HTTP_AUTHORIZATION='Bearer wrong')
+        self.assertEqual(response.status_code, 403)
+
+    def test_metrics_endpoint_is_private(self):
+        url = reverse('metrics')
+        # Локальный адрес не даёт доступа: за прокси он у всех запросов.
+        self.assertEqual(Client().get(url).status_code, 403)
+        self.assertEqual(
+            Client().get(url, HTTP_AUTHORIZATION='Bearer ').status_code, 403
+        )
+        reader = Client()
+        reader.force_login(User.objects.create_user(username='reader'))
+        self.assertEqual(reader.get(url).status_code, 403)
@@ -0,0 +1,117 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from core import queries
+from posts.models import Group, Post
+
+User = get_user_model()
+
+STATS_DIR = tempfile.mkdtemp()
+
+
+class FingerprintTest(TestCase):
+    def test_values_are_replaced(self):
+        self.assertEqual(
+            queries.fingerprint(
+                "SELECT * FROM t WHERE a = 'x''y' AND b = 42\n  LIMIT 10"
+            ),
+            'SELECT * FROM t WHERE a = ? AND b = ? LIMIT ?',
+        )
+
+    def test_in_lists_collapse(self):
+        self.assertEqual(
+            queries.fingerprint('SELECT 1 FROM t WHERE id IN (%s, %s, %s)'),
+            queries.fingerprint('SELECT 1 FROM t WHERE id IN (%s, %s)'),
+        )
+
+    def test_stats_keep_top_k(self):
+        stats = queries.QueryStats(top_k=2)
+        for number in range(5):
+            stats.add(f'q{number}', 1, number, number, ['view'])
+        self.assertEqual(
+            [entry['sql'] for entry in stats.top()], ['q4', 'q3']
+        )
+
+
+@override_settings(
+    QUERY_INSPECTOR_SAMPLE_RATE=1.0,
+    QUERY_INSPECTOR_STATS_DIR=STATS_DIR,
+    QUERY_INSPECTOR_FLUSH_INTERVAL=None,
+)
+class QueryInspectorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        group = Group.objects.create(title='Группа', slug='group')
+        for number in range(6):
+            author = User.objects.create_user(username=f'author{number}')
+            Post.objects.create(author=author, group=group, text='Пост')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(STATS_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        queries.stats.clear()
+
+    def inspect(self, function):
+        inspector = queries.QueryInspector(RequestFactory().get('/'))
+        with connection.execute_wrapper(inspector):
+            function()
+        return inspector
+
+    def test_per_row_lookup_is_reported(self):
+        def names():
+            return [post.author.username for post in Post.objects.all()]
+
+        inspector = self.inspect(names)
+        with self.assertLogs('core.queries', 'WARNING') as logs:
+            inspector.finish()
+        self.assertEqual(list(inspector.duplicates().values()), [6])
+        self.assertIn('N+1', logs.output[0])
+        self.assertIn('test_queries.py', logs.output[0])
+
+    def test_select_related_is_not_reported(self):
+        def names():
+            return [
+                post.author.username
+                for post in Post.objects.select_related('author')
+            ]
+
+        self.assertEqual(self.inspect(names).duplicates(), {})
+
+    @override_settings(QUERY_INSPECTOR_SLOW_MS=0)
+    def test_slow_query_is_logged(self):
+        with self.assertLogs('core.queries', 'WARNING') as logs:
+            self.inspect(lambda: Post.objects.count())
+        self.assertIn('Медленный запрос', logs.output[0])
+
+    def test_feeds_have_no_repeated_queries(self):
+        for url in (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=['group']),
+            reverse('posts:profile', args=['author0']),
+        ):
+            with self.subTest(url=url), self.assertNoLogs('core.queries'):
+                self.client.get(url)
+        views = {view for entry in queries.stats.top()
+                 for view in entry['views']}
+        self.assertIn('posts:index', views)
+
+    def test_dump_merges_process_files(self):
+        self.client.get(reverse('posts:profile', args=['author0']))
+        queries.flush()
+        out = StringIO()
+        call_command('dump_queries', '--reset', stdout=out)
+        self.assertIn('posts:profile', out.getvalue())
+        self.assertEqual(queries.load().top(), [])
@@ -0,0 +1,121 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.routers import PIN_COOKIE, Balancer, ReplicaState
+from posts.models import Post
+
+User = get_user_model()
+
+REPLICAS = ['replica1', 'replica2']
+
+
+class BalancerTest(TestCase):
+    def test_round_robin(self):
+        balancer = Balancer()
+        chosen = [balancer.acquire(REPLICAS, 'round_robin') for _ in range(4)]
+        self.assertEqual(chosen, REPLICAS * 2)
+
+    def test_least_loaded(self):
+        balancer = Balancer()
+        first = balancer.acquire(REPLICAS, 'least_loaded')
+        second = balancer.acquire(REPLICAS, 'least_loaded')
+        self.assertNotEqual(first, second)
+        balancer.release(second)
+        self.assertEqual(balancer.acquire(REPLICAS, 'least_loaded'), second)
+
+    @override_settings(
+        DATABASE_REPLICAS=REPLICAS, DATABASE_REPLICA_BALANCE='least_loaded'
+    )
+    def test_shared_state_acquires_once(self):
+        """Потоки одного запроса берут реплику один раз."""
+        balancer = Balancer()
+        acquire = balancer.acquire
+
+        def slow_acquire(*args):
+            time.sleep(0.01)
+            return acquire(*args)
+
+        state = ReplicaState(pinned=False)
+        with mock.patch('core.routers.balancer', balancer), \
+                mock.patch.object(balancer, 'acquire', slow_acquire):
+            threads = [
+                threading.Thread(target=state.get_replica) for _ in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(sum(balancer.active.values()), 1)
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS)
+class ReplicaRouterTest(TestCase):
+    """Реплики — отдельные файлы SQLite со своими данными."""
+
+    databases = {'default', *REPLICAS}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        for alias in REPLICAS:
+            connections.databases[alias] = {
+                'ENGINE': 'core.db_backends.sqlite3',
+                'NAME': os.path.join(cls.directory, f'{alias}.sqlite3'),
+            }
+            call_command('migrate', database=alias, verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        for alias in REPLICAS:
+            connections[alias].close()
+            del connections.databases[alias]
+        shutil.rmtree(cls.directory, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='writer')
+        self.client.force_login(self.user)
+        # Реплики уже получили пользователя и его сессию из основной базы.
+        sessions = list(Session.objects.using('default'))
+        for alias in REPLICAS:
+            User.objects.using(alias).bulk_create([self.user])
+            Session.objects.using(alias).bulk_create(sessions)
+            Post.objects.using(alias).create(author=self.user, text=alias)
+
+    def test_reads_are_balanced_across_replicas(self):
+        texts = []
+        for _ in range(2):
+            cache.clear()
+            response = self.client.get(reverse('posts:index'))
+            texts.append(response.context['page_obj'][0].text)
+        self.assertCountEqual(texts, REPLICAS)
+
+    def test_writer_is_pinned_to_primary(self):
+        response = self.client.post(
+            reverse('posts:post_create'), {'text': 'Новый пост'}
+        )
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.assertTrue(Post.objects.using('default').filter(
+            text='Новый пост'
+        ).exists())
+        cache.clear()
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(response.context['page_obj'][0].text, 'Новый пост')
+
+    def test_reads_do_not_pin(self):
+        response = self.client.get(reverse('posts:profile', args=['writer']))
+        self.assertNotIn(PIN_COOKIE, response.cookies)
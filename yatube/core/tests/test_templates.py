@@ -0,0 +1,73 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.template import engines
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.template_cache import warm_up
+from core.template_profiler import profile
+from posts.models import Post
+
+User = get_user_model()
+
+CACHED_TEMPLATES = [{
+    **settings.TEMPLATES[0],
+    'OPTIONS': {
+        **settings.TEMPLATES[0]['OPTIONS'],
+        # Без отладки Django сам включает кеширующий загрузчик.
+        'debug': False,
+    },
+}]
+
+
+class TemplateCacheTest(TestCase):
+    @override_settings(TEMPLATES=CACHED_TEMPLATES)
+    def test_warm_up_fills_cached_loader(self):
+        loader = engines['django'].engine.template_loaders[0]
+        self.assertEqual(loader.get_template_cache, {})
+        self.assertGreater(warm_up(), 0)
+        self.assertIn('posts/index.html', loader.get_template_cache)
+        self.assertIn('admin/base.html', loader.get_template_cache)
+
+
+class TemplateProfilerTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=author, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+
+    def report(self, url=None):
+        with profile() as result:
+            self.client.get(url or reverse('posts:index'))
+        return {(row['location'], row['tag']): row for row in result.report()}
+
+    def test_tags_attributed_to_template_lines(self):
+        rows = self.report()
+        self.assertEqual(rows[(
+            'includes/header.html:7', "url 'posts:index'"
+        )]['calls'], 1)
+        image = "include 'posts/includes/post_image.html'"
+        self.assertIn(('posts/index.html:26', image), rows)
+        self.assertEqual(rows[(
+            'posts/index.html:17', "link 'posts:profile' post.author"
+        )]['calls'], 1)
+
+    def test_nested_time_excluded_from_self(self):
+        rows = self.report(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        comments = rows[
+            ('posts/post_detail.html:48', "include 'posts/comments.html'")
+        ]
+        self.assertLess(comments['self_ms'], comments['total_ms'])
+
+    def test_no_records_outside_profile(self):
+        with profile() as result:
+            pass
+        self.client.get(reverse('posts:index'))
+        self.assertEqual(result.report(), [])
@@ -1,4 +1,11 @@
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
 from django.shortcuts import render
+from django.utils.crypto import constant_time_compare
+
+from . import lru
+from .metrics import registry
 
 
 def page_not_found(request, exception):
@@ -14,4 +21,20 @@ def permission_denied(request, exception):
 
 
 def csrf_failure(request, reason=''):
-    return render(request, 'core/403csrf.html')
\ No newline at end of file
+    return render(request, 'core/403csrf.html')
+
+
+def has_metrics_token(request):
+    token = settings.METRICS_TOKEN
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    return bool(token) and constant_time_compare(header, f'Bearer {token}')
+
+
+def metrics(request):
+    """Метрики процесса в формате Prometheus для сборщика и персонала."""
+    if not (has_metrics_token(request) or request.user.is_staff):
+        raise PermissionDenied
+    return HttpResponse(
+        registry.render() + lru.render(registry.prefix),
+        content_type='text/plain; version=0.0.4',
+    )
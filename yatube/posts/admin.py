@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .models import Post, Group, Comment
+from .search import search
 
 EMPTY_TXT = '-пусто-'
 
@@ -18,6 +19,12 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = EMPTY_TXT
 
+    def get_search_results(self, request, queryset, search_term):
+        # Поиск по индексу вместо LIKE по всему тексту постов.
+        if not search_term:
+            return queryset, False
+        return queryset.filter(pk__in=search(search_term)), False
+
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group)
@@ -3,4 +3,7 @@ from django.apps import AppConfig
 
 class PostsConfig(AppConfig):
     name = 'posts'
-    verbose_name = 'Публикация записей'
\ No newline at end of file
+    verbose_name = 'Публикация записей'
+
+    def ready(self):
+        from . import fragments, signals  # noqa: F401
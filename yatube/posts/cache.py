@@ -0,0 +1,246 @@
+"""Версии лент для кеширования фрагментов страниц.
+
+У каждой ленты (главная, группа, профиль, подписки пользователя) есть
+версия — метка времени последнего изменения. Версии входят в ключ
+кеша, поэтому изменение поста делает недействительными только
+фрагменты затронутых лент, а не весь кеш. Из тех же версий строятся
+ETag и Last-Modified страниц, так что ответ 304 отдаётся без запросов
+к постам и рендеринга шаблона, и ключи целых страниц, общих для всех
+посетителей.
+"""
+import hashlib
+import time
+from datetime import datetime, timezone
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.translation import get_language
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+from core import cache as core_cache
+from core import fragments
+
+from .models import Follow
+
+INDEX_FEED = 'index'
+VERSION_KEY = 'posts:feed-version:{}'
+
+
+def group_feed(group_id):
+    return f'group:{group_id}'
+
+
+def profile_feed(author_id):
+    return f'profile:{author_id}'
+
+
+def follow_feed(user_id):
+    return f'follow:{user_id}'
+
+
+def comments_feed(post_id):
+    return f'comments:{post_id}'
+
+
+def get_versions(feeds):
+    """Возвращает версии лент; недостающие создаются заново."""
+    keys = {VERSION_KEY.format(feed): feed for feed in feeds}
+    found = cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        now = time.time_ns()
+        for key in missing:
+            cache.add(key, now, None)
+        found.update(cache.get_many(missing))
+    return {keys[key]: version for key, version in found.items()}
+
+
+def bump(feeds):
+    """Помечает ленты изменёнными."""
+    now = time.time_ns()
+    cache.set_many({VERSION_KEY.format(feed): now for feed in feeds}, None)
+
+
+def feeds_for_authors(author_ids):
+    """Ленты профилей авторов и подписок их читателей."""
+    author_ids = set(author_ids)
+    followers = Follow.objects.filter(
+        author_id__in=author_ids
+    ).values_list('user_id', flat=True).distinct()
+    return (
+        [profile_feed(author_id) for author_id in author_ids]
+        + [follow_feed(user_id) for user_id in followers]
+    )
+
+
+def feeds_for_post(author_id, group_id):
+    """Все ленты, в которых показывается пост."""
+    feeds = [INDEX_FEED] + feeds_for_authors([author_id])
+    if group_id is not None:
+        feeds.append(group_feed(group_id))
+    return feeds
+
+
+def feeds_for_posts(queryset):
+    """Ленты, затронутые изменением данных, общих для набора постов."""
+    rows = list(
+        queryset.order_by().values_list('author_id', 'group_id').distinct()
+    )
+    author_ids = {author_id for author_id, _ in rows}
+    if not author_ids:
+        return []
+    group_ids = {group_id for _, group_id in rows if group_id is not None}
+    return (
+        [INDEX_FEED]
+        + [group_feed(group_id) for group_id in group_ids]
+        + feeds_for_authors(author_ids)
+    )
+
+
+def fragment_cache(request, *feeds):
+    """Ключ и время жизни фрагмента ленты для тега `{% cache_once %}`.
+
+    Ключ зависит от версий лент, страницы или курсора и языка.
+    """
+    versions = get_versions(feeds)
+    parts = [f'{feed}@{versions[feed]}' for feed in feeds]
+    if 'cursor' in request.GET:
+        parts.append('cursor=' + request.GET['cursor'])
+    else:
+        parts.append('page=' + request.GET.get('page', '1'))
+    parts.append(get_language() or '')
+    return {
+        'key': '|'.join(parts),
+        'timeout': settings.FEED_CACHE_TIMEOUT,
+    }
+
+
+def page_validators(request, feeds):
+    """ETag и дата изменения страницы, собранные из версий её лент.
+
+    Страница зависит ещё от адреса с параметрами, пользователя
+    (меню, кнопки автора, подписки), языка и cookie CSRF: вход на сайт
+    меняет токен, и форма комментария со старым токеном давала бы 403.
+    """
+    versions = get_versions(feeds)
+    parts = [request.get_full_path(), str(request.user.pk)]
+    parts.append(get_language() or '')
+    parts.append(request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''))
+    parts += [f'{feed}@{versions[feed]}' for feed in feeds]
+    etag = hashlib.md5('|'.join(parts).encode()).hexdigest()
+    last_modified = datetime.fromtimestamp(
+        max(versions.values()) // 10 ** 9, tz=timezone.utc
+    )
+    return etag, last_modified
+
+
+PAGE_KEY = 'posts:page:{}'
+# Параметры запроса, от которых зависит страница; остальные не дробят кеш.
+PAGE_QUERY = ('page', 'cursor', 'comments')
+
+
+def page_cache_key(request, feeds):
+    versions = get_versions(feeds)
+    parts = [request.path, get_language() or '']
+    parts += [
+        f'{name}={request.GET[name]}'
+        for name in PAGE_QUERY if name in request.GET
+    ]
+    parts += [f'{feed}@{versions[feed]}' for feed in feeds]
+    return PAGE_KEY.format(hashlib.md5('|'.join(parts).encode()).hexdigest())
+
+
+def is_cacheable(request, response):
+    # Токен CSRF и новые cookie вне фрагментов делают страницу личной.
+    return (
+        response.status_code == 200 and not response.streaming
+        and not response.cookies
+        and not request.META.get('CSRF_COOKIE_USED')
+    )
+
+
+def shared_page_cache(get_feeds):
+    """Декоратор: одна копия страницы в кеше на всех посетителей.
+
+    Страница рендерится с метками вместо персональных фрагментов
+    (`core.fragments`), сохраняется, и в каждый ответ подставляются
+    фрагменты текущего посетителя. Ключ строится из адреса, номера
+    страницы или курсора и версий лент, поэтому сигналы `Post`,
+    `Comment` и `Follow`, обновляющие версии, заодно делают
+    недействительными и сохранённые страницы. Страницу с истёкшим или
+    новым ключом строит один процесс (`core.cache.get_or_set`).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (not settings.PAGE_CACHE
+                    or request.method not in ('GET', 'HEAD')):
+                return view(request, *args, **kwargs)
+            feeds = get_feeds(request, *args, **kwargs)
+            if not feeds:
+                return view(request, *args, **kwargs)
+            key = page_cache_key(request, feeds)
+            built = []
+
+            def build():
+                with fragments.shared(request):
+                    response = view(request, *args, **kwargs)
+                built.append(response)
+                if not is_cacheable(request, response):
+                    return None
+                return response.content, response['Content-Type']
+
+            cached = core_cache.get_or_set(
+                key, build, settings.PAGE_CACHE_TIMEOUT,
+                cacheable=lambda page: page is not None,
+            )
+            if not built:
+                content, content_type = cached
+                return HttpResponse(
+                    fragments.stitch(request, content),
+                    content_type=content_type,
+                )
+            response = built[0]
+            if not response.streaming:
+                response.content = fragments.stitch(request, response.content)
+            return response
+        return wrapper
+    return decorator
+
+
+def feed_condition(get_feeds):
+    """Декоратор условного GET для страницы из лент.
+
+    `get_feeds(request, *args, **kwargs)` возвращает ленты страницы
+    или None, если страницы нет: тогда проверка пропускается и
+    представление само отдаёт 404. Сама страница отдаётся из кеша
+    (`shared_page_cache`).
+    """
+    def feeds(request, *args, **kwargs):
+        if not hasattr(request, '_feeds'):
+            request._feeds = get_feeds(request, *args, **kwargs)
+        return request._feeds
+
+    def validators(request, *args, **kwargs):
+        if not hasattr(request, '_feed_validators'):
+            page_feeds = feeds(request, *args, **kwargs)
+            request._feed_validators = (
+                page_validators(request, page_feeds) if page_feeds
+                else (None, None)
+            )
+        return request._feed_validators
+
+    def decorator(view):
+        view = shared_page_cache(feeds)(view)
+        view = condition(
+            etag_func=lambda *args, **kwargs: validators(*args, **kwargs)[0],
+            last_modified_func=(
+                lambda *args, **kwargs: validators(*args, **kwargs)[1]
+            ),
+        )(view)
+        # Клиенты и CDN могут хранить страницу, но должны её проверять.
+        return cache_control(no_cache=True)(view)
+    return decorator
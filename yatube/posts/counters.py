@@ -0,0 +1,115 @@
+"""Денормализованные счётчики.
+
+Число записей в ленте (все посты, группа, автор), а также читателей и
+подписок пользователя хранится в таблице `Counter` и меняется сигналами
+при создании и удалении объектов, так что страницам не нужен COUNT(*)
+на каждый запрос. Строка счётчика создаётся лениво при первом чтении
+по точному подсчёту; для огромных лент, где точный подсчёт дорог,
+возвращается оценка. Расхождения исправляет `manage.py
+reconcile_counters`.
+"""
+import re
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+
+from core import cache
+
+from .models import Counter
+
+ALL_POSTS = 'posts'
+
+
+def group_posts_key(group_id):
+    return f'group:{group_id}:posts'
+
+
+def author_posts_key(author_id):
+    return f'author:{author_id}:posts'
+
+
+def followers_key(user_id):
+    return f'user:{user_id}:followers'
+
+
+def following_key(user_id):
+    return f'user:{user_id}:following'
+
+
+def post_feed_keys(author_id, group_id):
+    """Ключи всех лент, в которые попадает пост."""
+    keys = [ALL_POSTS, author_posts_key(author_id)]
+    if group_id is not None:
+        keys.append(group_posts_key(group_id))
+    return keys
+
+
+def increment(keys, delta=1):
+    """Атомарно меняет счётчики через F-выражение.
+
+    Отсутствующие строки не создаются: они будут посчитаны точно
+    при первом чтении.
+    """
+    Counter.objects.filter(key__in=keys).update(value=F('value') + delta)
+
+
+def discard(keys):
+    Counter.objects.filter(key__in=keys).delete()
+
+
+def estimate_count(queryset):
+    """Приблизительное число строк по плану запроса.
+
+    Планировщик PostgreSQL даёт оценку бесплатно; для других СУБД
+    возвращается None.
+    """
+    if connection.vendor != 'postgresql':
+        return None
+    plan = queryset.order_by().explain()
+    match = re.search(r'rows=(\d+)', plan)
+    return int(match.group(1)) if match else None
+
+
+def get_count(key, queryset):
+    """Возвращает число записей ленты `key`, не считая их без нужды.
+
+    Если счётчика ещё нет, записи считаются, но не дальше
+    `POSTS_COUNT_EXACT_LIMIT`: в большой ленте вместо точного значения
+    берётся оценка, которая кешируется на `POSTS_COUNT_ESTIMATE_TIMEOUT`.
+    """
+    value = Counter.objects.filter(key=key).values_list(
+        'value', flat=True
+    ).first()
+    if value is not None:
+        return value
+    cache_key = f'posts:count:{key}'
+    count, estimated = cache.get_or_set(
+        cache_key,
+        lambda: _count_or_estimate(key, queryset),
+        settings.POSTS_COUNT_ESTIMATE_TIMEOUT,
+    )
+    if not estimated:
+        # Точное значение уже лежит в счётчике, в кеше нужна только оценка.
+        cache.delete(cache_key)
+    return count
+
+
+def _count_or_estimate(key, queryset):
+    limit = settings.POSTS_COUNT_EXACT_LIMIT
+    if limit is None:
+        count = queryset.count()
+    else:
+        count = queryset.order_by()[:limit + 1].count()
+    if limit is not None and count > limit:
+        return max(estimate_count(queryset) or 0, count), True
+    # Параллельное первое чтение могло уже создать счётчик, а запись —
+    # изменить его: тогда верно сохранённое значение, а не свой подсчёт.
+    try:
+        with transaction.atomic():
+            counter, _ = Counter.objects.get_or_create(
+                key=key, defaults={'value': count}
+            )
+    except IntegrityError:
+        counter = Counter.objects.get(key=key)
+    return counter.value, False
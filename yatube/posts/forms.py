@@ -1,11 +1,60 @@
 from django import forms
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from PIL import Image
+
+from .models import Comment, Group, Post, User
+
+
+class HeaderImageField(forms.ImageField):
+    """Проверяет картинку по заголовку, не декодируя её целиком.
+
+    Стандартный `ImageField` вызывает `verify()` и читает весь файл
+    в запросе; здесь PIL разбирает только заголовок, а перекодирование
+    выполняется в фоне вместе с миниатюрой.
+    """
+
+    def to_python(self, data):
+        f = forms.FileField.to_python(self, data)
+        if f is None:
+            return None
+        try:
+            image = Image.open(f)
+        except Exception as exc:
+            raise ValidationError(
+                self.error_messages['invalid_image'], code='invalid_image',
+            ) from exc
+        width, height = image.size
+        if width * height > settings.POST_IMAGE_MAX_PIXELS:
+            raise ValidationError(
+                'Картинка слишком большая: не больше %(limit)s пикселей.',
+                code='too_many_pixels',
+                params={'limit': settings.POST_IMAGE_MAX_PIXELS},
+            )
+        f.image = image
+        f.content_type = Image.MIME.get(image.format)
+        f.seek(0)
+        return f
 
-from .models import Post, Comment
 
 class PostForm(forms.ModelForm):
+    def __init__(self, *args, upload_errors=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.upload_errors = upload_errors or {}
+
+    def clean(self):
+        cleaned_data = super().clean()
+        for field, message in self.upload_errors.items():
+            if field in self.fields:
+                self.add_error(field, message)
+        return cleaned_data
+
     class Meta:
         model = Post
         fields = ('text', 'group', 'image')
+        field_classes = {
+            'image': HeaderImageField,
+        }
 
 
 class CommentForm(forms.ModelForm):
@@ -17,4 +66,22 @@ class CommentForm(forms.ModelForm):
         }
         help_texts = {
             'text': 'Текст нового комментария',
-        }
\ No newline at end of file
+        }
+
+
+class SearchForm(forms.Form):
+    q = forms.CharField(label='Что искать', max_length=200)
+    group = forms.ModelChoiceField(
+        Group.objects.all(), to_field_name='slug', required=False,
+        label='Группа', empty_label='Все группы',
+    )
+    author = forms.CharField(label='Автор', max_length=150, required=False)
+
+    def clean_author(self):
+        username = self.cleaned_data['author']
+        if not username:
+            return None
+        author = User.objects.filter(username=username).first()
+        if author is None:
+            raise ValidationError('Такого пользователя нет.')
+        return author
@@ -0,0 +1,37 @@
+"""Фрагменты страниц постов, которые зависят от посетителя.
+
+Страницы лент кешируются одной копией на всех (`posts.cache`), а эти
+фрагменты рендерятся для каждого ответа: см. `core.fragments`.
+"""
+from core.fragments import register
+
+from .forms import CommentForm
+from .models import Follow
+
+
+@register('switcher', 'posts/includes/switcher.html')
+def switcher(request, **tabs):
+    return tabs
+
+
+@register('comment_form', 'posts/includes/comment_form.html')
+def comment_form(request, post_id):
+    return {'post_id': post_id, 'form': CommentForm()}
+
+
+@register('edit_button', 'posts/includes/edit_button.html')
+def edit_button(request, post_id, author_id):
+    return {'post_id': post_id, 'is_author': request.user.pk == author_id}
+
+
+@register('follow_button', 'posts/includes/follow_button.html')
+def follow_button(request, author_id, username):
+    user = request.user
+    can_follow = user.is_authenticated and user.pk != author_id
+    return {
+        'username': username,
+        'can_follow': can_follow,
+        'following': can_follow and Follow.objects.filter(
+            user=user, author_id=author_id
+        ).exists(),
+    }
@@ -0,0 +1,70 @@
+"""Группы по slug и авторы по имени из кеша процесса.
+
+Страницы группы и профиля каждый раз ищут объект по адресу, хотя
+группы и пользователи почти не меняются. Найденные объекты хранятся
+в `core.lru.LRUCache` в сериализованном виде: каждый запрос получает
+свою копию, а размер записи известен точно. Сигналы сохранения и
+удаления сбрасывают записи (`posts.signals`).
+
+Внутри транзакции кеш не используется: прочитанная в ней строка может
+быть ещё не зафиксирована или откатиться.
+"""
+import pickle
+
+from django.conf import settings
+from django.db import connection
+from django.http import Http404
+
+from core.lru import LRUCache
+
+from .models import Group, User
+
+
+def _lru(name):
+    return LRUCache(
+        name,
+        max_entries=settings.LOOKUP_CACHE_ENTRIES,
+        max_bytes=settings.LOOKUP_CACHE_BYTES,
+        ttl=settings.LOOKUP_CACHE_TIMEOUT,
+    )
+
+
+groups = _lru('groups')
+users = _lru('users')
+
+
+def _lookup(cache, model, **lookup):
+    (key,) = lookup.values()
+    if connection.in_atomic_block:
+        return model.objects.filter(**lookup).first()
+    data = cache.get(key)
+    if data is not None:
+        return pickle.loads(data)
+    instance = model.objects.filter(**lookup).first()
+    if instance is not None:
+        cache.set(key, pickle.dumps(instance, pickle.HIGHEST_PROTOCOL))
+    return instance
+
+
+def get_group(slug):
+    """Группа с адресом `slug` или None."""
+    return _lookup(groups, Group, slug=slug)
+
+
+def get_user(username):
+    """Пользователь с именем `username` или None."""
+    return _lookup(users, User, username=username)
+
+
+def group_or_404(slug):
+    group = get_group(slug)
+    if group is None:
+        raise Http404('Группа не найдена')
+    return group
+
+
+def user_or_404(username):
+    user = get_user(username)
+    if user is None:
+        raise Http404('Пользователь не найден')
+    return user
@@ -0,0 +1,92 @@
+import re
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from posts.models import Follow, Group, Post, User
+from posts.timeline import follow_posts
+
+# Признаки плохого плана: полный просмотр таблицы и сортировка
+# результата вместо чтения по индексу.
+WARNINGS = {
+    'sqlite': (
+        (re.compile(r'\bSCAN (?:TABLE )?\w+(?! USING)(?:\s|$)'),
+         'полный просмотр таблицы'),
+        (re.compile(r'USE TEMP B-TREE'), 'сортировка во временном B-дереве'),
+    ),
+    'postgresql': (
+        (re.compile(r'Seq Scan'), 'полный просмотр таблицы'),
+        (re.compile(r'\bSort\b'), 'сортировка результата'),
+    ),
+    'mysql': (
+        (re.compile(r'Using filesort'), 'сортировка результата'),
+        (re.compile(r'\bALL\b'), 'полный просмотр таблицы'),
+    ),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет EXPLAIN для запросов страниц posts.views '
+        'и отмечает полные просмотры таблиц и сортировки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--strict', action='store_true',
+            help='Завершиться с ошибкой, если найдены проблемы.',
+        )
+
+    def feed_queries(self):
+        """Запросы, которые выполняют страницы приложения posts."""
+        per_page = settings.POSTS_PER_PAGE
+        ordering = ('-pub_date', '-pk')
+        queries = {
+            'index': Post.objects.for_feed().order_by(*ordering),
+        }
+        group = Group.objects.first()
+        if group is not None:
+            queries['group_posts'] = group.posts.for_feed().order_by(
+                *ordering
+            )
+        author = User.objects.filter(posts__isnull=False).first()
+        if author is not None:
+            queries['profile'] = author.posts.for_feed().order_by(*ordering)
+        follow = Follow.objects.first()
+        if follow is not None:
+            queries['follow_index'] = follow_posts(
+                follow.user
+            ).for_feed().order_by(*ordering)
+        post = Post.objects.first()
+        if post is not None:
+            queries['post_detail:comments'] = post.comments.select_related(
+                'author'
+            ).order_by('-created', '-pk')
+        return {
+            name: queryset[:per_page] for name, queryset in queries.items()
+        }
+
+    def check_plan(self, plan):
+        patterns = WARNINGS.get(connection.vendor, ())
+        problems = []
+        for line in plan.splitlines():
+            for pattern, message in patterns:
+                if pattern.search(line):
+                    problems.append(f'{message}: {line.strip()}')
+        return problems
+
+    def handle(self, *args, **options):
+        total = 0
+        for name, queryset in self.feed_queries().items():
+            plan = queryset.explain()
+            problems = self.check_plan(plan)
+            total += len(problems)
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(plan)
+            for problem in problems:
+                self.stdout.write(self.style.WARNING(f'  ! {problem}'))
+        summary = f'Найдено проблем: {total}'
+        if total and options['strict']:
+            raise CommandError(summary)
+        self.stdout.write(self.style.SUCCESS(summary))
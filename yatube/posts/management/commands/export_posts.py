@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.transfer import FIELDS, FORMATS, RecordWriter, detect_format
+
+
+class Command(BaseCommand):
+    help = 'Выгружает посты в JSONL или CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='Файл выгрузки; по умолчанию стандартный вывод.',
+        )
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='Формат файла; по умолчанию по расширению, иначе JSONL.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько постов читать из базы за раз.',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or detect_format(path)
+        rows = Post.objects.order_by('pk').values_list(
+            'text', 'pub_date', 'author__username', 'group__slug', 'image'
+        ).iterator(chunk_size=options['batch_size'])
+        if path == '-':
+            done = self.export(rows, self.stdout, file_format)
+        else:
+            with open(path, 'w', encoding='utf-8', newline='') as file:
+                done = self.export(rows, file, file_format)
+        self.stderr.write(self.style.SUCCESS(f'Выгружено постов: {done}'))
+
+    def export(self, rows, file, file_format):
+        writer = RecordWriter(file, file_format)
+        done = 0
+        for text, pub_date, author, group, image in rows:
+            writer.write(dict(zip(FIELDS, (
+                text, pub_date.isoformat(), author, group or '', image,
+            ))))
+            done += 1
+        return done
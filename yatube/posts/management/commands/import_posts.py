@@ -0,0 +1,185 @@
+import hashlib
+import os
+import time
+from collections import Counter as Tally
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts import cache, counters, search, timeline
+from posts.models import Counter, Group, Post, User
+from posts.transfer import FORMATS, detect_format, keep_pub_date, read_records
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает посты из JSONL или CSV пакетами через bulk_create. '
+        'Прерванную загрузку того же файла можно продолжить.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл с постами.')
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='Формат файла; по умолчанию по расширению, иначе JSONL.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько постов записывать в одной транзакции.',
+        )
+        parser.add_argument(
+            '--create-missing', action='store_true',
+            help='Создавать неизвестных авторов и группы.',
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Начать с начала файла, забыв сохранённую позицию.',
+        )
+
+    def checkpoint_key(self, path):
+        # Позиция хранится в той же транзакции, что и пакет постов, поэтому
+        # после сбоя загрузка продолжается ровно с первого незаписанного.
+        digest = hashlib.md5(os.path.abspath(path).encode()).hexdigest()
+        return f'import:{digest}'
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or detect_format(path)
+        batch_size = options['batch_size']
+        self.create_missing = options['create_missing']
+        self.checkpoint = self.checkpoint_key(path)
+        if options['restart']:
+            Counter.objects.filter(key=self.checkpoint).delete()
+        start = Counter.objects.filter(key=self.checkpoint).values_list(
+            'value', flat=True
+        ).first() or 0
+        if start:
+            self.stdout.write(f'Продолжаем после записи {start}')
+        self.authors = dict(
+            User.objects.values_list('username', 'pk').iterator()
+        )
+        self.groups = dict(Group.objects.values_list('slug', 'pk').iterator())
+        self.readers = set()
+        self.started = time.monotonic()
+        self.done = self.skipped = 0
+        batch = []
+        position = start
+        with open(path, encoding='utf-8', newline='') as file, \
+                keep_pub_date():
+            for number, record in read_records(file, file_format):
+                if number <= start:
+                    continue
+                post = self.build(number, record)
+                if post is None:
+                    self.skipped += 1
+                else:
+                    batch.append(post)
+                position = number
+                if len(batch) >= batch_size:
+                    self.flush(batch, position)
+                    batch = []
+            self.flush(batch, position)
+        # Ленты подписок обрезаются один раз, а не после каждого пакета.
+        for user_id in self.readers:
+            timeline.trim(user_id)
+        Counter.objects.filter(key=self.checkpoint).delete()
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено постов: {self.done}, пропущено: {self.skipped}'
+        ))
+
+    def build(self, number, record):
+        """Пост из записи файла или None, если запись не годится."""
+        if not isinstance(record, dict) or not record.get('text'):
+            self.stderr.write(f'Запись {number}: нет текста поста')
+            return None
+        author_id = self.resolve(
+            self.authors, record.get('author'), self.create_author
+        )
+        if author_id is None:
+            self.stderr.write(
+                f'Запись {number}: неизвестный автор {record.get("author")!r}'
+            )
+            return None
+        group_id = None
+        if record.get('group'):
+            group_id = self.resolve(
+                self.groups, record['group'], self.create_group
+            )
+            if group_id is None:
+                self.stderr.write(
+                    f'Запись {number}: неизвестная группа {record["group"]!r}'
+                )
+                return None
+        pub_date = parse_datetime(record.get('pub_date') or '')
+        if pub_date is None:
+            pub_date = timezone.now()
+        elif timezone.is_naive(pub_date):
+            pub_date = timezone.make_aware(pub_date)
+        return Post(
+            text=record['text'],
+            pub_date=pub_date,
+            author_id=author_id,
+            group_id=group_id,
+            image=record.get('image') or '',
+        )
+
+    def resolve(self, lookup, name, create):
+        if not name:
+            return None
+        if name not in lookup and self.create_missing:
+            lookup[name] = create(name)
+        return lookup.get(name)
+
+    def create_author(self, username):
+        return User.objects.create_user(username=username).pk
+
+    def create_group(self, slug):
+        return Group.objects.create(title=slug, slug=slug).pk
+
+    def flush(self, batch, position):
+        """Записывает пакет постов и позицию в файле одной транзакцией."""
+        with transaction.atomic():
+            if batch:
+                # bulk_create не вызывает сигналы: индекс, счётчики и
+                # ленты подписок обновляются здесь же, в транзакции пакета,
+                # а версии лент — после её фиксации, чтобы параллельный
+                # запрос не закешировал под новой версией старые строки.
+                # SQLite не возвращает id из bulk_create, поэтому новые посты
+                # выбираются по id больше прежнего максимума: загрузка
+                # рассчитана на то, что другие посты в это время не пишутся.
+                last_pk = Post.objects.aggregate(last=Max('pk'))['last'] or 0
+                Post.objects.bulk_create(batch)
+                created = Post.objects.filter(pk__gt=last_pk)
+                posts = list(created.only(
+                    'pk', 'text', 'pub_date', 'author_id', 'group_id'
+                ))
+                for post in posts:
+                    search.index_post(post.pk, post.text)
+                self.readers |= timeline.fan_out_many(posts)
+                self.count(posts)
+                feeds = cache.feeds_for_posts(created)
+                transaction.on_commit(lambda: cache.bump(feeds))
+            Counter.objects.update_or_create(
+                key=self.checkpoint, defaults={'value': position}
+            )
+        self.done += len(batch)
+        elapsed = time.monotonic() - self.started
+        self.stdout.write(
+            f'Запись {position}: загружено {self.done} '
+            f'({self.done / max(elapsed, 1e-6):.0f} постов/с)'
+        )
+
+    def count(self, posts):
+        """Увеличивает счётчики лент, в которые попали посты пакета."""
+        tally = Tally()
+        for post in posts:
+            keys = counters.post_feed_keys(post.author_id, post.group_id)
+            tally.update(keys)
+        deltas = {}
+        for key, delta in tally.items():
+            deltas.setdefault(delta, []).append(key)
+        for delta, keys in deltas.items():
+            counters.increment(keys, delta)
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from posts import timeline
+from posts.models import Follow, User
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает материализованные ленты подписок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'usernames', nargs='*',
+            help='Пользователи, чьи ленты пересобрать (по умолчанию все).',
+        )
+        parser.add_argument(
+            '--trim-only', action='store_true',
+            help='Только обрезать ленты до TIMELINE_MAX_LENGTH.',
+        )
+
+    def handle(self, *args, **options):
+        if options['usernames']:
+            user_ids = User.objects.filter(
+                username__in=options['usernames']
+            ).values_list('pk', flat=True)
+        else:
+            user_ids = Follow.objects.values_list(
+                'user_id', flat=True
+            ).distinct()
+        action = timeline.trim if options['trim_only'] else timeline.rebuild
+        done = 0
+        for user_id in user_ids.iterator():
+            action(user_id)
+            done += 1
+        self.stdout.write(self.style.SUCCESS(f'Обработано лент: {done}'))
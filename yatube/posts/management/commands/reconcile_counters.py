@@ -0,0 +1,76 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F
+
+from posts import counters
+from posts.models import Counter, Follow, Group, Post, User
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает денормализованные счётчики и исправляет расхождения.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать расхождения, ничего не меняя.',
+        )
+
+    def expected_counters(self):
+        """Точные значения всех счётчиков таблицы Counter."""
+        expected = {counters.ALL_POSTS: Post.objects.count()}
+        for model, key in (
+            (Group, counters.group_posts_key),
+            (User, counters.author_posts_key),
+            (User, counters.followers_key),
+            (User, counters.following_key),
+        ):
+            for pk in model.objects.values_list('pk', flat=True).iterator():
+                expected[key(pk)] = 0
+        for field, key in (
+            ('group_id', counters.group_posts_key),
+            ('author_id', counters.author_posts_key),
+        ):
+            rows = Post.objects.exclude(**{field: None}).order_by().values(
+                field
+            ).annotate(total=Count('pk'))
+            for row in rows.iterator():
+                expected[key(row[field])] = row['total']
+        for field, key in (
+            ('author_id', counters.followers_key),
+            ('user_id', counters.following_key),
+        ):
+            rows = Follow.objects.order_by().values(field).annotate(
+                total=Count('pk')
+            )
+            for row in rows.iterator():
+                expected[key(row[field])] = row['total']
+        return expected
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        expected = self.expected_counters()
+        drift = 0
+        with transaction.atomic():
+            stored = dict(Counter.objects.filter(
+                key__in=expected
+            ).values_list('key', 'value'))
+            for key, value in expected.items():
+                if key in stored and stored[key] != value:
+                    drift += 1
+                    self.stdout.write(f'{key}: {stored[key]} -> {value}')
+                    if not dry_run:
+                        Counter.objects.filter(key=key).update(value=value)
+            posts = Post.objects.annotate(
+                total=Count('comments')
+            ).exclude(comments_count=F('total'))
+            for post in posts.only('pk', 'comments_count').iterator():
+                drift += 1
+                self.stdout.write(
+                    f'post:{post.pk}:comments: '
+                    f'{post.comments_count} -> {post.total}'
+                )
+                if not dry_run:
+                    Post.objects.filter(pk=post.pk).update(
+                        comments_count=post.total
+                    )
+        self.stdout.write(self.style.SUCCESS(f'Расхождений: {drift}'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает поисковый индекс постов.'
+
+    def handle(self, *args, **options):
+        done = search.reindex()
+        self.stdout.write(
+            self.style.SUCCESS(f'Проиндексировано постов: {done}')
+        )
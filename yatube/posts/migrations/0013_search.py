@@ -0,0 +1,199 @@
+# Generated by Django 2.2.19 on 2026-10-18 19:14
+
+import re
+from collections import Counter
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Снимок таблицы FTS5 и токенизатора (posts.search, posts.stemmer) на
+# момент миграции: дальнейшие изменения кода не должны менять её.
+FTS_TABLE = 'posts_post_fts'
+WORD_RE = re.compile(r'\w+')
+
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND = (
+    ('в', 'вши', 'вшись'),
+    ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'),
+)
+ADJECTIVE = (
+    (),
+    ('ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем',
+     'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю',
+     'ая', 'яя', 'ою', 'ею'),
+)
+PARTICIPLE = (
+    ('ем', 'нн', 'вш', 'ющ', 'щ'),
+    ('ивш', 'ывш', 'ующ'),
+)
+REFLEXIVE = (
+    (),
+    ('ся', 'сь'),
+)
+VERB = (
+    ('ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но', 'ет',
+     'ют', 'ны', 'ть', 'ешь', 'нно'),
+    ('ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей', 'уй',
+     'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят', 'ует', 'уют',
+     'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю'),
+)
+NOUN = (
+    (),
+    ('а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии',
+     'и', 'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам',
+     'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия',
+     'ья', 'я'),
+)
+SUPERLATIVE = ('ейше', 'ейш')
+DERIVATIONAL = ('ость', 'ост')
+
+
+def _region(word, start):
+    """Начало области после первой согласной, идущей за гласной."""
+    for i in range(start + 1, len(word)):
+        if word[i] not in VOWELS and word[i - 1] in VOWELS:
+            return i + 1
+    return len(word)
+
+
+def _remove(rv, endings):
+    """Отсекает самое длинное окончание класса.
+
+    Окончания первой группы должны следовать за «а» или «я». Возвращает
+    остаток или None, если окончание не найдено или условие не выполнено.
+    """
+    found = None
+    for group, suffixes in enumerate(endings):
+        for suffix in suffixes:
+            if rv.endswith(suffix) and (
+                    found is None or len(suffix) > len(found[1])):
+                found = group, suffix
+    if found is None:
+        return None
+    group, suffix = found
+    rest = rv[:-len(suffix)]
+    if group == 0 and not rest.endswith(('а', 'я')):
+        return None
+    return rest
+
+
+def _endings(rv):
+    """Шаг 1: окончания деепричастий, прилагательных, глаголов и
+    существительных."""
+    rest = _remove(rv, PERFECTIVE_GERUND)
+    if rest is not None:
+        return rest
+    without_reflexive = _remove(rv, REFLEXIVE)
+    if without_reflexive is not None:
+        rv = without_reflexive
+    rest = _remove(rv, ADJECTIVE)
+    if rest is not None:
+        without_participle = _remove(rest, PARTICIPLE)
+        return rest if without_participle is None else without_participle
+    for endings in (VERB, NOUN):
+        rest = _remove(rv, endings)
+        if rest is not None:
+            return rest
+    return rv
+
+
+def _superlative(rv):
+    """Шаг 4: удвоенная «н», превосходная степень и мягкий знак."""
+    if rv.endswith('нн'):
+        return rv[:-1]
+    for suffix in SUPERLATIVE:
+        if rv.endswith(suffix):
+            rv = rv[:-len(suffix)]
+            return rv[:-1] if rv.endswith('нн') else rv
+    return rv[:-1] if rv.endswith('ь') else rv
+
+
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    rv_start = next(
+        (i + 1 for i, letter in enumerate(word) if letter in VOWELS),
+        len(word),
+    )
+    r2_start = _region(word, _region(word, 0))
+    prefix, rv = word[:rv_start], word[rv_start:]
+    rv = _endings(rv)
+    if rv.endswith('и'):
+        rv = rv[:-1]
+    for suffix in DERIVATIONAL:
+        if rv.endswith(suffix):
+            # Словообразовательный суффикс отсекается только в R2.
+            if rv_start + len(rv) - len(suffix) >= r2_start:
+                rv = rv[:-len(suffix)]
+            break
+    return prefix + _superlative(rv)
+
+
+def tokenize(text):
+    return [
+        stem(word)[:64]
+        for word in WORD_RE.findall(text.lower().replace('ё', 'е'))
+    ]
+
+
+def create_fts_table(schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return False
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        options = {row[0] for row in cursor.fetchall()}
+    if 'ENABLE_FTS5' not in options:
+        return False
+    schema_editor.execute(
+        f'CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5('
+        f"stems, tokenize = 'unicode61 remove_diacritics 0')"
+    )
+    return True
+
+
+def build_index(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    SearchTerm = apps.get_model('posts', 'SearchTerm')
+    alias = schema_editor.connection.alias
+    fts = create_fts_table(schema_editor)
+    posts = Post.objects.using(alias).values_list('pk', 'text').iterator()
+    for post_id, text in posts:
+        terms = tokenize(text)
+        if fts:
+            schema_editor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, stems) VALUES (%s, %s)',
+                [post_id, ' '.join(terms)],
+            )
+        else:
+            SearchTerm.objects.using(alias).bulk_create([
+                SearchTerm(term=term, post_id=post_id, count=count)
+                for term, count in Counter(terms).items()
+            ])
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_post_thumbnail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, verbose_name='Основа слова')),
+                ('count', models.PositiveIntegerField(default=1, verbose_name='Число вхождений')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.Post')),
+            ],
+            options={
+                'unique_together': {('term', 'post')},
+            },
+        ),
+        migrations.RunPython(build_index, drop_index),
+    ]
@@ -23,10 +23,41 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    # Поля, которые читают шаблоны лент: пост, автор и группа.
+    FEED_FIELDS = (
+        'text', 'pub_date', 'image', 'thumbnail', 'comments_count',
+        'author', 'group',
+        'author__username', 'author__first_name', 'author__last_name',
+        'group__slug', 'group__title',
+    )
+
+    def for_feed(self):
+        """Посты для ленты: автор и группа загружаются одним запросом."""
+        return self.select_related('author', 'group').only(*self.FEED_FIELDS)
+
+
 class Post(models.Model):
 
     class Meta:
         ordering = ["-pub_date"]
+        # Ленты сортируются по (pub_date, id): индексы отдают записи
+        # уже упорядоченными, без сортировки во временном B-дереве.
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'], name='post_pub_date_idx'
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_pub_date_idx',
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_pub_date_idx',
+            ),
+        ]
+
+    objects = PostQuerySet.as_manager()
 
     text = models.TextField(
         verbose_name='Текст поста',
@@ -56,6 +87,17 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    thumbnail = models.CharField(
+        verbose_name='Адрес миниатюры',
+        max_length=255,
+        blank=True,
+        editable=False,
+    )
+    comments_count = models.PositiveIntegerField(
+        verbose_name='Число комментариев',
+        default=0,
+        editable=False,
+    )
 
     def __str__(self):
         return self.text[:15]
@@ -64,6 +106,12 @@ class Post(models.Model):
 class Comment(models.Model):
     class Meta:
         ordering = ["-created"]
+        indexes = [
+            models.Index(
+                fields=['post', '-created', '-id'],
+                name='comment_post_created_idx',
+            ),
+        ]
 
     post = models.ForeignKey(
         Post,
@@ -92,6 +140,12 @@ class Comment(models.Model):
 class Follow(models.Model):
     class Meta:
         unique_together = ('user', 'author')
+        # Читатели автора выбираются при раскладке постов по лентам.
+        indexes = [
+            models.Index(
+                fields=['author', 'user'], name='follow_author_user_idx'
+            ),
+        ]
 
     user = models.ForeignKey(
         User,
@@ -102,4 +156,73 @@ class Follow(models.Model):
         User,
         on_delete=models.CASCADE,
         related_name='following'
-    )
\ No newline at end of file
+    )
+
+
+class TimelineEntry(models.Model):
+    """Пост в материализованной ленте подписок пользователя."""
+    class Meta:
+        unique_together = ('user', 'post')
+        indexes = [
+            models.Index(fields=['user', '-pub_date']),
+            models.Index(fields=['user', 'author']),
+        ]
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    pub_date = models.DateTimeField()
+
+
+class Counter(models.Model):
+    """Денормализованный счётчик, например число постов в ленте."""
+    key = models.CharField(
+        verbose_name='Ключ',
+        max_length=100,
+        unique=True,
+    )
+    value = models.BigIntegerField(
+        verbose_name='Значение',
+        default=0,
+    )
+
+    def __str__(self):
+        return f'{self.key}={self.value}'
+
+
+class SearchTerm(models.Model):
+    """Запись обратного индекса: основа слова и число её вхождений в пост.
+
+    Используется для поиска, когда база не поддерживает SQLite FTS5.
+    """
+    class Meta:
+        unique_together = ('term', 'post')
+
+    term = models.CharField(
+        verbose_name='Основа слова',
+        max_length=64,
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    count = models.PositiveIntegerField(
+        verbose_name='Число вхождений',
+        default=1,
+    )
+
+    def __str__(self):
+        return f'{self.term}@{self.post_id}'
@@ -0,0 +1,182 @@
+"""Полнотекстовый поиск по постам.
+
+Текст поста разбивается на слова, и каждое слово приводится к основе
+русским стеммером, так что «котами» находит «кот». Основы хранятся
+в обратном индексе, который обновляется сигналами при сохранении и
+удалении поста. На SQLite с FTS5 индексом служит виртуальная таблица
+`posts_post_fts` (ранжирование по bm25), на остальных базах —
+таблица `SearchTerm` с ранжированием по TF-IDF.
+"""
+import math
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, Count, F, FloatField, Sum, Value, When
+
+from .counters import ALL_POSTS, get_count
+from .models import Post, SearchTerm
+from .stemmer import stem
+
+FTS_TABLE = 'posts_post_fts'
+WORD_RE = re.compile(r'\w+')
+
+_fts_tables = {}
+
+
+def tokenize(text):
+    """Основы слов текста в порядке следования."""
+    return [
+        stem(word)[:64]
+        for word in WORD_RE.findall(text.lower().replace('ё', 'е'))
+    ]
+
+
+def fts_available():
+    """Есть ли в базе таблица FTS5; ответ запоминается для базы."""
+    if connection.vendor != 'sqlite':
+        return False
+    name = connection.settings_dict['NAME']
+    if name not in _fts_tables:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' "
+                "AND name = %s", [FTS_TABLE],
+            )
+            _fts_tables[name] = cursor.fetchone() is not None
+    return _fts_tables[name]
+
+
+def create_fts_table(schema_editor):
+    """Создаёт таблицу FTS5, если SQLite собран с её поддержкой."""
+    if schema_editor.connection.vendor != 'sqlite':
+        return False
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        options = {row[0] for row in cursor.fetchall()}
+    if 'ENABLE_FTS5' not in options:
+        return False
+    # Основы слов вычисляются в Python, токенизатору FTS5 остаётся
+    # разбить строку по пробелам.
+    schema_editor.execute(
+        f'CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5('
+        f"stems, tokenize = 'unicode61 remove_diacritics 0')"
+    )
+    _fts_tables.clear()
+    return True
+
+
+def index_post(post_id, text):
+    """Заменяет записи индекса для поста."""
+    terms = tokenize(text)
+    if fts_available():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id]
+            )
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, stems) VALUES (%s, %s)',
+                [post_id, ' '.join(terms)],
+            )
+        return
+    SearchTerm.objects.filter(post_id=post_id).delete()
+    SearchTerm.objects.bulk_create([
+        SearchTerm(term=term, post_id=post_id, count=count)
+        for term, count in Counter(terms).items()
+    ])
+
+
+def unindex_post(post_id):
+    if fts_available():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id]
+            )
+    # Записи SearchTerm удаляются каскадно вместе с постом.
+
+
+def reindex(posts=None, batch_size=1000):
+    """Строит индекс заново; возвращает число проиндексированных постов."""
+    if posts is None:
+        posts = Post.objects.all()
+        if fts_available():
+            with connection.cursor() as cursor:
+                cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        else:
+            SearchTerm.objects.all().delete()
+    done = 0
+    for post_id, text in posts.values_list('pk', 'text').iterator(
+            chunk_size=batch_size):
+        index_post(post_id, text)
+        done += 1
+    return done
+
+
+def search(query, group_id=None, author_id=None):
+    """Id постов, содержащих все слова запроса, от лучших к худшим.
+
+    Результатов не больше `SEARCH_MAX_RESULTS`.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms:
+        return []
+    if fts_available():
+        return _search_fts(terms, group_id, author_id)
+    return _search_table(terms, group_id, author_id)
+
+
+def _search_fts(terms, group_id, author_id):
+    posts = Post._meta.db_table
+    conditions = [f'{FTS_TABLE} MATCH %s']
+    # Каждая основа в кавычках, чтобы синтаксис FTS5 не срабатывал.
+    params = [' '.join('"{}"'.format(term.replace('"', '""'))
+                       for term in terms)]
+    if group_id is not None:
+        conditions.append('p.group_id = %s')
+        params.append(group_id)
+    if author_id is not None:
+        conditions.append('p.author_id = %s')
+        params.append(author_id)
+    params.append(settings.SEARCH_MAX_RESULTS)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT f.rowid FROM {FTS_TABLE} f '
+            f'JOIN {posts} p ON p.id = f.rowid '
+            f'WHERE {" AND ".join(conditions)} '
+            f'ORDER BY bm25({FTS_TABLE}), p.pub_date DESC LIMIT %s',
+            params,
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _search_table(terms, group_id, author_id):
+    frequencies = dict(
+        SearchTerm.objects.filter(term__in=terms).values_list(
+            'term'
+        ).annotate(Count('post')).order_by()
+    )
+    if len(frequencies) < len(terms):
+        return []
+    total = get_count(ALL_POSTS, Post.objects.all())
+    weight = Case(
+        *[
+            When(term=term, then=F('count') * Value(
+                math.log(1 + total / frequency)
+            ))
+            for term, frequency in frequencies.items()
+        ],
+        output_field=FloatField(),
+    )
+    entries = SearchTerm.objects.filter(term__in=terms)
+    if group_id is not None:
+        entries = entries.filter(post__group_id=group_id)
+    if author_id is not None:
+        entries = entries.filter(post__author_id=author_id)
+    return list(
+        entries.values('post_id').annotate(
+            matched=Count('term'), score=Sum(weight)
+        ).filter(matched=len(terms)).order_by(
+            '-score', '-post_id'
+        ).values_list('post_id', flat=True)[:settings.SEARCH_MAX_RESULTS]
+    )
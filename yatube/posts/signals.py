@@ -0,0 +1,180 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+
+from . import cache, counters, lookups, search, timeline
+from .models import Comment, Follow, Group, Post, User
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_feeds(sender, instance, raw, **kwargs):
+    """Запоминает автора и группу поста до изменения."""
+    instance._old_feed_ids = None
+    if raw or instance.pk is None:
+        return
+    instance._old_feed_ids = Post.objects.filter(pk=instance.pk).values_list(
+        'author_id', 'group_id'
+    ).first()
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw, update_fields, **kwargs):
+    if raw:
+        return
+    new_ids = (instance.author_id, instance.group_id)
+    old_ids = getattr(instance, '_old_feed_ids', None)
+    keys = counters.post_feed_keys(*new_ids)
+    feeds = cache.feeds_for_post(*new_ids)
+    if update_fields is None or 'text' in update_fields:
+        search.index_post(instance.pk, instance.text)
+    if created or old_ids is None:
+        counters.increment(keys)
+        timeline.fan_out(instance)
+    else:
+        old_keys = counters.post_feed_keys(*old_ids)
+        counters.increment(set(old_keys) - set(keys), -1)
+        counters.increment(set(keys) - set(old_keys))
+        if old_ids != new_ids:
+            feeds += cache.feeds_for_post(*old_ids)
+    cache.bump(feeds)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    search.unindex_post(instance.pk)
+    ids = (instance.author_id, instance.group_id)
+    counters.increment(counters.post_feed_keys(*ids), -1)
+    cache.bump(cache.feeds_for_post(*ids))
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, raw, **kwargs):
+    if not raw and not created:
+        cache.bump(
+            [cache.group_feed(instance.pk)]
+            + cache.feeds_for_posts(instance.posts.all())
+        )
+
+
+@receiver(pre_delete, sender=Group)
+def group_deleting(sender, instance, **kwargs):
+    cache.bump(cache.feeds_for_posts(instance.posts.all()))
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    counters.discard([counters.group_posts_key(instance.pk)])
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, raw, update_fields, **kwargs):
+    # Вход на сайт обновляет только last_login: ленты это не меняет.
+    if raw or created or update_fields == frozenset({'last_login'}):
+        return
+    cache.bump(
+        [cache.profile_feed(instance.pk)]
+        + cache.feeds_for_posts(instance.posts.all())
+    )
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    counters.discard([
+        counters.author_posts_key(instance.pk),
+        counters.followers_key(instance.pk),
+        counters.following_key(instance.pk),
+    ])
+
+
+def lookup_cache(instance):
+    """Кеш процесса и ключ группы или пользователя (`posts.lookups`)."""
+    if isinstance(instance, Group):
+        return lookups.groups, instance.slug
+    return lookups.users, instance.username
+
+
+def evict_lookup(evict):
+    """Вытесняет запись сразу и ещё раз после фиксации транзакции.
+
+    Пока транзакция не зафиксирована, параллельный запрос читает старую
+    строку и может снова положить её в кеш.
+    """
+    evict()
+    transaction.on_commit(evict)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_save, sender=User)
+def forget_lookup(sender, instance, created, update_fields, **kwargs):
+    """Новый объект вытесняет только запись со своим адресом.
+
+    Изменённый мог сменить адрес, а старый неизвестен: кеш очищается
+    целиком. Группы и пользователи меняются редко.
+    """
+    if update_fields == frozenset({'last_login'}):
+        return
+    lru, key = lookup_cache(instance)
+    if created:
+        evict_lookup(lambda: lru.delete(key))
+    else:
+        evict_lookup(lru.clear)
+
+
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=User)
+def forget_deleted_lookup(sender, instance, **kwargs):
+    lru, key = lookup_cache(instance)
+    evict_lookup(lambda: lru.delete(key))
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    if created:
+        Post.objects.filter(pk=instance.post_id).update(
+            comments_count=F('comments_count') + 1
+        )
+    cache.bump([cache.comments_feed(instance.post_id)])
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    Post.objects.filter(pk=instance.post_id, comments_count__gt=0).update(
+        comments_count=F('comments_count') - 1
+    )
+    cache.bump([cache.comments_feed(instance.post_id)])
+
+
+def follow_feeds(follow):
+    """Лента подписок читателя и профили с числом подписчиков."""
+    return [
+        cache.follow_feed(follow.user_id),
+        cache.profile_feed(follow.user_id),
+        cache.profile_feed(follow.author_id),
+    ]
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    if created:
+        counters.increment([
+            counters.followers_key(instance.author_id),
+            counters.following_key(instance.user_id),
+        ])
+        timeline.backfill(instance.user_id, instance.author_id)
+    cache.bump(follow_feeds(instance))
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    counters.increment([
+        counters.followers_key(instance.author_id),
+        counters.following_key(instance.user_id),
+    ], -1)
+    timeline.unfollow(instance.user_id, instance.author_id)
+    cache.bump(follow_feeds(instance))
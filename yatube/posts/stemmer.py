@@ -0,0 +1,122 @@
+"""Стеммер русского языка по алгоритму Snowball.
+
+Реализация следует описанию алгоритма на snowballstem.org: окончания
+отсекаются в области RV (после первой гласной), словообразовательный
+суффикс -ость — в области R2.
+"""
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND = (
+    ('в', 'вши', 'вшись'),
+    ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'),
+)
+ADJECTIVE = (
+    (),
+    ('ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем',
+     'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю',
+     'ая', 'яя', 'ою', 'ею'),
+)
+PARTICIPLE = (
+    ('ем', 'нн', 'вш', 'ющ', 'щ'),
+    ('ивш', 'ывш', 'ующ'),
+)
+REFLEXIVE = (
+    (),
+    ('ся', 'сь'),
+)
+VERB = (
+    ('ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но', 'ет',
+     'ют', 'ны', 'ть', 'ешь', 'нно'),
+    ('ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей', 'уй',
+     'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят', 'ует', 'уют',
+     'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю'),
+)
+NOUN = (
+    (),
+    ('а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии',
+     'и', 'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам',
+     'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия',
+     'ья', 'я'),
+)
+SUPERLATIVE = ('ейше', 'ейш')
+DERIVATIONAL = ('ость', 'ост')
+
+
+def _region(word, start):
+    """Начало области после первой согласной, идущей за гласной."""
+    for i in range(start + 1, len(word)):
+        if word[i] not in VOWELS and word[i - 1] in VOWELS:
+            return i + 1
+    return len(word)
+
+
+def _remove(rv, endings):
+    """Отсекает самое длинное окончание класса.
+
+    Окончания первой группы должны следовать за «а» или «я». Возвращает
+    остаток или None, если окончание не найдено или условие не выполнено.
+    """
+    found = None
+    for group, suffixes in enumerate(endings):
+        for suffix in suffixes:
+            if rv.endswith(suffix) and (
+                    found is None or len(suffix) > len(found[1])):
+                found = group, suffix
+    if found is None:
+        return None
+    group, suffix = found
+    rest = rv[:-len(suffix)]
+    if group == 0 and not rest.endswith(('а', 'я')):
+        return None
+    return rest
+
+
+def _endings(rv):
+    """Шаг 1: окончания деепричастий, прилагательных, глаголов и
+    существительных."""
+    rest = _remove(rv, PERFECTIVE_GERUND)
+    if rest is not None:
+        return rest
+    without_reflexive = _remove(rv, REFLEXIVE)
+    if without_reflexive is not None:
+        rv = without_reflexive
+    rest = _remove(rv, ADJECTIVE)
+    if rest is not None:
+        without_participle = _remove(rest, PARTICIPLE)
+        return rest if without_participle is None else without_participle
+    for endings in (VERB, NOUN):
+        rest = _remove(rv, endings)
+        if rest is not None:
+            return rest
+    return rv
+
+
+def _superlative(rv):
+    """Шаг 4: удвоенная «н», превосходная степень и мягкий знак."""
+    if rv.endswith('нн'):
+        return rv[:-1]
+    for suffix in SUPERLATIVE:
+        if rv.endswith(suffix):
+            rv = rv[:-len(suffix)]
+            return rv[:-1] if rv.endswith('нн') else rv
+    return rv[:-1] if rv.endswith('ь') else rv
+
+
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    rv_start = next(
+        (i + 1 for i, letter in enumerate(word) if letter in VOWELS),
+        len(word),
+    )
+    r2_start = _region(word, _region(word, 0))
+    prefix, rv = word[:rv_start], word[rv_start:]
+    rv = _endings(rv)
+    if rv.endswith('и'):
+        rv = rv[:-1]
+    for suffix in DERIVATIONAL:
+        if rv.endswith(suffix):
+            # Словообразовательный суффикс отсекается только в R2.
+            if rv_start + len(rv) - len(suffix) >= r2_start:
+                rv = rv[:-len(suffix)]
+            break
+    return prefix + _superlative(rv)
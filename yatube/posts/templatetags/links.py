@@ -0,0 +1,29 @@
+from django import template
+from django.template.library import SimpleNode, parse_bits
+
+from posts.links import url
+
+register = template.Library()
+
+
+class LinkNode(SimpleNode):
+    """Узел `{% link %}`: отдельный класс замеряет профилировщик шаблонов."""
+
+
+@register.tag
+def link(parser, token):
+    """`{% url %}` для строк ленты: адрес по готовому шаблону.
+
+    {% link 'posts:profile' post.author [as имя] %}
+    """
+    bits = token.split_contents()[1:]
+    target_var = None
+    if len(bits) >= 2 and bits[-2] == 'as':
+        target_var = bits[-1]
+        bits = bits[:-2]
+    args, kwargs = parse_bits(
+        parser, bits, params=['name'], varargs='args', varkw=None,
+        defaults=None, kwonly=[], kwonly_defaults=None,
+        takes_context=False, name='link',
+    )
+    return LinkNode(url, False, args, kwargs, target_var)
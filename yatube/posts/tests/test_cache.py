@@ -1,8 +1,9 @@
+from django.conf import settings
 from django.core.cache import cache
 from django.test import TestCase, Client
 from django.urls import reverse
 
-from posts.models import Post, User
+from posts.models import Follow, Group, Post, User
 
 
 class CacheTests(TestCase):
@@ -10,21 +11,87 @@ class CacheTests(TestCase):
     def setUpClass(cls):
         super().setUpClass()
         cls.test_user = User.objects.create(username='cache')
+        cls.reader = User.objects.create(username='reader')
+        Follow.objects.create(user=cls.reader, author=cls.test_user)
+        cls.group = Group.objects.create(
+            title='Группа',
+            slug='cache-group',
+            description='Описание',
+        )
         cls.post = Post.objects.create(
             text='Тестовое описание поста',
             author=cls.test_user,
+            group=cls.group,
         )
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def feed_urls(self):
+        return [
+            (self.guest_client, reverse('posts:index')),
+            (self.guest_client,
+             reverse('posts:group_list', args=[self.group.slug])),
+            (self.guest_client,
+             reverse('posts:profile', args=[self.test_user])),
+            (self.reader_client, reverse('posts:follow_index')),
+        ]
 
     def test_pages_uses_correct_template(self):
         """Кэширование данных на главной странице работает корректно."""
         response = self.guest_client.get(reverse('posts:index'))
         cached_response = response.content
-        Post.objects.create(text='Второй пост', author=self.test_user)
+        # Изменение в обход сигналов не сбрасывает кеш.
+        Post.objects.filter(pk=self.post.pk).update(text='Скрытая правка')
         response = self.guest_client.get(reverse('posts:index'))
         self.assertEqual(cached_response, response.content)
         cache.clear()
         response = self.guest_client.get(reverse('posts:index'))
-        self.assertNotEqual(cached_response, response.content)
\ No newline at end of file
+        self.assertNotEqual(cached_response, response.content)
+
+    def test_new_post_invalidates_feeds(self):
+        """Новый пост сразу появляется во всех затронутых лентах."""
+        for client, url in self.feed_urls():
+            client.get(url)
+        Post.objects.create(
+            text='Свежий пост', author=self.test_user, group=self.group
+        )
+        for client, url in self.feed_urls():
+            with self.subTest(url=url):
+                self.assertContains(client.get(url), 'Свежий пост')
+
+    def test_edit_and_delete_invalidate_feed(self):
+        url = reverse('posts:index')
+        self.guest_client.get(url)
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Исправленный текст'
+        post.save()
+        self.assertContains(self.guest_client.get(url), 'Исправленный текст')
+        post.delete()
+        self.assertNotContains(
+            self.guest_client.get(url), 'Исправленный текст'
+        )
+
+    def test_author_rename_invalidates_feed(self):
+        url = reverse('posts:index')
+        self.guest_client.get(url)
+        author = User.objects.get(pk=self.test_user.pk)
+        author.first_name = 'Лев'
+        author.last_name = 'Толстой'
+        author.save()
+        self.assertContains(self.guest_client.get(url), 'Лев Толстой')
+
+    def test_pages_cached_separately(self):
+        """Разные страницы ленты не подменяют друг друга."""
+        for number in range(settings.POSTS_PER_PAGE):
+            Post.objects.create(text=f'Пост {number}', author=self.test_user)
+        url = reverse('posts:index')
+        first = self.guest_client.get(url).content
+        second = self.guest_client.get(url, {'page': 2}).content
+        self.assertNotEqual(first, second)
+        self.assertContains(
+            self.guest_client.get(url, {'page': 2}), self.post.text
+        )
@@ -1,4 +1,10 @@
-from django.test import Client, TestCase
+import base64
+import re
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from posts.models import Comment, Post, User
@@ -43,4 +49,62 @@ class CommentTests(TestCase):
         self.guest_client.post(CommentTests.comment_url,
                                data={'text': text_comment}
                                )
-        self.assertEqual(count_comments, Comment.objects.count())
\ No newline at end of file
+        self.assertEqual(count_comments, Comment.objects.count())
+
+
+@override_settings(COMMENTS_PER_PAGE=3)
+class CommentPaginationTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='commentator')
+        cls.post = Post.objects.create(text=TEST_TEXT, author=cls.user)
+        Comment.objects.bulk_create([
+            Comment(post=cls.post, author=cls.user, text=f'Комментарий {i}')
+            for i in range(7)
+        ])
+        cls.detail_url = reverse('posts:post_detail', args=[cls.post.pk])
+        cls.comments_url = reverse('posts:comments', args=[cls.post.pk])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_post_detail_shows_first_comments(self):
+        response = self.client.get(self.detail_url)
+        comments = response.context['comments']
+        self.assertEqual(len(comments), 3)
+        self.assertIsNotNone(comments.next_cursor)
+
+    def test_comments_endpoint_loads_all_comments_once(self):
+        """Курсоры фрагментов проходят все комментарии без повторов."""
+        comments = self.client.get(self.detail_url).context['comments']
+        texts = [comment.text for comment in comments]
+        cursor = comments.next_cursor
+        while cursor:
+            data = self.client.get(
+                self.comments_url, {'cursor': cursor}
+            ).json()
+            texts += re.findall(r'Комментарий \d+', data['html'])
+            cursor = data['next_cursor']
+        self.assertCountEqual(texts, [f'Комментарий {i}' for i in range(7)])
+
+    def test_overflowing_cursor_returns_first_comments(self):
+        first = self.client.get(self.comments_url).json()
+        for pk in ('1e400', str(2 ** 63)):
+            with self.subTest(pk=pk):
+                raw = f'["n","2020-01-01T00:00:00Z",{pk}]'.encode()
+                response = self.client.get(self.comments_url, {
+                    'cursor': base64.urlsafe_b64encode(raw).decode(),
+                })
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json(), first)
+
+    def test_comment_queries_do_not_depend_on_page_size(self):
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(self.comments_url)
+        with override_settings(COMMENTS_PER_PAGE=7):
+            with CaptureQueriesContext(connection) as large:
+                self.client.get(self.comments_url)
+        self.assertEqual(
+            len(small.captured_queries), len(large.captured_queries)
+        )
@@ -0,0 +1,194 @@
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import counters
+from posts.models import Comment, Counter, Follow, Group, Post
+from posts.utils import CursorPaginator
+
+User = get_user_model()
+
+
+class PostCountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='counter')
+        cls.group = Group.objects.create(
+            title='Группа',
+            slug='counter-group',
+            description='Описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='counter-other',
+            description='Описание',
+        )
+        for _ in range(3):
+            Post.objects.create(
+                author=cls.user, group=cls.group, text='Пост'
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.group_key = counters.group_posts_key(self.group.pk)
+        self.other_key = counters.group_posts_key(self.other_group.pk)
+        self.author_key = counters.author_posts_key(self.user.pk)
+
+    def value(self, key):
+        return Counter.objects.get(key=key).value
+
+    def seed(self):
+        for key, queryset in (
+            (counters.ALL_POSTS, Post.objects.all()),
+            (self.group_key, self.group.posts.all()),
+            (self.other_key, self.other_group.posts.all()),
+            (self.author_key, self.user.posts.all()),
+        ):
+            counters.get_count(key, queryset)
+
+    def test_counter_seeded_on_first_read(self):
+        """Первое чтение считает посты и сохраняет счётчик."""
+        self.assertEqual(
+            counters.get_count(self.group_key, self.group.posts.all()), 3
+        )
+        self.assertEqual(self.value(self.group_key), 3)
+        with self.assertNumQueries(1):
+            counters.get_count(self.group_key, self.group.posts.all())
+
+    def test_concurrent_seed_keeps_stored_value(self):
+        """Счётчик, созданный параллельным чтением, не перезаписывается."""
+        posts = self.group.posts.all()
+        Counter.objects.create(key=self.group_key, value=42)
+        self.assertEqual(
+            counters._count_or_estimate(self.group_key, posts), (42, False)
+        )
+        # Строка появилась между get_or_create и вставкой.
+        with mock.patch.object(
+            Counter.objects, 'get_or_create', side_effect=IntegrityError
+        ):
+            self.assertEqual(
+                counters._count_or_estimate(self.group_key, posts),
+                (42, False),
+            )
+        self.assertEqual(self.value(self.group_key), 42)
+
+    def test_counters_follow_create_edit_delete(self):
+        """Счётчики меняются при создании, переносе и удалении поста."""
+        self.seed()
+        post = Post.objects.create(
+            author=self.user, group=self.group, text='Новый'
+        )
+        self.assertEqual(self.value(counters.ALL_POSTS), 4)
+        self.assertEqual(self.value(self.group_key), 4)
+        self.assertEqual(self.value(self.author_key), 4)
+        post.group = self.other_group
+        post.save()
+        self.assertEqual(self.value(self.group_key), 3)
+        self.assertEqual(self.value(self.other_key), 1)
+        self.assertEqual(self.value(counters.ALL_POSTS), 4)
+        post.delete()
+        self.assertEqual(self.value(self.other_key), 0)
+        self.assertEqual(self.value(counters.ALL_POSTS), 3)
+
+    @override_settings(POSTS_COUNT_EXACT_LIMIT=2)
+    def test_huge_feed_uses_estimate(self):
+        """Ленту больше лимита не пересчитывают и не сохраняют."""
+        count = counters.get_count(self.group_key, self.group.posts.all())
+        self.assertGreaterEqual(count, 3)
+        self.assertFalse(Counter.objects.filter(key=self.group_key).exists())
+
+    def test_paginator_uses_counter(self):
+        self.seed()
+        Counter.objects.filter(key=counters.ALL_POSTS).update(value=42)
+        response = Client().get(reverse('posts:index'))
+        self.assertEqual(response.context['page_obj'].paginator.count, 42)
+
+
+class DenormalizedCountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='writer')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+
+    def comments_count(self):
+        return Post.objects.get(pk=self.post.pk).comments_count
+
+    def test_comments_count(self):
+        """Число комментариев хранится в посте и не уходит ниже нуля."""
+        comment = Comment.objects.create(
+            post=self.post, author=self.reader, text='Первый'
+        )
+        Comment.objects.create(post=self.post, author=self.reader, text='2')
+        self.assertEqual(self.comments_count(), 2)
+        comment.delete()
+        self.assertEqual(self.comments_count(), 1)
+        Post.objects.filter(pk=self.post.pk).update(comments_count=0)
+        Comment.objects.all().delete()
+        self.assertEqual(self.comments_count(), 0)
+
+    def test_follow_counters(self):
+        followers = counters.followers_key(self.author.pk)
+        following = counters.following_key(self.reader.pk)
+        counters.get_count(followers, self.author.following.all())
+        counters.get_count(following, self.reader.follower.all())
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(Counter.objects.get(key=followers).value, 1)
+        self.assertEqual(Counter.objects.get(key=following).value, 1)
+        follow.delete()
+        self.assertEqual(Counter.objects.get(key=followers).value, 0)
+
+    def test_post_detail_reads_author_counter(self):
+        key = counters.author_posts_key(self.author.pk)
+        counters.get_count(key, self.author.posts.all())
+        Counter.objects.filter(key=key).update(value=7)
+        response = Client().get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        self.assertEqual(response.context['author_posts_count'], 7)
+
+    def test_reconcile_command_fixes_drift(self):
+        key = counters.author_posts_key(self.author.pk)
+        counters.get_count(key, self.author.posts.all())
+        Counter.objects.filter(key=key).update(value=100)
+        Post.objects.filter(pk=self.post.pk).update(comments_count=5)
+        out = StringIO()
+        call_command('reconcile_counters', '--dry-run', stdout=out)
+        self.assertIn('Расхождений: 2', out.getvalue())
+        self.assertEqual(Counter.objects.get(key=key).value, 100)
+        call_command('reconcile_counters', stdout=StringIO())
+        self.assertEqual(Counter.objects.get(key=key).value, 1)
+        self.assertEqual(self.comments_count(), 0)
+
+
+class PageWindowTest(TestCase):
+    def test_page_window(self):
+        """Навигация показывает окно страниц вокруг текущей."""
+        paginator = CursorPaginator(
+            Post.objects.all(), settings.POSTS_PER_PAGE
+        )
+        paginator.count = 100 * settings.POSTS_PER_PAGE
+        self.assertEqual(
+            paginator.get_page_window(1), [1, 2, 3, None, 100]
+        )
+        self.assertEqual(
+            paginator.get_page_window(50),
+            [1, None, 48, 49, 50, 51, 52, None, 100],
+        )
+        self.assertEqual(
+            paginator.get_page_window(100), [1, None, 98, 99, 100]
+        )
+        paginator = CursorPaginator(
+            Post.objects.all(), settings.POSTS_PER_PAGE
+        )
+        paginator.count = 3 * settings.POSTS_PER_PAGE
+        self.assertEqual(paginator.get_page_window(2), [1, 2, 3])
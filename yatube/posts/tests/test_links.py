@@ -0,0 +1,77 @@
+from django.contrib.auth import get_user_model
+from django.template import Context, Template
+from django.test import TestCase
+from django.urls import (NoReverseMatch, get_script_prefix, reverse,
+                         set_script_prefix)
+
+from posts.links import url
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class LinksTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Вася.Пупкин@+-_')
+        cls.group = Group.objects.create(title='Группа', slug='test-slug_1')
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Пост'
+        )
+
+    def test_same_as_reverse(self):
+        cases = [
+            ('posts:index', []),
+            ('posts:profile', [self.author]),
+            ('posts:profile', [self.author.username]),
+            ('posts:profile', ['a b?#%{0}']),
+            ('posts:group_list', [self.group.slug]),
+            ('posts:post_detail', [self.post.pk]),
+            ('posts:post_detail', [str(self.post.pk)]),
+            ('posts:post_edit', [self.post.pk]),
+            ('posts:profile_follow', [self.author.username]),
+            ('about:author', []),
+        ]
+        for name, args in cases:
+            with self.subTest(name=name, args=args):
+                self.assertEqual(url(name, *args), reverse(name, args=args))
+
+    def test_invalid_arguments_raise_like_reverse(self):
+        for name, args in (
+            ('posts:post_detail', ['abc']),
+            ('posts:group_list', ['a.b']),
+            ('posts:profile', ['a/b']),
+            ('posts:profile', ['']),
+            ('posts:profile', []),
+        ):
+            with self.subTest(name=name, args=args):
+                with self.assertRaises(NoReverseMatch):
+                    url(name, *args)
+
+    def test_script_prefix(self):
+        prefix = get_script_prefix()
+        set_script_prefix('/yatube/')
+        try:
+            self.assertEqual(
+                url('posts:post_detail', self.post.pk),
+                reverse('posts:post_detail', args=[self.post.pk]),
+            )
+        finally:
+            set_script_prefix(prefix)
+        self.assertEqual(
+            url('posts:post_detail', self.post.pk),
+            f'/posts/{self.post.pk}/',
+        )
+
+    def test_template_tag_matches_url_tag(self):
+        context = Context({'post': self.post})
+        fast = Template(
+            "{% load links %}{% link 'posts:profile' post.author %} "
+            "{% link 'posts:group_list' post.group.slug %}"
+        ).render(context)
+        slow = Template(
+            "{% url 'posts:profile' post.author %} "
+            "{% url 'posts:group_list' post.group.slug %}"
+        ).render(context)
+        self.assertEqual(fast, slow)
@@ -0,0 +1,88 @@
+import pickle
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import lookups
+from posts.models import Group, User
+
+
+class LookupCacheTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        lookups.groups.clear()
+        lookups.users.clear()
+        self.group = Group.objects.create(
+            title='Группа', slug='hot', description='Описание',
+        )
+        self.author = User.objects.create(username='hot-author')
+
+    def test_second_lookup_skips_database(self):
+        hits = lookups.groups.hits
+        first = lookups.get_group('hot')
+        with CaptureQueriesContext(connection) as queries:
+            second = lookups.get_group('hot')
+            author = lookups.get_user('hot-author')
+            self.assertEqual(lookups.get_user('hot-author'), author)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(second, self.group)
+        # Каждый запрос получает свою копию объекта.
+        self.assertIsNot(second, first)
+        self.assertEqual(lookups.groups.hits, hits + 1)
+
+    def test_missing_not_cached(self):
+        self.assertIsNone(lookups.get_user('nobody'))
+        User.objects.create(username='nobody')
+        self.assertIsNotNone(lookups.get_user('nobody'))
+
+    def test_save_and_delete_invalidate(self):
+        lookups.get_group('hot')
+        self.group.slug = 'renamed'
+        self.group.save()
+        self.assertIsNone(lookups.get_group('hot'))
+        self.assertEqual(lookups.get_group('renamed'), self.group)
+        lookups.get_user('hot-author')
+        self.author.delete()
+        self.assertIsNone(lookups.get_user('hot-author'))
+
+    def test_evicted_again_after_commit(self):
+        with transaction.atomic():
+            self.group.title = 'Новое название'
+            self.group.save()
+            # Параллельный запрос ещё видит старую строку и кеширует её.
+            lookups.groups.set('hot', pickle.dumps(Group(slug='hot')))
+        self.assertEqual(len(lookups.groups), 0)
+        self.assertEqual(lookups.get_group('hot').title, 'Новое название')
+
+    def test_last_login_keeps_entry(self):
+        lookups.get_user('hot-author')
+        self.client.force_login(self.author)
+        self.assertEqual(len(lookups.users), 1)
+
+    def test_bypassed_inside_transaction(self):
+        with transaction.atomic():
+            lookups.get_group('hot')
+            with CaptureQueriesContext(connection) as queries:
+                lookups.get_group('hot')
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(len(lookups.groups), 0)
+
+    def test_pages_use_cached_lookups(self):
+        urls = [
+            reverse('posts:group_list', args=['hot']),
+            reverse('posts:profile', args=['hot-author']),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.client.get(url)
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(queries), 0)
+        self.assertEqual(
+            self.client.get(reverse('posts:profile', args=['x'])).status_code,
+            404,
+        )
@@ -0,0 +1,189 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse
+from django.test import (Client, RequestFactory, SimpleTestCase, TestCase,
+                         override_settings)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.cache import INDEX_FEED, is_cacheable, shared_page_cache
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class AnonymousPageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='paged')
+        cls.reader = User.objects.create(username='page-reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='page-group', description='Описание',
+        )
+        cls.post = Post.objects.create(
+            text='Пост из кеша', author=cls.author, group=cls.group,
+        )
+        cls.urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[cls.group.slug]),
+            reverse('posts:profile', args=[cls.author]),
+            reverse('posts:post_detail', args=[cls.post.pk]),
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_anonymous_pages_served_without_queries(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                first = self.guest_client.get(url)
+                with CaptureQueriesContext(connection) as queries:
+                    second = self.guest_client.get(url)
+                # Остаётся только поиск группы, автора или поста для лент.
+                self.assertLessEqual(len(queries), 1)
+                self.assertTemplateNotUsed(second, 'base.html')
+                self.assertEqual(second.status_code, 200)
+                self.assertEqual(second.content, first.content)
+
+    def test_pages_differ_by_page_number(self):
+        url = reverse('posts:index')
+        self.guest_client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            self.guest_client.get(url, {'page': 2})
+        self.assertGreater(len(queries), 0)
+
+    def client_for(self, user):
+        client = Client()
+        client.force_login(user)
+        return client
+
+    def test_users_share_cached_page(self):
+        url = reverse('posts:index')
+        guest = self.guest_client.get(url)
+        self.assertNotContains(guest, 'Пользователь:')
+        for user in (self.reader, self.author):
+            with self.subTest(user=user.username):
+                response = self.client_for(user).get(url)
+                self.assertTemplateNotUsed(response, 'base.html')
+                self.assertTemplateUsed(response, 'includes/header.html')
+                self.assertContains(response, f'Пользователь: {user}')
+
+    def test_follow_button_per_user(self):
+        url = reverse('posts:profile', args=[self.author])
+        self.assertNotContains(self.guest_client.get(url), 'Подписаться')
+        self.assertContains(self.client_for(self.reader).get(url),
+                            'Подписаться')
+        self.assertNotContains(self.client_for(self.author).get(url),
+                               'Подписаться')
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertContains(self.client_for(self.reader).get(url),
+                            'Отписаться')
+
+    def test_post_detail_fragments_per_user(self):
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        edit_url = reverse('posts:post_edit', args=[self.post.pk])
+        guest = self.guest_client.get(url)
+        self.assertNotContains(guest, 'csrfmiddlewaretoken')
+        self.assertNotIn(settings.CSRF_COOKIE_NAME, guest.cookies)
+        reader = self.client_for(self.reader).get(url)
+        self.assertTemplateNotUsed(reader, 'posts/post_detail.html')
+        self.assertContains(reader, 'csrfmiddlewaretoken')
+        self.assertIn(settings.CSRF_COOKIE_NAME, reader.cookies)
+        self.assertNotContains(reader, edit_url)
+        self.assertContains(self.client_for(self.author).get(url), edit_url)
+
+    def test_changes_invalidate_pages(self):
+        changes = {
+            'post': lambda: Post.objects.create(
+                text='Новый пост в кеше', author=self.author,
+                group=self.group,
+            ),
+            'comment': lambda: Comment.objects.create(
+                post=self.post, author=self.reader, text='Новый комментарий',
+            ),
+            'follow': lambda: Follow.objects.create(
+                user=self.reader, author=self.author,
+            ),
+        }
+        for name, change in changes.items():
+            with self.subTest(change=name):
+                cache.clear()
+                pages = {url: self.guest_client.get(url) for url in self.urls}
+                change()
+                changed = [
+                    url for url, response in pages.items()
+                    if self.guest_client.get(url).content != response.content
+                ]
+                self.assertTrue(changed)
+
+    @override_settings(PAGE_CACHE=False)
+    def test_disabled(self):
+        url = reverse('posts:index')
+        self.guest_client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            self.guest_client.get(url)
+        self.assertGreater(len(queries), 0)
+
+
+class CacheableTest(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def test_csrf_and_cookies_not_cached(self):
+        request = self.factory.get('/')
+        self.assertTrue(is_cacheable(request, HttpResponse('ok')))
+        response = HttpResponse('ok')
+        response.set_cookie('name', 'value')
+        self.assertFalse(is_cacheable(request, response))
+        request.META['CSRF_COOKIE_USED'] = True
+        self.assertFalse(is_cacheable(request, HttpResponse('ok')))
+        self.assertFalse(
+            is_cacheable(self.factory.get('/'), HttpResponse(status=404))
+        )
+
+
+class SinglePageBuildTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def test_concurrent_misses_render_once(self):
+        calls = []
+
+        @shared_page_cache(lambda request: [INDEX_FEED])
+        def view(request):
+            calls.append(1)
+            time.sleep(0.1)
+            return HttpResponse('Лента')
+
+        responses = []
+
+        def worker():
+            responses.append(view(self.factory.get('/')))
+
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(
+            [response.content.decode() for response in responses],
+            ['Лента'] * 5,
+        )
+
+    def test_uncacheable_page_rendered_each_time(self):
+        calls = []
+
+        @shared_page_cache(lambda request: [INDEX_FEED])
+        def view(request):
+            calls.append(1)
+            return HttpResponse(status=404)
+
+        for _ in range(2):
+            self.assertEqual(view(self.factory.get('/')).status_code, 404)
+        self.assertEqual(len(calls), 2)
@@ -1,8 +1,11 @@
+import base64
+
 from django.contrib.auth import get_user_model
 from django.test import TestCase, Client
 from django.urls import reverse
 from posts.models import Post, Group
 from django.conf import settings
+from django.core.cache import cache
 
 User = get_user_model()
 
@@ -33,6 +36,7 @@ class PaginatorViewsTest(TestCase):
             )
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
 
     def test_first_page_contains_constant_posts(self):
@@ -89,4 +93,102 @@ class PaginatorViewsTest(TestCase):
         response = self.guest_client.get(
             reverse('posts:group_list', args=[self.group.slug]) + '?page=2')
         profile_posts = len(response.context['page_obj'])
-        self.assertEqual(profile_posts, self.offset)
\ No newline at end of file
+        self.assertEqual(profile_posts, self.offset)
+
+
+class CursorPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='cursor')
+        cls.group = Group.objects.create(
+            title='test',
+            slug='cursor-slug',
+            description='test description',
+        )
+        cls.posts_count = settings.POSTS_PER_PAGE * 2 + 3
+        for number in range(cls.posts_count):
+            Post.objects.create(
+                author=cls.user,
+                group=cls.group,
+                text=f'Пост {number}',
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def walk_pages(self, url):
+        """Проходит ленту по курсорам и возвращает id всех постов."""
+        response = self.guest_client.get(url)
+        page_obj = response.context['page_obj']
+        seen = [post.pk for post in page_obj]
+        while page_obj.next_cursor:
+            response = self.guest_client.get(
+                url, {'cursor': page_obj.next_cursor}
+            )
+            page_obj = response.context['page_obj']
+            seen += [post.pk for post in page_obj]
+        return seen
+
+    def test_cursor_pages_cover_feed_without_gaps(self):
+        """Проход по курсорам выдаёт все посты по одному разу."""
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.user]),
+        ]
+        expected = list(
+            Post.objects.order_by('-pub_date', '-pk')
+            .values_list('pk', flat=True)
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.walk_pages(url), expected)
+
+    def test_cursor_page_stable_under_new_posts(self):
+        """Новый пост не сдвигает страницу, выбранную по курсору."""
+        url = reverse('posts:index')
+        first_page = self.guest_client.get(url).context['page_obj']
+        second_page = self.guest_client.get(
+            url, {'cursor': first_page.next_cursor}
+        ).context['page_obj']
+        Post.objects.create(author=self.user, text='Свежий пост')
+        again = self.guest_client.get(
+            url, {'cursor': first_page.next_cursor}
+        ).context['page_obj']
+        self.assertEqual(list(second_page), list(again))
+
+    def test_previous_cursor_returns_previous_page(self):
+        url = reverse('posts:index')
+        first_page = self.guest_client.get(url).context['page_obj']
+        second_page = self.guest_client.get(
+            url, {'cursor': first_page.next_cursor}
+        ).context['page_obj']
+        back = self.guest_client.get(
+            url, {'cursor': second_page.previous_cursor}
+        ).context['page_obj']
+        self.assertEqual(list(back), list(first_page))
+        self.assertFalse(back.has_previous())
+
+    def test_broken_cursor_returns_first_page(self):
+        url = reverse('posts:index')
+        first_page = self.guest_client.get(url).context['page_obj']
+        response = self.guest_client.get(url, {'cursor': 'не-курсор'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(response.context['page_obj']), list(first_page)
+        )
+
+    def test_overflowing_cursor_returns_first_page(self):
+        url = reverse('posts:index')
+        first_page = self.guest_client.get(url).context['page_obj']
+        for pk in ('1e400', str(2 ** 63), str(-2 ** 64)):
+            with self.subTest(pk=pk):
+                raw = f'["n","2020-01-01T00:00:00Z",{pk}]'.encode()
+                cursor = base64.urlsafe_b64encode(raw).decode()
+                response = self.guest_client.get(url, {'cursor': cursor})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    list(response.context['page_obj']), list(first_page)
+                )
@@ -0,0 +1,95 @@
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class FeedQueryCountTest(TestCase):
+    """Число запросов на страницу ленты не зависит от числа постов."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(
+            username='author', first_name='Имя', last_name='Фамилия'
+        )
+        cls.group = Group.objects.create(
+            title='Группа', slug='queries', description='Описание'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        Post.objects.create(author=cls.author, group=cls.group, text='Пост')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def add_posts(self, count):
+        """Посты с разными группами, чтобы ловить запрос на каждую."""
+        start = Post.objects.count()
+        for number in range(start, start + count):
+            group = Group.objects.create(
+                title=f'Группа {number}',
+                slug=f'queries-{number}',
+                description='Описание',
+            )
+            Post.objects.create(
+                author=self.author, group=group, text=f'Пост {number}'
+            )
+            Post.objects.create(
+                author=self.author, group=self.group, text=f'Пост {number}'
+            )
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def assertConstantQueries(self, url):
+        # Первый запрос заводит счётчики лент, его не учитываем.
+        self.client.get(url)
+        before = self.count_queries(url)
+        self.add_posts(settings.POSTS_PER_PAGE)
+        after = self.count_queries(url)
+        self.assertEqual(
+            before, after,
+            f'{url}: {before} запросов на один пост, {after} на страницу',
+        )
+
+    def test_feeds_have_constant_query_count(self):
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:follow_index'),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertConstantQueries(url)
+
+
+class ExplainFeedsTest(TestCase):
+    def test_feed_queries_use_indexes(self):
+        """Ленты группы и автора читаются по составным индексам."""
+        author = User.objects.create_user(username='author')
+        group = Group.objects.create(
+            title='Группа', slug='explain', description='Описание'
+        )
+        Post.objects.create(author=author, group=group, text='Пост')
+        out = StringIO()
+        call_command('explain_feeds', stdout=out)
+        output = out.getvalue()
+        self.assertIn('post_group_pub_date_idx', output)
+        self.assertIn('post_author_pub_date_idx', output)
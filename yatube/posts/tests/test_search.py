@@ -0,0 +1,119 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import search
+from posts.models import Group, Post
+from posts.stemmer import stem
+
+User = get_user_model()
+
+
+class StemmerTest(TestCase):
+    def test_stem(self):
+        cases = {
+            'котами': 'кот',
+            'кошки': 'кошк',
+            'красивые': 'красив',
+            'прочитавши': 'прочита',
+            'важнейшие': 'важн',
+            'радость': 'радост',
+            'ёлки': 'елк',
+        }
+        for word, expected in cases.items():
+            with self.subTest(word=word):
+                self.assertEqual(stem(word), expected)
+
+
+class SearchTest(TestCase):
+    """Поиск через FTS5 (тесты идут на SQLite)."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='writer')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Коты', slug='cats', description='Про котов'
+        )
+        cls.often = Post.objects.create(
+            author=cls.author, group=cls.group,
+            text='Кот и коты: котами полон дом',
+        )
+        cls.once = Post.objects.create(
+            author=cls.other, text='Рыжий кот спит на диване',
+        )
+        Post.objects.create(author=cls.author, text='Собака лает')
+
+    def test_index_is_used(self):
+        self.assertTrue(search.fts_available())
+
+    def test_stemmed_and_ranked(self):
+        """Словоформы находят пост, частое слово поднимает его выше."""
+        self.assertEqual(
+            search.search('коты'), [self.often.pk, self.once.pk]
+        )
+
+    def test_all_words_must_match(self):
+        self.assertEqual(search.search('рыжие коты'), [self.once.pk])
+        self.assertEqual(search.search('рыжая собака'), [])
+        self.assertEqual(search.search('  ...  '), [])
+
+    def test_filters(self):
+        self.assertEqual(
+            search.search('кот', group_id=self.group.pk), [self.often.pk]
+        )
+        self.assertEqual(
+            search.search('кот', author_id=self.other.pk), [self.once.pk]
+        )
+
+    def test_index_follows_changes(self):
+        post = Post.objects.get(pk=self.once.pk)
+        post.text = 'Рыжая лиса'
+        post.save()
+        self.assertEqual(search.search('лисы'), [post.pk])
+        self.assertEqual(search.search('кот'), [self.often.pk])
+        post.delete()
+        self.assertEqual(search.search('лиса'), [])
+
+    def test_reindex(self):
+        self.assertEqual(search.reindex(), Post.objects.count())
+        self.assertEqual(
+            search.search('коты'), [self.often.pk, self.once.pk]
+        )
+
+    def test_search_view(self):
+        response = Client().get(
+            reverse('posts:search'), {'q': 'котами', 'group': 'cats'}
+        )
+        self.assertEqual(list(response.context['page_obj']), [self.often])
+        self.assertContains(response, 'Найдено постов: 1')
+
+    def test_search_view_unknown_author(self):
+        response = Client().get(
+            reverse('posts:search'), {'q': 'кот', 'author': 'nobody'}
+        )
+        self.assertIsNone(response.context['page_obj'])
+        self.assertTrue(response.context['form'].has_error('author'))
+
+
+class TableSearchTest(SearchTest):
+    """Тот же поиск через таблицу SearchTerm, как на других СУБД."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.patcher = mock.patch.object(
+            search, 'fts_available', return_value=False
+        )
+        cls.patcher.start()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.patcher.stop()
+
+    def test_index_is_used(self):
+        self.assertFalse(search.fts_available())
@@ -0,0 +1,109 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import thumbnails
+from posts.models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+def uploaded(name):
+    return SimpleUploadedFile(
+        name=name, content=SMALL_GIF, content_type='image/gif'
+    )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='thumbnails')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.post = Post.objects.create(
+            author=self.user, text='Пост с картинкой',
+            image=uploaded('thumb.gif'),
+        )
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_generate_saves_thumbnail_url(self):
+        """Адрес миниатюры сохраняется в посте и выводится в ленте."""
+        url = thumbnails.generate(self.post.pk)
+        self.post.refresh_from_db()
+        self.assertTrue(url)
+        self.assertEqual(self.post.thumbnail, url)
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, url)
+
+    def test_feed_shows_original_until_thumbnail_ready(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, self.post.image.url)
+
+    def test_generate_skips_replaced_image(self):
+        """Миниатюра старой картинки не записывается поверх новой."""
+        with mock.patch.object(thumbnails, 'get_thumbnail') as get_thumbnail:
+            get_thumbnail.return_value.url = '/media/cache/old.gif'
+
+            def replace_image(*args, **kwargs):
+                Post.objects.filter(pk=self.post.pk).update(
+                    image='posts/other.gif'
+                )
+                return get_thumbnail.return_value
+
+            get_thumbnail.side_effect = replace_image
+            thumbnails.generate(self.post.pk)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.thumbnail, '')
+
+    def test_edit_with_new_image_resets_thumbnail(self):
+        thumbnails.generate(self.post.pk)
+        with mock.patch.object(thumbnails, 'schedule') as schedule:
+            self.client.post(
+                reverse('posts:post_edit', args=[self.post.pk]),
+                data={'text': 'Новая картинка', 'image': uploaded('new.gif')},
+            )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.thumbnail, '')
+        schedule.assert_called_once()
+
+    def test_edit_without_image_keeps_thumbnail(self):
+        url = thumbnails.generate(self.post.pk)
+        with mock.patch.object(thumbnails, 'schedule') as schedule:
+            self.client.post(
+                reverse('posts:post_edit', args=[self.post.pk]),
+                data={'text': 'Только текст'},
+            )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.thumbnail, url)
+        schedule.assert_not_called()
+
+    def test_generate_thumbnails_command(self):
+        call_command('generate_thumbnails', stdout=mock.Mock())
+        self.post.refresh_from_db()
+        self.assertTrue(self.post.thumbnail)
@@ -0,0 +1,94 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from posts import timeline
+from posts.models import Follow, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.old_post = Post.objects.create(author=cls.author, text='Старый')
+
+    def feed(self, user):
+        return list(timeline.follow_posts(user))
+
+    def test_follow_backfills_and_unfollow_trims(self):
+        """Подписка добавляет посты автора в ленту, отписка убирает."""
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.feed(self.reader), [self.old_post])
+        follow.delete()
+        self.assertEqual(self.feed(self.reader), [])
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=self.reader).exists()
+        )
+
+    def test_backfill_larger_than_insert_limit(self):
+        """Подписка на автора с сотнями постов не упирается в лимит SQLite."""
+        Post.objects.bulk_create(
+            Post(author=self.author, text=f'Пост {number}')
+            for number in range(600)
+        )
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 601
+        )
+
+    def test_new_post_fanned_out_to_followers(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Новый')
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+        self.assertEqual(self.feed(self.reader), [post, self.old_post])
+
+    @override_settings(TIMELINE_FANOUT_MAX_FOLLOWERS=0)
+    def test_big_author_read_on_demand(self):
+        """Посты крупного автора не раскладываются, но видны в ленте."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Новый')
+        self.assertTrue(timeline.is_read_fanout(self.author.pk))
+        self.assertFalse(
+            TimelineEntry.objects.filter(post=post).exists()
+        )
+        self.assertEqual(self.feed(self.reader), [post, self.old_post])
+
+    @override_settings(TIMELINE_MAX_LENGTH=2)
+    def test_timeline_bounded(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        for number in range(3):
+            Post.objects.create(author=self.author, text=f'Пост {number}')
+        timeline.trim(self.reader.pk)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 2
+        )
+        self.assertEqual(len(self.feed(self.reader)), 2)
+
+    @override_settings(TIMELINE_MAX_LENGTH=2)
+    def test_trim_keeps_newest_on_equal_dates(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        posts = [
+            Post.objects.create(author=self.author, text=f'Пост {number}')
+            for number in range(3)
+        ]
+        entries = TimelineEntry.objects.filter(user=self.reader)
+        entries.update(pub_date=posts[0].pub_date)
+        timeline.trim(self.reader.pk)
+        self.assertCountEqual(
+            entries.values_list('post_id', flat=True),
+            [posts[1].pk, posts[2].pk],
+        )
+
+    def test_rebuild_command(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        TimelineEntry.objects.all().delete()
+        call_command('rebuild_timelines', stdout=StringIO())
+        self.assertEqual(self.feed(self.reader), [self.old_post])
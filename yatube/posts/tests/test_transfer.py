@@ -0,0 +1,183 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+
+from posts import cache, counters, search
+from posts.models import Counter, Follow, Group, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class TransferTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='importer')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='import', description='Описание'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def write_jsonl(self, name, records):
+        with open(self.path(name), 'w', encoding='utf-8') as file:
+            for record in records:
+                file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        return self.path(name)
+
+    def call(self, *args, **kwargs):
+        call_command(*args, stdout=StringIO(), stderr=StringIO(), **kwargs)
+
+    def record(self, number, **fields):
+        return {
+            'text': f'Импортированный пост {number}',
+            'pub_date': f'2020-01-{number:02d}T12:00:00+00:00',
+            'author': self.author.username,
+            'group': self.group.slug,
+            **fields,
+        }
+
+    def test_round_trip(self):
+        """Выгрузка загружается обратно с теми же полями."""
+        for file_format in ('jsonl', 'csv'):
+            with self.subTest(file_format=file_format):
+                Post.objects.all().delete()
+                Post.objects.create(
+                    author=self.author, group=self.group, text='Кот спит'
+                )
+                Post.objects.create(author=self.author, text='Без группы')
+                path = self.path(f'posts.{file_format}')
+                self.call('export_posts', path)
+                before = list(Post.objects.order_by('pk').values_list(
+                    'text', 'pub_date', 'author', 'group'
+                ))
+                Post.objects.all().delete()
+                self.call('import_posts', path)
+                after = list(Post.objects.order_by('pk').values_list(
+                    'text', 'pub_date', 'author', 'group'
+                ))
+                self.assertEqual(before, after)
+
+    def test_import_updates_derived_data(self):
+        """Счётчики, поиск и ленты подписок видят загруженные посты."""
+        count = counters.get_count(
+            counters.author_posts_key(self.author.pk), self.author.posts.all()
+        )
+        path = self.write_jsonl('posts.jsonl', [
+            self.record(number) for number in range(1, 6)
+        ])
+        self.call('import_posts', path, batch_size=2)
+        self.assertEqual(Counter.objects.get(
+            key=counters.author_posts_key(self.author.pk)
+        ).value, count + 5)
+        self.assertEqual(len(search.search('импортированные')), 5)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 5
+        )
+        post = Post.objects.get(text='Импортированный пост 3')
+        self.assertEqual(
+            post.pub_date, datetime(2020, 1, 3, 12, tzinfo=timezone.utc)
+        )
+
+    def test_bad_records_are_skipped(self):
+        path = self.write_jsonl('posts.jsonl', [
+            self.record(1),
+            self.record(2, author='nobody'),
+            self.record(3, group='nowhere'),
+            self.record(4, text=''),
+        ])
+        with open(path, 'a', encoding='utf-8') as file:
+            file.write('{не json\n')
+        self.call('import_posts', path)
+        self.assertEqual(Post.objects.count(), 1)
+
+    def test_create_missing(self):
+        path = self.write_jsonl('posts.jsonl', [
+            self.record(1, author='newcomer', group='new-group'),
+        ])
+        self.call('import_posts', path, create_missing=True)
+        post = Post.objects.get()
+        self.assertEqual(post.author.username, 'newcomer')
+        self.assertEqual(post.group.slug, 'new-group')
+
+    def test_resume_after_failure(self):
+        """Прерванная загрузка продолжается без повторов и пропусков."""
+        path = self.write_jsonl('posts.jsonl', [
+            self.record(number) for number in range(1, 6)
+        ])
+        index_post = search.index_post
+
+        def fail_on_third(post_id, text):
+            if text.endswith(' 3'):
+                raise RuntimeError('сбой')
+            index_post(post_id, text)
+
+        with mock.patch.object(search, 'index_post', fail_on_third):
+            with self.assertRaises(RuntimeError):
+                self.call('import_posts', path, batch_size=2)
+        self.assertEqual(Post.objects.count(), 2)
+        self.call('import_posts', path, batch_size=2)
+        self.assertEqual(
+            sorted(Post.objects.values_list('text', flat=True)),
+            [f'Импортированный пост {number}' for number in range(1, 6)],
+        )
+        self.assertFalse(Counter.objects.filter(key__startswith='import:'))
+
+
+class ImportCacheTest(TransactionTestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='importer')
+        self.directory = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def test_feeds_bumped_after_commit(self):
+        """Версии лент меняются только после фиксации пакета."""
+        path = os.path.join(self.directory, 'posts.jsonl')
+        with open(path, 'w', encoding='utf-8') as file:
+            for number in range(1, 6):
+                file.write(json.dumps({
+                    'text': f'Пост {number}',
+                    'pub_date': f'2020-01-{number:02d}T12:00:00+00:00',
+                    'author': self.author.username,
+                }, ensure_ascii=False) + '\n')
+        bumps = []
+        bump = cache.bump
+        index_post = search.index_post
+
+        def record_bump(feeds):
+            bumps.append(connection.in_atomic_block)
+            bump(feeds)
+
+        def fail_on_third(post_id, text):
+            if text.endswith(' 3'):
+                raise RuntimeError('сбой')
+            index_post(post_id, text)
+
+        with mock.patch.object(cache, 'bump', record_bump), \
+                mock.patch.object(search, 'index_post', fail_on_third):
+            with self.assertRaises(RuntimeError):
+                call_command(
+                    'import_posts', path, batch_size=2,
+                    stdout=StringIO(), stderr=StringIO(),
+                )
+        # Откаченный второй пакет версии не меняет.
+        self.assertEqual(bumps, [False])
@@ -0,0 +1,110 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts import thumbnails
+from posts.models import Post
+from posts.uploads import sniff_image_format
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+def jpeg_with_orientation():
+    """JPEG 4x2 с EXIF-поворотом на 90 градусов."""
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    buffer = BytesIO()
+    Image.new('RGB', (4, 2), 'red').save(
+        buffer, format='JPEG', exif=exif.tobytes()
+    )
+    return buffer.getvalue()
+
+
+class SniffImageFormatTest(TestCase):
+    def test_signatures(self):
+        cases = {
+            SMALL_GIF: 'GIF',
+            b'\x89PNG\r\n\x1a\n\x00\x00\x00\x0d': 'PNG',
+            b'\xff\xd8\xff\xe0\x00\x10JFIF\x00': 'JPEG',
+            b'RIFF\x24\x00\x00\x00WEBPVP8 ': 'WEBP',
+            b'<svg xmlns="h': None,
+        }
+        for header, image_format in cases.items():
+            with self.subTest(image_format=image_format):
+                self.assertEqual(sniff_image_format(header), image_format)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageUploadTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='uploader')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def create_post(self, content, name='upload.gif'):
+        return self.client.post(reverse('posts:post_create'), data={
+            'text': 'Пост с картинкой',
+            'image': SimpleUploadedFile(name, content, 'image/gif'),
+        })
+
+    def test_valid_image_is_saved(self):
+        self.create_post(SMALL_GIF)
+        self.assertTrue(Post.objects.filter(image='posts/upload.gif').exists())
+
+    @override_settings(POST_IMAGE_MAX_SIZE=len(SMALL_GIF) - 1)
+    def test_large_file_is_rejected(self):
+        """Слишком большой файл отбрасывается с ошибкой поля."""
+        response = self.create_post(SMALL_GIF)
+        self.assertFalse(Post.objects.exists())
+        self.assertTrue(response.context['form'].has_error('image'))
+
+    def test_unknown_format_is_rejected(self):
+        response = self.create_post(b'<svg xmlns="http://www.w3.org/2000">')
+        self.assertFalse(Post.objects.exists())
+        self.assertTrue(response.context['form'].has_error('image'))
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=1)
+    def test_too_many_pixels_is_rejected(self):
+        response = self.create_post(SMALL_GIF)
+        self.assertFalse(Post.objects.exists())
+        self.assertTrue(
+            response.context['form'].has_error('image', 'too_many_pixels')
+        )
+
+    def test_exif_is_stripped_in_background(self):
+        """Фоновая обработка применяет поворот и удаляет EXIF."""
+        self.create_post(jpeg_with_orientation(), name='photo.jpg')
+        post = Post.objects.get()
+        thumbnails.generate(post.pk)
+        post.refresh_from_db()
+        with post.image.open('rb') as source:
+            image = Image.open(source)
+            self.assertEqual(image.size, (2, 4))
+            self.assertFalse(image.getexif())
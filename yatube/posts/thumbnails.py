@@ -0,0 +1,106 @@
+"""Фоновая подготовка миниатюр картинок постов.
+
+Миниатюра строится пулом потоков после сохранения поста, и её адрес
+записывается в `Post.thumbnail`. Шаблоны лент только выводят готовый
+адрес и никогда не ждут обработки картинки в запросе; пока миниатюры
+нет, показывается исходная картинка. Там же картинка перекодируется
+без метаданных EXIF.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, connection, transaction
+from PIL import Image, ImageOps
+from sorl.thumbnail import get_thumbnail
+
+from . import cache
+from .models import Post
+
+SAVE_OPTIONS = {
+    'JPEG': {'quality': 90, 'optimize': True},
+    'WEBP': {'quality': 90},
+}
+
+logger = logging.getLogger(__name__)
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            thread_name_prefix='thumbnails',
+        )
+    return _executor
+
+
+def strip_metadata(post):
+    """Перекодирует картинку поста без EXIF.
+
+    Ориентация из EXIF применяется к самим пикселям. Возвращает True,
+    если файл картинки заменён.
+    """
+    with post.image.open('rb') as source:
+        image = Image.open(source)
+        image_format = image.format
+        if not image.getexif():
+            return False
+        image = ImageOps.exif_transpose(image)
+        buffer = BytesIO()
+        image.save(buffer, format=image_format, **SAVE_OPTIONS.get(
+            image_format, {}
+        ))
+    old_name = post.image.name
+    storage = post.image.storage
+    new_name = storage.save(old_name, ContentFile(buffer.getvalue()))
+    # Картинку могли заменить, пока она перекодировалась.
+    if Post.objects.filter(pk=post.pk, image=old_name).update(image=new_name):
+        storage.delete(old_name)
+        post.image.name = new_name
+        return True
+    storage.delete(new_name)
+    return False
+
+
+def generate(post_id):
+    """Очищает картинку поста, строит миниатюру и сохраняет её адрес."""
+    post = Post.objects.filter(pk=post_id).only(
+        'image', 'author_id', 'group_id'
+    ).first()
+    if post is None or not post.image:
+        return None
+    changed = strip_metadata(post)
+    thumbnail = get_thumbnail(
+        post.image, settings.THUMBNAIL_GEOMETRY, **settings.THUMBNAIL_OPTIONS
+    )
+    # Картинку могли заменить, пока строилась миниатюра.
+    changed |= bool(Post.objects.filter(
+        pk=post_id, image=post.image.name
+    ).update(thumbnail=thumbnail.url))
+    if changed:
+        cache.bump(cache.feeds_for_post(post.author_id, post.group_id))
+    return thumbnail.url
+
+
+def _run(post_id):
+    close_old_connections()
+    try:
+        return generate(post_id)
+    except Exception:
+        logger.exception('Не удалось построить миниатюру поста %s', post_id)
+    finally:
+        connection.close()
+
+
+def schedule(post):
+    """Ставит миниатюру в очередь после фиксации транзакции."""
+    if not post.image:
+        return
+    if settings.THUMBNAIL_ASYNC:
+        transaction.on_commit(lambda: get_executor().submit(_run, post.pk))
+    else:
+        transaction.on_commit(lambda: generate(post.pk))
@@ -0,0 +1,169 @@
+"""Материализованная лента подписок.
+
+Новый пост сразу раскладывается по лентам читателей автора
+(fan-out on write), и `follow_index` читает готовую таблицу вместо
+соединения через `Follow`. Для авторов с огромным числом читателей
+или постов раскладка слишком дорога: их посты подмешиваются в ленту
+при чтении (fan-out on read). Такой автор отмечается флагом в таблице
+`Counter`, и флаг не снимается, чтобы его посты не пропали из лент.
+"""
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+
+from .counters import author_posts_key
+from .models import Counter, Follow, Post, TimelineEntry
+
+
+def read_fanout_key(author_id):
+    return f'author:{author_id}:read-fanout'
+
+
+def is_read_fanout(author_id):
+    return Counter.objects.filter(key=read_fanout_key(author_id)).exists()
+
+
+def mark_read_fanout(author_id):
+    Counter.objects.get_or_create(key=read_fanout_key(author_id))
+
+
+def _too_big(author_id):
+    max_followers = settings.TIMELINE_FANOUT_MAX_FOLLOWERS
+    followers = Follow.objects.filter(
+        author_id=author_id
+    )[:max_followers + 1].count()
+    if followers > max_followers:
+        return True
+    return Counter.objects.filter(
+        key=author_posts_key(author_id),
+        value__gt=settings.TIMELINE_FANOUT_MAX_POSTS,
+    ).exists()
+
+
+def _entries(user_ids, posts):
+    return [
+        TimelineEntry(
+            user_id=user_id,
+            post_id=post.pk,
+            author_id=post.author_id,
+            pub_date=post.pub_date,
+        )
+        for user_id in user_ids for post in posts
+    ]
+
+
+def _bulk_create(entries):
+    # Django 2.2 не урезает явный batch_size до предела базы, а SQLite
+    # не принимает больше 500 строк в одном INSERT.
+    fields = [
+        field for field in TimelineEntry._meta.concrete_fields
+        if not field.primary_key
+    ]
+    limit = connection.ops.bulk_batch_size(fields, entries)
+    TimelineEntry.objects.bulk_create(
+        entries,
+        batch_size=min(settings.TIMELINE_BATCH_SIZE, limit),
+        ignore_conflicts=True,
+    )
+
+
+def fan_out(post):
+    """Добавляет новый пост в ленты читателей автора."""
+    if is_read_fanout(post.author_id):
+        return
+    if _too_big(post.author_id):
+        mark_read_fanout(post.author_id)
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    _bulk_create(_entries(followers, [post]))
+
+
+def fan_out_many(posts):
+    """Раскладывает пачку постов, например после импорта, по лентам.
+
+    Возвращает id читателей, в чьи ленты добавлены записи.
+    """
+    by_author = {}
+    for post in posts:
+        by_author.setdefault(post.author_id, []).append(post)
+    for author_id in list(by_author):
+        if is_read_fanout(author_id):
+            del by_author[author_id]
+        elif _too_big(author_id):
+            mark_read_fanout(author_id)
+            del by_author[author_id]
+    follows = Follow.objects.filter(
+        author_id__in=by_author
+    ).values_list('user_id', 'author_id')
+    readers = set()
+    entries = []
+    for user_id, author_id in follows.iterator():
+        readers.add(user_id)
+        entries += _entries([user_id], by_author[author_id])
+    _bulk_create(entries)
+    return readers
+
+
+def backfill(user_id, author_id):
+    """Заполняет ленту последними постами автора после подписки."""
+    if is_read_fanout(author_id):
+        return
+    posts = Post.objects.filter(author_id=author_id).only(
+        'pk', 'author_id', 'pub_date'
+    )[:settings.TIMELINE_MAX_LENGTH]
+    _bulk_create(_entries([user_id], posts))
+    trim(user_id)
+
+
+def unfollow(user_id, author_id):
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def trim(user_id):
+    """Удаляет из ленты записи старше `TIMELINE_MAX_LENGTH` последних.
+
+    Граница сравнивается по полному ключу порядка ленты: у постов из
+    `import_posts` и подписок с подгрузкой даты часто совпадают.
+    """
+    boundary = TimelineEntry.objects.filter(user_id=user_id).order_by(
+        '-pub_date', '-post_id'
+    ).values_list('pub_date', 'post_id')[
+        settings.TIMELINE_MAX_LENGTH:settings.TIMELINE_MAX_LENGTH + 1
+    ]
+    boundary = list(boundary)
+    if boundary:
+        pub_date, post_id = boundary[0]
+        TimelineEntry.objects.filter(
+            Q(pub_date__lt=pub_date)
+            | Q(pub_date=pub_date, post_id__lte=post_id),
+            user_id=user_id,
+        ).delete()
+
+
+def rebuild(user_id):
+    """Собирает ленту пользователя заново по его подпискам."""
+    TimelineEntry.objects.filter(user_id=user_id).delete()
+    for author_id in Follow.objects.filter(
+            user_id=user_id).values_list('author_id', flat=True):
+        backfill(user_id, author_id)
+
+
+def follow_posts(user):
+    """Посты ленты подписок: готовая лента плюс крупные авторы."""
+    authors = Follow.objects.filter(user=user).values_list(
+        'author_id', flat=True
+    )
+    read_fanout = [
+        int(key.split(':')[1])
+        for key in Counter.objects.filter(
+            key__in=[read_fanout_key(author_id) for author_id in authors]
+        ).values_list('key', flat=True)
+    ]
+    materialized = TimelineEntry.objects.filter(user=user).order_by(
+        '-pub_date'
+    ).values('post_id')[:settings.TIMELINE_MAX_LENGTH]
+    return Post.objects.filter(
+        Q(pk__in=materialized) | Q(author_id__in=read_fanout)
+    )
@@ -0,0 +1,66 @@
+"""Форматы выгрузки и загрузки постов для `export_posts`/`import_posts`.
+
+Пост — одна запись JSONL или строка CSV с полями `FIELDS`; автор и
+группа указываются именем пользователя и slug. Записи читаются и пишутся
+потоком, по одной, так что память не зависит от размера файла.
+"""
+import csv
+import json
+from contextlib import contextmanager
+
+from .models import Post
+
+FIELDS = ('text', 'pub_date', 'author', 'group', 'image')
+FORMATS = ('jsonl', 'csv')
+
+
+def detect_format(path, default='jsonl'):
+    for name in FORMATS:
+        if path.endswith(f'.{name}'):
+            return name
+    return default
+
+
+def read_records(file, file_format):
+    """Записи файла по одной: (номер записи, словарь полей).
+
+    Вместо словаря для нечитаемой записи отдаётся None.
+    """
+    if file_format == 'csv':
+        yield from enumerate(csv.DictReader(file), start=1)
+        return
+    number = 0
+    for line in file:
+        if line.strip():
+            number += 1
+            try:
+                yield number, json.loads(line)
+            except ValueError:
+                yield number, None
+
+
+class RecordWriter:
+    def __init__(self, file, file_format):
+        self.file = file
+        self.file_format = file_format
+        if file_format == 'csv':
+            self.csv = csv.DictWriter(file, FIELDS)
+            self.csv.writeheader()
+
+    def write(self, record):
+        if self.file_format == 'csv':
+            self.csv.writerow(record)
+        else:
+            self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+@contextmanager
+def keep_pub_date():
+    """Отключает auto_now_add у даты поста, чтобы сохранить дату из файла."""
+    field = Post._meta.get_field('pub_date')
+    auto_now_add = field.auto_now_add
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = auto_now_add
@@ -0,0 +1,78 @@
+"""Потоковая проверка загружаемых картинок.
+
+`ImageUploadGuard` стоит первым в `FILE_UPLOAD_HANDLERS` и видит каждый
+фрагмент файла раньше стандартных обработчиков. По первым байтам он
+определяет формат, а при превышении `POST_IMAGE_MAX_SIZE` сразу
+отбрасывает файл, не дочитывая его в память или на диск. Причина отказа
+сохраняется в запросе, и форма показывает её как ошибку поля.
+"""
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+from django.forms import ImageField
+from django.template.defaultfilters import filesizeformat
+
+HEADER_SIZE = 12
+
+SIGNATURES = (
+    (b'\xff\xd8\xff', 'JPEG'),
+    (b'\x89PNG\r\n\x1a\n', 'PNG'),
+    (b'GIF87a', 'GIF'),
+    (b'GIF89a', 'GIF'),
+)
+
+
+def sniff_image_format(header):
+    """Формат картинки по сигнатуре в начале файла или None."""
+    for signature, image_format in SIGNATURES:
+        if header.startswith(signature):
+            return image_format
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'WEBP'
+    return None
+
+
+def get_upload_errors(request):
+    """Ошибки загрузки файлов запроса: {имя поля: сообщение}."""
+    # Файлы разбираются лениво, при первом обращении к FILES.
+    request.FILES
+    return getattr(request, '_upload_errors', {})
+
+
+class ImageUploadGuard(FileUploadHandler):
+    """Ограничивает размер и формат файла, пока он ещё загружается."""
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.header = b''
+        self.image_format = None
+        if (self.content_length is not None
+                and self.content_length > settings.POST_IMAGE_MAX_SIZE):
+            self.reject(self.too_large_message())
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > settings.POST_IMAGE_MAX_SIZE:
+            self.reject(self.too_large_message())
+        if self.image_format is None and len(self.header) < HEADER_SIZE:
+            self.header += raw_data[:HEADER_SIZE - len(self.header)]
+            if len(self.header) == HEADER_SIZE:
+                self.image_format = sniff_image_format(self.header)
+                if self.image_format is None:
+                    self.reject(ImageField.default_error_messages[
+                        'invalid_image'
+                    ])
+        return raw_data
+
+    def file_complete(self, file_size):
+        # Файл собирают следующие обработчики.
+        return None
+
+    def too_large_message(self):
+        limit = filesizeformat(settings.POST_IMAGE_MAX_SIZE)
+        return f'Размер файла не должен превышать {limit}.'
+
+    def reject(self, message):
+        if self.request is not None:
+            if not hasattr(self.request, '_upload_errors'):
+                self.request._upload_errors = {}
+            self.request._upload_errors[self.field_name] = str(message)
+        raise SkipFile(message)
@@ -15,8 +15,11 @@ urlpatterns = [
          views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/',
          views.post_edit, name='post_edit'),
+    path('posts/<int:post_id>/comments/',
+         views.post_comments, name='comments'),
     path('posts/<int:post_id>/comment/',
          views.add_comment, name='add_comment'),
+    path('search/', views.post_search, name='search'),
     path('follow/', views.follow_index, name='follow_index'),
     path(
         'profile/<str:username>/follow/',
@@ -1,8 +1,215 @@
-from django.core.paginator import Paginator
+import base64
+import binascii
+import json
+
 from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .counters import get_count
+
+CURSOR_NEXT = 'n'
+CURSOR_PREVIOUS = 'p'
+# Диапазон id в базе: больший id в запросе вызывает OverflowError.
+PK_RANGE = range(-2 ** 63, 2 ** 63)
+
+
+class FeedPage(Page):
+    """Страница по номеру с курсором для перехода дальше."""
+
+    @property
+    def next_cursor(self):
+        if not self.has_next():
+            return None
+        return self.paginator.encode_cursor(self[-1], CURSOR_NEXT)
+
+    @property
+    def page_window(self):
+        return self.paginator.get_page_window(self.number)
+
+
+class CursorPage(Page):
+    """Страница, выбранная по курсору, а не по номеру.
+
+    Общее число записей для неё не считается, поэтому номера страниц
+    недоступны: навигация идёт только по `next_cursor`/`previous_cursor`.
+    Запрос выполняется при первом обращении к записям страницы.
+    """
+
+    def __init__(self, rows, paginator, backwards=False, after=False):
+        self._rows = rows
+        self._backwards = backwards
+        self._after = after
+        self.number = None
+        self.paginator = paginator
+
+    def __repr__(self):
+        return '<Cursor page>'
+
+    @cached_property
+    def _evaluated(self):
+        rows = list(self._rows[:self.paginator.per_page + 1])
+        has_more = len(rows) > self.paginator.per_page
+        rows = rows[:self.paginator.per_page]
+        if self._backwards:
+            rows.reverse()
+        return rows, has_more
+
+    @property
+    def object_list(self):
+        return self._evaluated[0]
+
+    @property
+    def is_cursor(self):
+        return True
+
+    def has_next(self):
+        return self._backwards or self._evaluated[1]
+
+    def has_previous(self):
+        if self._backwards:
+            return self._evaluated[1]
+        return self._after
+
+    @property
+    def next_cursor(self):
+        if not self.has_next() or not self.object_list:
+            return None
+        return self.paginator.encode_cursor(
+            self.object_list[-1], CURSOR_NEXT
+        )
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous() or not self.object_list:
+            return None
+        return self.paginator.encode_cursor(
+            self.object_list[0], CURSOR_PREVIOUS
+        )
+
+
+class CursorPaginator(Paginator):
+    """Paginator с поддержкой постраничного вывода по ключу (keyset).
+
+    Записи упорядочиваются по паре (`key_field`, id) по убыванию. Курсор
+    хранит позицию крайней записи страницы, так что следующая страница
+    выбирается условием `WHERE (key, id) < (...)` без OFFSET и COUNT(*),
+    а новые публикации не сдвигают уже показанные записи.
+    Обычный вывод по номеру страницы продолжает работать; если передан
+    `count_key`, число записей берётся из счётчика ленты.
+    """
+
+    def __init__(self, object_list, per_page, key_field='pub_date',
+                 count_key=None, **kwargs):
+        self.key_field = key_field
+        self.count_key = count_key
+        object_list = object_list.order_by(f'-{key_field}', '-pk')
+        super().__init__(object_list, per_page, **kwargs)
+
+    @cached_property
+    def count(self):
+        if self.count_key is None:
+            return super().count
+        return get_count(self.count_key, self.object_list)
+
+    def get_page_window(self, number, on_each_side=2, on_ends=1):
+        """Номера страниц вокруг текущей; None обозначает пропуск."""
+        num_pages = self.num_pages
+        if num_pages <= (on_each_side + on_ends) * 2 + 1:
+            return list(self.page_range)
+        window = []
+        if number > on_each_side + on_ends + 1:
+            window += list(range(1, on_ends + 1)) + [None]
+            start = number - on_each_side
+        else:
+            start = 1
+        if number < num_pages - on_each_side - on_ends:
+            end = number + on_each_side
+            tail = [None] + list(range(num_pages - on_ends + 1, num_pages + 1))
+        else:
+            end = num_pages
+            tail = []
+        return window + list(range(start, end + 1)) + tail
+
+    def encode_cursor(self, obj, direction):
+        field = self.object_list.model._meta.get_field(self.key_field)
+        payload = [direction, field.value_to_string(obj), obj.pk]
+        raw = json.dumps(payload, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Возвращает (направление, значение ключа, id) или None."""
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            direction, value, pk = json.loads(raw.decode())
+            field = self.object_list.model._meta.get_field(self.key_field)
+            value = field.to_python(value)
+            pk = int(pk)
+        except (TypeError, ValueError, OverflowError, binascii.Error,
+                ValidationError):
+            return None
+        if direction not in (CURSOR_NEXT, CURSOR_PREVIOUS) or value is None:
+            return None
+        if pk not in PK_RANGE:
+            return None
+        return direction, value, pk
+
+    def get_cursor_page(self, cursor):
+        """Возвращает страницу после (или до) позиции курсора.
+
+        Некорректный курсор, как и неверный номер в `get_page()`,
+        не приводит к ошибке: отдаётся первая страница.
+        """
+        position = self.decode_cursor(cursor) if cursor else None
+        if position is None:
+            return CursorPage(self.object_list, self)
+        direction, value, pk = position
+        key = self.key_field
+        if direction == CURSOR_NEXT:
+            rows = self.object_list.filter(
+                Q(**{f'{key}__lt': value})
+                | Q(**{key: value, 'pk__lt': pk})
+            )
+            return CursorPage(rows, self, after=True)
+        rows = self.object_list.filter(
+            Q(**{f'{key}__gt': value})
+            | Q(**{key: value, 'pk__gt': pk})
+        ).reverse()
+        return CursorPage(rows, self, backwards=True)
+
+    def _get_page(self, *args, **kwargs):
+        return FeedPage(*args, **kwargs)
+
+
+def get_page(queryset, request, key_field='pub_date', count_key=None):
+    """Возвращает страницу ленты для запроса.
+
+    При наличии `?cursor=` страница выбирается по ключу, иначе —
+    по номеру из `?page=`, как раньше. У обычной страницы тоже есть
+    `next_cursor`, чтобы переход «дальше» уже шёл по курсору, и
+    `page_window` — укороченный список номеров для навигации.
+    """
+    paginator = CursorPaginator(
+        queryset, settings.POSTS_PER_PAGE,
+        key_field=key_field, count_key=count_key,
+    )
+    if 'cursor' in request.GET:
+        return paginator.get_cursor_page(request.GET['cursor'])
+    return paginator.get_page(request.GET.get('page'))
+
 
+def get_comments_page(post, cursor):
+    """Страница комментариев поста, начиная с позиции курсора.
 
-def get_page(queryset, request):
-    paginator = Paginator(queryset, settings.POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    return paginator.get_page(page_number)
\ No newline at end of file
+    Комментарии выбираются по ключу (created, id) вместе с авторами,
+    без подсчёта общего числа: дальше они подгружаются кнопкой
+    «Показать ещё».
+    """
+    paginator = CursorPaginator(
+        post.comments.select_related('author'),
+        settings.COMMENTS_PER_PAGE,
+        key_field='created',
+    )
+    return paginator.get_cursor_page(cursor)
@@ -1,64 +1,178 @@
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.http import JsonResponse
 from django.shortcuts import render, get_object_or_404, redirect
+from django.template.loader import render_to_string
 from django.contrib.auth.decorators import login_required
-from .utils import get_page
-from django.core.paginator import Paginator
-from django.conf import settings
+from core.concurrency import gather
+from .cache import (INDEX_FEED, comments_feed, feed_condition, follow_feed,
+                    fragment_cache, group_feed, profile_feed)
+from .counters import (ALL_POSTS, author_posts_key, followers_key,
+                       following_key, get_count, group_posts_key)
+from . import search, thumbnails
+from .lookups import get_group, get_user, group_or_404, user_or_404
+from .uploads import get_upload_errors
+from .timeline import follow_posts
+from .utils import get_comments_page, get_page
+
+
+from .forms import CommentForm, PostForm, SearchForm
+from .models import Post, Follow
+
+
+def fetched(page):
+    """Выбирает записи страницы сразу, а не при рендеринге шаблона."""
+    len(page)
+    return page
+
+
+def index_feeds(request):
+    return [INDEX_FEED]
+
 
+def group_feeds(request, slug):
+    group = get_group(slug)
+    return None if group is None else [group_feed(group.pk)]
 
-from .forms import PostForm, CommentForm
-from .models import Post, Group, User, Follow
 
+def profile_feeds(request, username):
+    author = get_user(username)
+    return None if author is None else [profile_feed(author.pk)]
 
+
+def post_detail_feeds(request, post_id):
+    ids = Post.objects.filter(pk=post_id).values_list(
+        'author_id', 'group_id'
+    ).first()
+    if ids is None:
+        return None
+    author_id, group_id = ids
+    # Правка поста меняет ленту профиля автора, она же даёт число постов.
+    feeds = [comments_feed(post_id), profile_feed(author_id)]
+    if group_id is not None:
+        feeds.append(group_feed(group_id))
+    return feeds
+
+
+@feed_condition(index_feeds)
 def index(request):
-    page_obj = get_page(Post.objects.all(), request)
-    return render(request, 'posts/index.html', context={'page_obj': page_obj})
+    page_obj = get_page(
+        Post.objects.for_feed(), request, count_key=ALL_POSTS
+    )
+    context = {
+        'page_obj': page_obj,
+        'feed_cache': fragment_cache(request, INDEX_FEED),
+    }
+    return render(request, 'posts/index.html', context)
 
 
+@feed_condition(group_feeds)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    page_obj = get_page(group.posts.all(), request)
+    group = group_or_404(slug)
+    page_obj = get_page(
+        group.posts.for_feed(), request,
+        count_key=group_posts_key(group.pk),
+    )
     context = {
         'group': group,
         'page_obj': page_obj,
+        'feed_cache': fragment_cache(request, group_feed(group.pk)),
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@feed_condition(profile_feeds)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    page_obj = get_page(author.posts.all(), request)
-    following = (request.user != author
-                 and request.user.is_authenticated
-                 and Follow.objects.filter(
-                     user=request.user,
-                     author=author).exists())
-    context = {
+    author = user_or_404(username)
+    context = gather(
+        page_obj=lambda: fetched(get_page(
+            author.posts.for_feed(), request,
+            count_key=author_posts_key(author.pk),
+        )),
+        followers_count=lambda: get_count(
+            followers_key(author.pk), author.following.all()
+        ),
+        following_count=lambda: get_count(
+            following_key(author.pk), author.follower.all()
+        ),
+    )
+    context.update({
         'author': author,
-        'page_obj': page_obj,
-        'following': following,
-    }
+        'feed_cache': fragment_cache(request, profile_feed(author.pk)),
+    })
     return render(request, 'posts/profile.html', context)
 
 
+@feed_condition(post_detail_feeds)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    comments = post.comments.all()
-    form = CommentForm(request.POST or None)
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group'), pk=post_id
+    )
+    context = gather(
+        comments=lambda: fetched(get_comments_page(
+            post, request.GET.get('comments')
+        )),
+        author_posts_count=lambda: get_count(
+            author_posts_key(post.author_id), post.author.posts.all()
+        ),
+    )
+    context['post'] = post
+    return render(request, 'posts/post_detail.html', context)
+
+
+def post_comments(request, post_id):
+    """Следующая порция комментариев поста в виде HTML-фрагмента."""
+    post = get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    comments = get_comments_page(post, request.GET.get('cursor'))
+    return JsonResponse({
+        'html': render_to_string(
+            'posts/includes/comment_list.html',
+            {'comments': comments},
+            request=request,
+        ),
+        'next_cursor': comments.next_cursor,
+    })
+
+
+def post_search(request):
+    form = SearchForm(request.GET or None)
+    page_obj = None
+    if form.is_valid():
+        group = form.cleaned_data['group']
+        author = form.cleaned_data['author']
+        post_ids = search.search(
+            form.cleaned_data['q'],
+            group_id=group and group.pk,
+            author_id=author and author.pk,
+        )
+        page_obj = Paginator(post_ids, settings.POSTS_PER_PAGE).get_page(
+            request.GET.get('page')
+        )
+        posts = Post.objects.for_feed().in_bulk(page_obj.object_list)
+        page_obj.object_list = [
+            posts[pk] for pk in page_obj.object_list if pk in posts
+        ]
+    query = request.GET.copy()
+    query.pop('page', None)
     context = {
-        'post': post,
         'form': form,
-        'comments': comments,
+        'page_obj': page_obj,
+        'query': query.urlencode(),
     }
-    return render(request, 'posts/post_detail.html', context)
+    return render(request, 'posts/search.html', context)
 
 
 @login_required
 def post_create(request):
-    form = PostForm(request.POST or None, files=request.FILES or None)
+    form = PostForm(
+        request.POST or None, files=request.FILES or None,
+        upload_errors=get_upload_errors(request),
+    )
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        thumbnails.schedule(post)
         return redirect('posts:profile', request.user)
     return render(request, 'posts/create_post.html', context={'form': form})
 
@@ -70,10 +184,19 @@ def post_edit(request, post_id):
         return redirect('posts:post_detail', post_id)
 
     form = PostForm(
-        request.POST or None, files=request.FILES or None, instance=post
+        request.POST or None, files=request.FILES or None, instance=post,
+        upload_errors=get_upload_errors(request),
     )
     if form.is_valid():
-        form.save()
+        post = form.save(commit=False)
+        # Счётчик комментариев меняется F-выражениями, не затираем его.
+        fields = list(form.Meta.fields)
+        if 'image' in form.changed_data:
+            post.thumbnail = ''
+            fields.append('thumbnail')
+        post.save(update_fields=fields)
+        if 'image' in form.changed_data:
+            thumbnails.schedule(post)
         return redirect('posts:post_detail', post_id)
 
     context = {
@@ -99,12 +222,11 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(post_list, settings.POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    post_list = follow_posts(request.user).for_feed()
+    page_obj = get_page(post_list, request)
     context = {
         'page_obj': page_obj,
+        'feed_cache': fragment_cache(request, follow_feed(request.user.pk)),
     }
     return render(request, 'posts/follow.html', context)
 
@@ -112,7 +234,7 @@ def follow_index(request):
 @login_required
 def profile_follow(request, username):
     if username != request.user.username:
-        author = get_object_or_404(User, username=username)
+        author = user_or_404(username)
         Follow.objects.get_or_create(
             user=request.user,
             author=author
@@ -14,6 +14,45 @@ import os
 
 
 POSTS_PER_PAGE = 10
+COMMENTS_PER_PAGE = 20
+SEARCH_MAX_RESULTS = 1000
+# Ленты длиннее этого числа постов не пересчитываются целиком,
+# для них пагинатор показывает оценку (None — считать всегда точно).
+POSTS_COUNT_EXACT_LIMIT = 100000
+POSTS_COUNT_ESTIMATE_TIMEOUT = 60 * 60
+# Фрагменты лент сбрасываются сигналами, время жизни — запасной вариант.
+FEED_CACHE_TIMEOUT = 60 * 15
+# Целые страницы лент и постов, общие для всех посетителей.
+PAGE_CACHE = True
+PAGE_CACHE_TIMEOUT = 60 * 15
+# Группы и авторы по адресу в памяти каждого процесса (posts.lookups).
+LOOKUP_CACHE_ENTRIES = 1000
+LOOKUP_CACHE_BYTES = 1024 * 1024
+LOOKUP_CACHE_TIMEOUT = 60
+# Лента подписок хранит не больше TIMELINE_MAX_LENGTH постов. Посты
+# авторов с большим числом читателей или постов в неё не раскладываются,
+# а подмешиваются при чтении.
+TIMELINE_MAX_LENGTH = 1000
+TIMELINE_FANOUT_MAX_FOLLOWERS = 10000
+TIMELINE_FANOUT_MAX_POSTS = 50000
+TIMELINE_BATCH_SIZE = 1000
+
+# Загружаемые картинки проверяются потоково: файл больше
+# POST_IMAGE_MAX_SIZE отбрасывается, не дочитываясь; файлы крупнее
+# FILE_UPLOAD_MAX_MEMORY_SIZE пишутся на диск частями.
+POST_IMAGE_MAX_SIZE = 5 * 1024 * 1024
+POST_IMAGE_MAX_PIXELS = 40_000_000
+FILE_UPLOAD_HANDLERS = [
+    'posts.uploads.ImageUploadGuard',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
+# Миниатюры картинок строятся в фоне пулом потоков после сохранения поста.
+THUMBNAIL_ASYNC = True
+THUMBNAIL_WORKERS = 2
+THUMBNAIL_GEOMETRY = '960x339'
+THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -34,7 +73,7 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
-DEBUG = True
+DEBUG = os.environ.get('DEBUG', '1') != '0'
 
 ALLOWED_HOSTS = [
     'localhost',
@@ -49,6 +88,7 @@ INSTALLED_APPS = [
     'core.apps.CoreConfig',
     'users.apps.UsersConfig',
     'posts.apps.PostsConfig',
+    'benchmarks.apps.BenchmarksConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -59,6 +99,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',
+    'core.middleware.QueryInspectorMiddleware',
+    'core.routers.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -68,10 +111,38 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Время, SQL-запросы, рендеринг и кеш каждого запроса: заголовок
+# Server-Timing и гистограммы на /metrics/. Страница доступна персоналу
+# и сборщику с заголовком `Authorization: Bearer <METRICS_TOKEN>`; без
+# токена — только персоналу. Адрес клиента не проверяется: за прокси
+# он у всех запросов один.
+METRICS_ENABLED = True
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Разбор SQL в доле запросов: повторы одной формы запроса (N+1) и
+# медленные запросы пишутся в журнал core.queries, самые дорогие формы
+# копятся в файлах каталога и выводятся командой dump_queries.
+QUERY_INSPECTOR_SAMPLE_RATE = 1.0 if DEBUG else 0.01
+QUERY_INSPECTOR_SLOW_MS = 100
+QUERY_INSPECTOR_DUPLICATE_THRESHOLD = 5
+QUERY_INSPECTOR_TOP_K = 100
+QUERY_INSPECTOR_STATS_DIR = os.path.join(BASE_DIR, '.cache', 'queries')
+QUERY_INSPECTOR_FLUSH_INTERVAL = 60
+
+# yatube.asgi обслуживает запросы пулом из ASGI_THREADS потоков.
+# Независимые выборки profile и post_detail идут параллельно в пуле из
+# LOOKUP_THREADS потоков (core.concurrency).
+ASGI_THREADS = 32
+CONCURRENT_LOOKUPS = True
+LOOKUP_THREADS = 8
+
 ROOT_URLCONF = 'yatube.urls'
 
 # Путь к директории с шаблонами вынесен в переменную:
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+# Без DEBUG Django сам оборачивает загрузчики в кеширующий, и шаблоны
+# компилируются один раз на процесс; wsgi.py и asgi.py прогревают кеш
+# при запуске (core.template_cache).
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -92,11 +163,70 @@ TEMPLATES = [
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
 
+# База выбирается переменной окружения DATABASE_BACKEND. Соединение с
+# PostgreSQL живёт CONN_MAX_AGE секунд и переживает запросы потока; пулом
+# между процессами служит pgbouncer. SQLite закрывает соединение в конце
+# запроса, но оно не закрывается, а ждёт следующий поток в пуле процесса
+# (core.db_backends.sqlite3): так соединения переживают и сами потоки.
+DATABASE_BACKENDS = {
+    'sqlite': {
+        'ENGINE': 'core.db_backends.sqlite3',
+        'NAME': os.environ.get(
+            'DATABASE_NAME', os.path.join(BASE_DIR, 'db.sqlite3')
+        ),
+        'CONN_MAX_AGE': 0,
+        'OPTIONS': {
+            'POOL_SIZE': int(os.environ.get('DATABASE_POOL_SIZE', 8)),
+            'POOL_RECYCLE': 60 * 60,
+        },
+    },
+    'postgresql': {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('DATABASE_NAME', 'yatube'),
+        'USER': os.environ.get('DATABASE_USER', 'yatube'),
+        'PASSWORD': os.environ.get('DATABASE_PASSWORD', ''),
+        'HOST': os.environ.get('DATABASE_HOST', '127.0.0.1'),
+        'PORT': os.environ.get('DATABASE_PORT', '5432'),
+        'CONN_MAX_AGE': 60,
+    },
+}
+
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+    'default': DATABASE_BACKENDS[os.environ.get('DATABASE_BACKEND', 'sqlite')],
+}
+if 'DATABASE_CONN_MAX_AGE' in os.environ:
+    DATABASES['default']['CONN_MAX_AGE'] = int(
+        os.environ['DATABASE_CONN_MAX_AGE']
+    )
+
+# Реплики только для чтения: в DATABASE_REPLICAS через запятую файлы
+# SQLite или хосты PostgreSQL. Чтения представлений идут на реплики
+# (core.routers), после записи пользователь DATABASE_REPLICA_PIN_SECONDS
+# секунд читает основную базу. Балансировка: round_robin или least_loaded.
+DATABASE_REPLICAS = []
+for number, location in enumerate(filter(None, os.environ.get(
+    'DATABASE_REPLICAS', ''
+).split(',')), start=1):
+    alias = f'replica{number}'
+    key = 'NAME' if 'sqlite' in DATABASES['default']['ENGINE'] else 'HOST'
+    DATABASES[alias] = {
+        **DATABASES['default'], key: location.strip(),
+        'TEST': {'MIRROR': 'default'},
     }
+    DATABASE_REPLICAS.append(alias)
+DATABASE_REPLICA_BALANCE = os.environ.get(
+    'DATABASE_REPLICA_BALANCE', 'round_robin'
+)
+DATABASE_REPLICA_PIN_SECONDS = 10
+DATABASE_REPLICA_PIN_EXEMPT = ['posts.counter']
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+# PRAGMA для каждого нового соединения с файлом SQLite (core.database).
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)),
+    'mmap_size': 256 * 1024 * 1024,
 }
 
 
@@ -131,10 +261,28 @@ STATIC_URL = '/static/'
 
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
 
-CACHES = {
-    'default': {
+# Кеш процесса (locmem) не виден другим воркерам gunicorn; для
+# нескольких процессов задайте CACHE_BACKEND=file или CACHE_BACKEND=redis.
+CACHE_BACKENDS = {
+    'locmem': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    },
+    'file': {
+        'BACKEND': 'core.cache_backends.FileBasedCache',
+        'LOCATION': os.environ.get(
+            'CACHE_LOCATION', os.path.join(BASE_DIR, '.cache')
+        ),
+    },
+    'redis': {
+        'BACKEND': 'core.cache_backends.RedisCache',
+        'LOCATION': os.environ.get(
+            'CACHE_LOCATION', 'redis://127.0.0.1:6379/0'
+        ),
+    },
+}
+
+CACHES = {
+    'default': CACHE_BACKENDS[os.environ.get('CACHE_BACKEND', 'locmem')],
 }
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'